@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Escritura en bloque de listas de bullets en un cuadro de texto
+
+Con la API de python-pptx cada bullet es un add_paragraph() más un acceso a
+text_frame.paragraphs[i] (que reconstruye la lista entera, O(n²)) y cinco
+asignaciones de formato. write_bullets arma el XML de todos los párrafos de
+una vez y lo parsea en una sola llamada; el XML resultante es el mismo que
+genera la API.
+"""
+
+import re
+from dataclasses import dataclass
+from xml.sax.saxutils import escape
+
+from pptx.oxml import parse_xml
+
+from deck_trace import span
+
+NS_A = "http://schemas.openxmlformats.org/drawingml/2006/main"
+
+
+@dataclass(frozen=True)
+class ParagraphStyle:
+    """Formato de párrafo; los campos en None no se escriben"""
+
+    size: float | None = None           # puntos
+    color: object = None                # RGBColor
+    bold: bool | None = None
+    italic: bool | None = None
+    space_before: float | None = None   # puntos
+    space_after: float | None = None    # puntos
+
+
+def _bool(value):
+    return "1" if value else "0"
+
+
+def _ppr_xml(style):
+    """a:pPr con el formato de `style` (vacío si no hay nada que escribir)"""
+    inner = []
+    if style.space_before is not None:
+        inner.append(f'<a:spcBef><a:spcPts val="{round(style.space_before * 100)}"/></a:spcBef>')
+    if style.space_after is not None:
+        inner.append(f'<a:spcAft><a:spcPts val="{round(style.space_after * 100)}"/></a:spcAft>')
+
+    attrs = []
+    if style.size is not None:
+        attrs.append(f' sz="{round(style.size * 100)}"')
+    if style.bold is not None:
+        attrs.append(f' b="{_bool(style.bold)}"')
+    if style.italic is not None:
+        attrs.append(f' i="{_bool(style.italic)}"')
+    fill = (f'<a:solidFill><a:srgbClr val="{style.color}"/></a:solidFill>'
+            if style.color is not None else "")
+    if attrs or fill:
+        def_rpr = f'<a:defRPr{"".join(attrs)}'
+        inner.append(f"{def_rpr}>{fill}</a:defRPr>" if fill else f"{def_rpr}/>")
+
+    return f'<a:pPr>{"".join(inner)}</a:pPr>' if inner else ""
+
+
+def _escape_ctrl_chars(text):
+    """Mismo escape que aplica python-pptx a los caracteres de control"""
+    return re.sub(r"([\x00-\x08\x0B-\x1F])", lambda m: "_x%04X_" % ord(m.group(1)), text)
+
+
+def _runs_xml(text):
+    """Runs de un párrafo; \\n y \\v se convierten en a:br como en python-pptx"""
+    parts = []
+    for idx, run in enumerate(re.split("\n|\v", text)):
+        if idx > 0:
+            parts.append("<a:br/>")
+        if run:
+            parts.append(f"<a:r><a:t>{escape(_escape_ctrl_chars(run))}</a:t></a:r>")
+    return "".join(parts)
+
+
+def paragraphs_xml(bullets, style):
+    """XML de todos los párrafos (a:p) para `bullets` con el mismo formato"""
+    ppr = _ppr_xml(style)
+    return "".join(f"<a:p>{ppr}{_runs_xml(text)}</a:p>" for text in bullets)
+
+
+@span("text")
+def write_bullets(text_frame, bullets, style):
+    """
+    Reemplazar los párrafos de `text_frame` por un párrafo por bullet
+
+    Equivale a escribir cada bullet con add_paragraph() / p.text y aplicar
+    `style` a cada párrafo. Con una lista vacía el cuadro queda como está.
+    """
+    if not bullets:
+        return
+    txBody = text_frame._txBody
+    for p in txBody.p_lst:
+        txBody.remove(p)
+    container = parse_xml(f'<a:txBody xmlns:a="{NS_A}">{paragraphs_xml(bullets, style)}</a:txBody>')
+    txBody.extend(list(container))
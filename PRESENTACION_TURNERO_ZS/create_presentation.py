@@ -2,17 +2,48 @@
 """
 Generador de Presentación PowerPoint para Turnero ZS
 Crea automáticamente una presentación con los slides de la demo
+
+El contenido de los slides vive en slides.json (spec declarativa). Cada slide
+se identifica por el hash de su spec y su XML renderizado se guarda en un
+cache en disco, así que al editar un bullet solo se vuelve a renderizar ese
+slide.
+
+Estilos: con styling="master" (por defecto) la paleta y el formato de texto
+viven en el slide master y los layouts (ver slide_master.py) y los slides solo
+tienen placeholders con texto. styling="inline" conserva el formato directo
+en cada párrafo, como antes, para comparar (ver styling_report.py).
 """
 
+import copy
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+from lxml import etree
 from pptx import Presentation
+from pptx.chart.data import CategoryChartData, XyChartData
+from pptx.enum.chart import XL_CHART_TYPE, XL_LEGEND_POSITION
+from pptx.oxml import parse_xml
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
 from pptx.dml.color import RGBColor
 
-# Crear presentación
-prs = Presentation()
-prs.slide_width = Inches(10)
-prs.slide_height = Inches(7.5)
+from bullet_writer import ParagraphStyle, write_bullets
+from deck_charts import CHART_MAX_POINTS, downsample_chart
+from deck_trace import span
+from slide_master import apply_master_styles, apply_palette, master_layout
+
+SPEC_PATH = Path(__file__).with_name("slides.json")
+CACHE_DIR = Path(__file__).with_name(".slide_cache")
+OUTPUT_PATH = "Turnero_ZS_Presentacion.pptx"
+
+# Subir cuando cambie la forma de renderizar los slides (invalida el cache)
+RENDER_VERSION = 2
+
+STYLINGS = ("master", "inline")
+DEFAULT_STYLING = "master"
 
 # Colores corporativos
 COLOR_PRIMARY = RGBColor(59, 130, 246)      # Azul
@@ -21,595 +52,491 @@ COLOR_ACCENT = RGBColor(249, 115, 22)      # Naranja
 COLOR_DARK = RGBColor(15, 23, 42)          # Gris oscuro
 COLOR_LIGHT = RGBColor(241, 245, 249)      # Gris claro
 
-def add_title_slide(prs, title, subtitle):
-    """Agregar slide de título"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])  # Blank layout
-    background = slide.background
-    fill = background.fill
-    fill.solid()
-    fill.fore_color.rgb = COLOR_PRIMARY
+PALETTE_NAMES = ("primary", "secondary", "accent", "dark", "light")
 
-    # Título
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(2.5), Inches(9), Inches(1.5))
-    title_frame = title_box.text_frame
-    title_frame.text = title
-    title_frame.paragraphs[0].font.size = Pt(60)
-    title_frame.paragraphs[0].font.bold = True
-    title_frame.paragraphs[0].font.color.rgb = RGBColor(255, 255, 255)
-    title_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
-
-    # Subtítulo
-    subtitle_box = slide.shapes.add_textbox(Inches(0.5), Inches(4.2), Inches(9), Inches(2))
-    subtitle_frame = subtitle_box.text_frame
-    subtitle_frame.text = subtitle
-    subtitle_frame.paragraphs[0].font.size = Pt(28)
-    subtitle_frame.paragraphs[0].font.color.rgb = RGBColor(255, 255, 255)
-    subtitle_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
-    subtitle_frame.word_wrap = True
 
-def add_content_slide(prs, title, content_points, video_info=None):
-    """Agregar slide de contenido con puntos"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])  # Blank layout
+def set_palette(**colors):
+    """
+    Reemplazar colores corporativos para los próximos slides y builds
 
-    # Fondo blanco
-    background = slide.background
-    fill = background.fill
+    Acepta los nombres de PALETTE_NAMES con valores hex "RRGGBB" (p. ej.
+    set_palette(primary="0EA5E9")); los que no se pasan quedan como están.
+    Prototipos y cache de slides ya se indexan por paleta.
+    """
+    for name, value in colors.items():
+        if name not in PALETTE_NAMES:
+            raise ValueError(f"Color desconocido: {name!r}")
+        globals()["COLOR_" + name.upper()] = RGBColor.from_string(value.lstrip("#").upper())
+
+# ============================================================================
+# PROTOTIPOS DE SLIDE
+# ============================================================================
+# El esqueleto de cada tipo de slide (fondo, barra superior, cuadros de texto
+# con su formato) se arma una sola vez con la API de python-pptx. Cada slide
+# nuevo clona ese XML y solo completa el texto. Con styling="master" el
+# esqueleto son solo los placeholders del layout; el resto lo hereda.
+
+_PROTOTYPES = {}
+
+def _palette():
+    return tuple(str(c) for c in (COLOR_PRIMARY, COLOR_SECONDARY, COLOR_ACCENT,
+                                  COLOR_DARK, COLOR_LIGHT))
+
+def _set_background(slide, color):
+    fill = slide.background.fill
     fill.solid()
-    fill.fore_color.rgb = RGBColor(255, 255, 255)
+    fill.fore_color.rgb = color
 
-    # Línea de color en top
+def _add_top_bar_and_title(slide):
+    """Línea de color en top y cuadro de título (sin texto)"""
     line = slide.shapes.add_shape(1, Inches(0), Inches(0), Inches(10), Inches(0.1))
     line.fill.solid()
     line.fill.fore_color.rgb = COLOR_PRIMARY
     line.line.color.rgb = COLOR_PRIMARY
 
-    # Título
     title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.3), Inches(9), Inches(0.8))
-    title_frame = title_box.text_frame
-    title_frame.text = title
-    title_frame.paragraphs[0].font.size = Pt(44)
-    title_frame.paragraphs[0].font.bold = True
-    title_frame.paragraphs[0].font.color.rgb = COLOR_DARK
-
-    # Contenido
-    content_box = slide.shapes.add_textbox(Inches(0.7), Inches(1.3), Inches(8.6), Inches(5))
-    text_frame = content_box.text_frame
-    text_frame.word_wrap = True
+    title_para = title_box.text_frame.paragraphs[0]
+    title_para.font.size = Pt(44)
+    title_para.font.bold = True
+    title_para.font.color.rgb = COLOR_DARK
 
-    for i, point in enumerate(content_points):
-        if i > 0:
-            text_frame.add_paragraph()
+def _title_skeleton(slide):
+    _set_background(slide, COLOR_PRIMARY)
 
-        p = text_frame.paragraphs[i]
-        p.text = point
-        p.font.size = Pt(18)
-        p.font.color.rgb = COLOR_DARK
-        p.space_before = Pt(6)
-        p.space_after = Pt(6)
-        p.level = 0
+    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(2.5), Inches(9), Inches(1.5))
+    title_para = title_box.text_frame.paragraphs[0]
+    title_para.font.size = Pt(60)
+    title_para.font.bold = True
+    title_para.font.color.rgb = RGBColor(255, 255, 255)
+    title_para.alignment = PP_ALIGN.CENTER
 
-    # Video info si existe
-    if video_info:
-        video_box = slide.shapes.add_textbox(Inches(0.7), Inches(6.2), Inches(8.6), Inches(0.9))
-        video_frame = video_box.text_frame
-        video_frame.text = f"📹 Video: {video_info}"
-        video_frame.paragraphs[0].font.size = Pt(14)
-        video_frame.paragraphs[0].font.italic = True
-        video_frame.paragraphs[0].font.color.rgb = COLOR_SECONDARY
+    subtitle_box = slide.shapes.add_textbox(Inches(0.5), Inches(4.2), Inches(9), Inches(2))
+    subtitle_frame = subtitle_box.text_frame
+    subtitle_para = subtitle_frame.paragraphs[0]
+    subtitle_para.font.size = Pt(28)
+    subtitle_para.font.color.rgb = RGBColor(255, 255, 255)
+    subtitle_para.alignment = PP_ALIGN.CENTER
+    subtitle_frame.word_wrap = True
 
-def add_two_column_slide(prs, title, left_content, right_content):
-    """Agregar slide con dos columnas"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])  # Blank layout
+def _content_skeleton(slide):
+    _set_background(slide, RGBColor(255, 255, 255))
+    _add_top_bar_and_title(slide)
 
-    # Fondo blanco
-    background = slide.background
-    fill = background.fill
-    fill.solid()
-    fill.fore_color.rgb = RGBColor(255, 255, 255)
+    content_box = slide.shapes.add_textbox(Inches(0.7), Inches(1.3), Inches(8.6), Inches(5))
+    content_box.text_frame.word_wrap = True
 
-    # Línea de color en top
-    line = slide.shapes.add_shape(1, Inches(0), Inches(0), Inches(10), Inches(0.1))
-    line.fill.solid()
-    line.fill.fore_color.rgb = COLOR_PRIMARY
-    line.line.color.rgb = COLOR_PRIMARY
+    # Se quita al instanciar si el slide no tiene video
+    video_box = slide.shapes.add_textbox(Inches(0.7), Inches(6.2), Inches(8.6), Inches(0.9))
+    video_para = video_box.text_frame.paragraphs[0]
+    video_para.font.size = Pt(14)
+    video_para.font.italic = True
+    video_para.font.color.rgb = COLOR_SECONDARY
 
-    # Título
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.3), Inches(9), Inches(0.8))
-    title_frame = title_box.text_frame
-    title_frame.text = title
-    title_frame.paragraphs[0].font.size = Pt(44)
-    title_frame.paragraphs[0].font.bold = True
-    title_frame.paragraphs[0].font.color.rgb = COLOR_DARK
+def _two_column_skeleton(slide):
+    _set_background(slide, RGBColor(255, 255, 255))
+    _add_top_bar_and_title(slide)
 
-    # Columna izquierda
     left_box = slide.shapes.add_textbox(Inches(0.5), Inches(1.3), Inches(4.5), Inches(5.8))
-    left_text = left_box.text_frame
-    left_text.word_wrap = True
-
-    for i, point in enumerate(left_content):
-        if i > 0:
-            left_text.add_paragraph()
-        p = left_text.paragraphs[i]
-        p.text = point
-        p.font.size = Pt(16)
-        p.font.color.rgb = COLOR_DARK
-        p.space_before = Pt(4)
-        p.space_after = Pt(4)
-
-    # Columna derecha
+    left_box.text_frame.word_wrap = True
     right_box = slide.shapes.add_textbox(Inches(5.2), Inches(1.3), Inches(4.3), Inches(5.8))
-    right_text = right_box.text_frame
-    right_text.word_wrap = True
-
-    for i, point in enumerate(right_content):
-        if i > 0:
-            right_text.add_paragraph()
-        p = right_text.paragraphs[i]
-        p.text = point
-        p.font.size = Pt(16)
-        p.font.color.rgb = COLOR_DARK
-        p.space_before = Pt(4)
-        p.space_after = Pt(4)
+    right_box.text_frame.word_wrap = True
+
+def _chart_skeleton(slide):
+    _set_background(slide, RGBColor(255, 255, 255))
+    _add_top_bar_and_title(slide)
+
+SKELETONS = {
+    "title": _title_skeleton,
+    "content": _content_skeleton,
+    "two_column": _two_column_skeleton,
+    "chart": _chart_skeleton,
+}
+
+def _bullet_style(styling, kind):
+    """Formato de los bullets; con el master se hereda del layout"""
+    if styling == "master":
+        return ParagraphStyle()
+    if kind == "two_column":
+        return ParagraphStyle(size=16, color=COLOR_DARK, space_before=4, space_after=4)
+    return ParagraphStyle(size=18, color=COLOR_DARK, space_before=6, space_after=6)
+
+def _slide_layout(prs, kind):
+    """(layout, styling) para un slide de `kind` en `prs`"""
+    layout = master_layout(prs, kind)
+    if layout is not None:
+        return layout, "master"
+    return prs.slide_layouts[6], "inline"  # Blank layout
+
+def _new_slide(prs, layout):
+    """Como prs.slides.add_slide, pero sin clonar los placeholders del layout"""
+    rId, slide = prs.part.add_slide(layout)
+    prs.slides._sldIdLst.add_sldId(rId)
+    return slide
+
+def _prototype(kind, styling):
+    """p:cSld del esqueleto de `kind`, construido la primera vez que se pide"""
+    key = (kind, styling, _palette())
+    proto = _PROTOTYPES.get(key)
+    if proto is None:
+        scratch = new_presentation(styling)
+        slide = scratch.slides.add_slide(_slide_layout(scratch, kind)[0])
+        if styling == "inline":
+            SKELETONS[kind](slide)
+        proto = _PROTOTYPES[key] = copy.deepcopy(slide._element.cSld)
+    return proto
+
+@span("shapes")
+def _add_slide_from_prototype(prs, kind):
+    """Agregar un slide y copiarle el esqueleto de `kind`; devuelve (slide, styling)"""
+    layout, styling = _slide_layout(prs, kind)
+    slide = _new_slide(prs, layout)
+    proto = _prototype(kind, styling)
+    # Se conservan los elementos cSld/spTree del slide nuevo porque
+    # slide.shapes ya quedó enlazado a ellos
+    cSld = slide._element.cSld
+    spTree = cSld.spTree
+    if proto.bg is not None:
+        spTree.addprevious(copy.deepcopy(proto.bg))
+    for shape in proto.spTree.iter_shape_elms():
+        spTree.append(copy.deepcopy(shape))
+    return slide, styling
+
+@span("text")
+def _set_lines(text_frame, text):
+    """Como text_frame.text = text, pero conservando el formato del primer párrafo"""
+    lines = text.split("\n")
+    text_frame.paragraphs[0].text = lines[0]
+    for line in lines[1:]:
+        text_frame.add_paragraph().text = line
+
+# ============================================================================
+# TIPOS DE SLIDE
+# ============================================================================
+
+def add_title_slide(prs, title, subtitle):
+    """Agregar slide de título"""
+    slide, _ = _add_slide_from_prototype(prs, "title")
+    title_box, subtitle_box = slide.shapes
+    _set_lines(title_box.text_frame, title)
+    _set_lines(subtitle_box.text_frame, subtitle)
+    return slide
+
+def add_content_slide(prs, title, content_points, video_info=None):
+    """Agregar slide de contenido con puntos"""
+    slide, styling = _add_slide_from_prototype(prs, "content")
+    # Con styling="inline" el primer shape es la barra superior
+    *_, title_box, content_box, video_box = slide.shapes
+    title_box.text_frame.paragraphs[0].text = title
+
+    # Contenido
+    write_bullets(content_box.text_frame, content_points, _bullet_style(styling, "content"))
+
+    # Video info si existe
+    if video_info:
+        if not isinstance(video_info, str):
+            video_info = ", ".join(video_info)
+        video_box.text_frame.paragraphs[0].text = f"📹 Video: {video_info}"
+    else:
+        video_box._element.getparent().remove(video_box._element)
+
+    return slide
+
+def add_two_column_slide(prs, title, left_content, right_content):
+    """Agregar slide con dos columnas"""
+    slide, styling = _add_slide_from_prototype(prs, "two_column")
+    *_, title_box, left_box, right_box = slide.shapes
+    title_box.text_frame.paragraphs[0].text = title
+
+    column_style = _bullet_style(styling, "two_column")
+    write_bullets(left_box.text_frame, left_content, column_style)
+    write_bullets(right_box.text_frame, right_content, column_style)
+    return slide
+
+CHART_BOX = (Inches(0.7), Inches(1.3), Inches(8.6), Inches(5.7))
+
+@span("chart")
+def add_chart_slide(prs, title, chart_type, series, categories=None,
+                    x_title=None, y_title=None, x_format=None):
+    """
+    Agregar slide con un gráfico nativo de PowerPoint
+
+    Args:
+        chart_type: "line" (XY con líneas; cada serie trae "x" e "y") o
+            "bar" (columnas; cada serie trae "values" para `categories`)
+        series: Lista de dicts con "name" y los datos
+        x_title, y_title: Títulos de los ejes (opcionales)
+        x_format: Formato numérico del eje X, p. ej. "dd/mm hh:mm" si X son
+            fechas seriales de Excel
+
+    Las series se escriben tal cual: reducirlas antes con
+    deck_charts.downsample_chart (build_presentation lo hace).
+    """
+    slide, _ = _add_slide_from_prototype(prs, "chart")
+    *_, title_box = slide.shapes
+    title_box.text_frame.paragraphs[0].text = title
+
+    if chart_type == "line":
+        chart_data = XyChartData()
+        for item in series:
+            points = chart_data.add_series(item["name"])
+            for x, y in zip(item["x"], item["y"]):
+                points.add_data_point(x, y)
+        xl_type = XL_CHART_TYPE.XY_SCATTER_LINES_NO_MARKERS
+    elif chart_type == "bar":
+        chart_data = CategoryChartData()
+        chart_data.categories = categories
+        for item in series:
+            chart_data.add_series(item["name"], item["values"])
+        xl_type = XL_CHART_TYPE.COLUMN_CLUSTERED
+    else:
+        raise ValueError(f"Tipo de gráfico desconocido: {chart_type!r}")
+
+    chart = slide.shapes.add_chart(xl_type, *CHART_BOX, chart_data).chart
+    chart.font.size = Pt(12)
+    chart.has_legend = len(series) > 1
+    if chart.has_legend:
+        chart.legend.position = XL_LEGEND_POSITION.BOTTOM
+        chart.legend.include_in_layout = False
+    if x_title:
+        chart.category_axis.axis_title.text_frame.text = x_title
+    if y_title:
+        chart.value_axis.axis_title.text_frame.text = y_title
+    if x_format:
+        chart.category_axis.tick_labels.number_format = x_format
+        chart.category_axis.tick_labels.number_format_is_linked = False
+    return slide
 
 # ============================================================================
-# SLIDES
+# SPEC Y BUILD INCREMENTAL
 # ============================================================================
 
-# Slide 1: Portada
-add_title_slide(prs, "Turnero ZS",
-    "Sistema de Gestión de Turnos\nPara Centros de Salud Argentinos")
-
-# Slide 2: Problema y Contexto
-add_content_slide(prs, "Problema y Contexto",
-    [
-        "❌ Demoras prolongadas en atención a pacientes",
-        "❌ Desorganización en las colas de espera",
-        "❌ Información fragmentada entre sistemas",
-        "❌ Falta de visibilidad en tiempo real",
-        "",
-        "✅ Solución: Sistema integrado de gestión de turnos",
-        "✅ Contexto: Sistema de salud argentino (CAPS/Hospitales)",
-        "✅ Objetivo: Reducir tiempos de espera y mejorar experiencia"
-    ])
-
-# Slide 3: Características Principales
-add_content_slide(prs, "Características Principales",
-    [
-        "✅ Gestión de turnos en tiempo real",
-        "✅ Cola de pacientes diaria con múltiples estados",
-        "✅ Pantalla pública de avance (Realtime)",
-        "✅ Control de profesionales y consultorios",
-        "✅ Sistema de roles y permisos granulares",
-        "✅ Múltiples instituciones en una plataforma",
-        "✅ Toggle para cargar pacientes habilitados o pendientes",
-        "✅ Audio TTS para llamada de pacientes"
-    ])
-
-# Slide 4: Flujo del Paciente
-add_content_slide(prs, "Flujo del Paciente en el Sistema",
-    [
-        "📋 PENDIENTE → ✅ DISPONIBLE → 📢 LLAMADO → ✓ ATENDIDO",
-        "",
-        "• Pendiente: Paciente registrado, requiere habilitación",
-        "  (Solo el creador puede habilitar)",
-        "",
-        "• Disponible: Paciente habilitado, listo para ser llamado",
-        "",
-        "• Llamado: Paciente siendo llamado (con audio TTS)",
-        "",
-        "• Atendido: Consulta completada (fin del proceso)"
-    ],
-    "01-flujo-paciente-overview.mp4")
-
-# Slide 5: Login y Autenticación
-add_content_slide(prs, "Demo 1: Login y Autenticación",
-    [
-        "🔐 Autenticación segura con Supabase Auth",
-        "",
-        "• Ingresar credenciales (email + password)",
-        "• Sistema reconoce múltiples instituciones asignadas",
-        "• Seleccionar institución de trabajo",
-        "• Acceder al dashboard según rol",
-        "",
-        "Videos:",
-        "  • 02-login-admin.mp4",
-        "  • 03-login-usuario-general.mp4"
-    ])
-
-# Slide 6: Dashboard Principal
-add_content_slide(prs, "Demo 2: Dashboard Principal",
-    [
-        "📊 Interfaz principal del sistema",
-        "",
-        "Información visible:",
-        "• Cantidad de pacientes por estado (Pendiente, Disponible, etc.)",
-        "• Filtros avanzados (Servicio, Profesional, Consultorio, Estado)",
-        "• Lista de pacientes en tiempo real",
-        "• Botón para cargar nuevo paciente",
-        "• Información de cada paciente (hora de carga, profesional, etc.)",
-    ],
-    "04-dashboard-overview.mp4")
-
-# Slide 7: Cargar Paciente - Parte 1
-add_content_slide(prs, "Demo 3: Cargar Nuevo Paciente (Parte 1)",
-    [
-        "📝 Abrir diálogo 'Cargar Nuevo Paciente'",
-        "",
-        "Pasos:",
-        "1. Clic en botón '+ Cargar Paciente'",
-        "2. Modal scroll aparece (se puede desplazar si hay mucho contenido)",
-        "3. Ingresar Nombre Completo",
-        "4. Ingresar DNI",
-        "5. Validación automática de campos",
-    ],
-    "05-cargar-paciente-form.mp4")
-
-# Slide 8: Cargar Paciente - Parte 2
-add_content_slide(prs, "Demo 4: Cargar Nuevo Paciente (Parte 2)",
-    [
-        "🏥 Seleccionar servicios/profesionales",
-        "",
-        "Pasos:",
-        "1. Checkboxes múltiples para servicios",
-        "2. Checkboxes múltiples para profesionales asignados hoy",
-        "3. Contador de seleccionados",
-        "4. Puede seleccionar múltiples opciones",
-        "5. Modal scroll permite ver muchas opciones",
-    ],
-    "06-cargar-paciente-servicios.mp4")
-
-# Slide 9: Toggle de Estado Inicial (FEATURE NUEVA)
-add_content_slide(prs, "Demo 5: Toggle Estado Inicial (⭐ NUEVA FEATURE)",
-    [
-        "🎚️ Control de estado inicial del paciente",
-        "",
-        "Opciones:",
-        "⟳ Pendiente (defecto, ámbar)",
-        "   → Requiere habilitación posterior",
-        "   → Solo el creador puede habilitar",
-        "",
-        "✓ Disponible (verde)",
-        "   → Inmediatamente disponible para atención",
-        "   → Ya está habilitado",
-        "",
-        "💡 Permite flexibilidad en el flujo de carga",
-    ],
-    "07-cargar-paciente-toggle.mp4")
-
-# Slide 10: Confirmar Carga
-add_content_slide(prs, "Demo 6: Confirmar Carga de Paciente",
-    [
-        "✅ Finalizar carga del paciente",
-        "",
-        "Pasos:",
-        "1. Clic en botón 'Cargar Paciente'",
-        "2. Modal se cierra automáticamente",
-        "3. Paciente aparece en la cola",
-        "4. Estado según selección (Pendiente o Disponible)",
-        "5. Hora de carga se registra automáticamente",
-        "6. Optimistic UI: aparece inmediatamente",
-    ],
-    "08-cargar-paciente-submit.mp4")
-
-# Slide 11: Cola de Pacientes
-add_content_slide(prs, "Demo 7: Gestión de Pacientes en Cola",
-    [
-        "📋 Vista completa de la cola del día",
-        "",
-        "Información visible por paciente:",
-        "• Número de orden (001, 002, 003, etc.)",
-        "• Nombre y DNI del paciente",
-        "• Servicio solicitado",
-        "• Estado con código de color",
-        "• Profesional y consultorio asignado",
-        "• Hora de carga (con 🕐 icon)",
-        "• Botones de acción según estado",
-    ],
-    "09-cola-pacientes-overview.mp4")
-
-# Slide 12: Habilitar Paciente (Permisos)
-add_content_slide(prs, "Demo 8: Habilitar Paciente (Control de Permisos)",
-    [
-        "🔒 Solo el admin que cargó el paciente puede habilitarlo",
-        "",
-        "Casos:",
-        "✅ Creador del paciente:",
-        "   → Ve botón 'Habilitar' activo",
-        "   → Puede cambiar de Pendiente a Disponible",
-        "",
-        "❌ Otro usuario:",
-        "   → Ve botón 'Habilitar' deshabilitado",
-        "   → Muestra icono 🔒 (candado)",
-        "   → Explicación en tooltip",
-        "",
-        "💡 Seguridad: Solo quien carga controla habilitación"
-    ],
-    "10-habilitar-paciente.mp4")
-
-# Slide 13: Permiso Denegado
-add_content_slide(prs, "Demo 9: Control de Permisos en Acción",
-    [
-        "🚫 Visualizar restricción de permisos",
-        "",
-        "Escenario:",
-        "• Paciente cargado por Admin A",
-        "• Admin B intenta habilitar",
-        "• Sistema muestra: Botón deshabilitado con 🔒",
-        "",
-        "Beneficios:",
-        "✅ Responsabilidad clara (quién cargó, quién habilita)",
-        "✅ Previene cambios no autorizados",
-        "✅ Trazabilidad del proceso",
-        "✅ Seguridad del flujo",
-    ],
-    "11-permiso-denegado.mp4")
-
-# Slide 14: Llamar Paciente
-add_content_slide(prs, "Demo 10: Llamar Paciente (Audio TTS)",
-    [
-        "📢 Sistema de llamada con audio en español",
-        "",
-        "Proceso:",
-        "1. Seleccionar paciente en estado 'Disponible'",
-        "2. Clic en botón 'Llamar'",
-        "3. Audio TTS anuncia: 'Paciente [nombre], consultorio [número]'",
-        "4. Duración: ~11 segundos (dos anuncios)",
-        "5. Estado cambia a 'Llamado'",
-        "",
-        "💡 Diferenciador: Audio generado en tiempo real",
-        "💡 Accesibilidad: Ayuda a pacientes con discapacidad visual",
-    ],
-    "12-llamar-paciente.mp4")
-
-# Slide 15: Registrar Atención
-add_content_slide(prs, "Demo 11: Registrar Atención Completada",
-    [
-        "✓ Marcar paciente como atendido",
-        "",
-        "Proceso:",
-        "1. Paciente en estado 'Llamado' (en consulta)",
-        "2. Clic en botón 'Registrar Atención'",
-        "3. Estado cambia a 'Atendido'",
-        "4. Timestamp automático de fin",
-        "5. Paciente completa su flujo",
-        "",
-        "Datos registrados:",
-        "• Hora de carga",
-        "• Hora de habilitación (si aplica)",
-        "• Hora de llamada",
-        "• Hora de atención completada"
-    ],
-    "13-registrar-atencion.mp4")
-
-# Slide 16: Filtros - Básicos
-add_content_slide(prs, "Demo 12: Filtros Avanzados (Parte 1)",
-    [
-        "🔍 Filtrado por criterios individuales",
-        "",
-        "Opciones de filtro:",
-        "• Por Servicio (Cardiología, Pediatría, etc.)",
-        "• Por Profesional (Nombre del doctor)",
-        "• Por Consultorio (A, B, C, etc.)",
-        "• Por Estado (Pendiente, Disponible, Llamado, Atendido)",
-        "",
-        "Interacción:",
-        "1. Seleccionar filtro en dropdown",
-        "2. Cola se actualiza inmediatamente",
-        "3. Mostrar cantidad de resultados",
-        "4. Botón 'Limpiar filtros' para resetear"
-    ],
-    "14-filtros-basicos.mp4")
-
-# Slide 17: Filtros - Múltiples
-add_content_slide(prs, "Demo 13: Filtros Avanzados (Parte 2)",
-    [
-        "🔍 Combinación de múltiples filtros",
-        "",
-        "Ejemplos:",
-        "• Filtrar: Servicio=Cardiología + Estado=Disponible",
-        "• Filtrar: Profesional=Dr. García + Estado=Pendiente",
-        "• Filtrar: Consultorio=A + Servicio=Pediatría",
-        "",
-        "Resultados:",
-        "• Actualización en tiempo real",
-        "• Contador de pacientes que cumplen criterios",
-        "• Todos los filtros se aplican simultáneamente",
-        "• Limpiar todo con un clic",
-    ],
-    "15-filtros-multiples.mp4")
-
-# Slide 18: Pantalla Pública - Overview
-add_content_slide(prs, "Demo 14: Pantalla Pública (Parte 1)",
-    [
-        "📺 Visualización pública de la cola para pacientes",
-        "",
-        "Características:",
-        "• URL diferente: /pantalla/[institution-id]",
-        "• No requiere login (o solo rol 'pantalla')",
-        "• Información clara y legible",
-        "• Diseño atractivo y simple",
-        "• Actualización automática en tiempo real",
-        "• Responsive (funciona en TV, tablet, mobile)",
-        "",
-        "Información visible:",
-        "• Próximo paciente a ser atendido",
-        "• Servicio y profesional",
-        "• Consultorio asignado"
-    ],
-    "16-pantalla-publica-overview.mp4")
-
-# Slide 19: Pantalla Pública - Realtime
-add_content_slide(prs, "Demo 15: Sincronización en Tiempo Real",
-    [
-        "⚡ Actualización instantánea sin recargar",
-        "",
-        "Flujo demostrativo:",
-        "1. Pantalla pública abierta en una TV/monitor",
-        "2. Admin carga paciente en dashboard",
-        "3. Paciente aparece INMEDIATAMENTE en pantalla (Supabase Realtime)",
-        "4. Admin habilita paciente",
-        "5. Estado se actualiza en pantalla",
-        "6. Admin llamar paciente",
-        "7. Cambio visible en tiempo real",
-        "",
-        "💡 Tecnología: Supabase Realtime Channels",
-        "💡 Diferenciador: No requiere polling o refresco"
-    ],
-    "17-pantalla-realtime.mp4")
-
-# Slide 20: Roles y Permisos
-add_content_slide(prs, "Demo 16: Sistema de Roles y Permisos",
-    [
-        "👥 Diferentes vistas según rol del usuario",
-        "",
-        "Roles implementados:",
-        "👤 Admin: Acceso completo (todos los servicios)",
-        "👤 Administrativo: Cargar pacientes, habilitar",
-        "👤 Médico: Solo sus servicios y pacientes",
-        "👤 Enfermería: Auxiliar del administrativo",
-        "👤 Pantalla: Solo lectura de cola pública",
-        "",
-        "Demostración:",
-        "• Login con diferentes usuarios",
-        "• Mostrar interfaz diferente por rol",
-        "• Explicar permisos de cada rol"
-    ],
-    "18-roles-y-permisos.mp4")
-
-# Slide 21: Información de Paciente
-add_content_slide(prs, "Demo 17: Detalles de Paciente",
-    [
-        "ℹ️ Información completa de cada paciente",
-        "",
-        "Datos visibles:",
-        "• Nombre completo del paciente",
-        "• DNI",
-        "• Número de orden (001, 002, etc.)",
-        "• Servicio seleccionado",
-        "• Profesional asignado",
-        "• Consultorio asignado",
-        "• Hora de carga (con 🕐 icon)",
-        "• Estado actual",
-        "• Timestamps de transiciones (si aplica)",
-    ],
-    "19-info-paciente.mp4")
-
-# Slide 22: Stack Tecnológico
-add_two_column_slide(prs, "Stack Tecnológico",
-    [
-        "Frontend:",
-        "• Next.js 15.5.2",
-        "• React 19",
-        "• TypeScript",
-        "• Tailwind CSS 4",
-        "• shadcn/ui 3",
-        "",
-        "Testing:",
-        "• Vitest",
-        "• React Testing Library",
-        "• 152 tests passing"
-    ],
-    [
-        "Backend:",
-        "• Supabase",
-        "• PostgreSQL",
-        "• Supabase Auth",
-        "• Supabase Realtime",
-        "",
-        "DevOps:",
-        "• GitHub Actions",
-        "• Vercel Deployment",
-        "• Row Level Security (RLS)",
-        "• Multi-tenancy"
-    ])
-
-# Slide 23: Métricas y Resultados
-add_content_slide(prs, "Métricas y Resultados Alcanzados",
-    [
-        "✅ Objetivos del MVP:",
-        "  • Reducir tiempo de espera en 25-40%",
-        "  • Disminuir absentismo en 10-20%",
-        "  • Alcanzar ≥85% ocupación de horarios",
-        "  • Mantener ≥95% trazabilidad completa",
-        "",
-        "✅ Características implementadas:",
-        "  • Gestión de cola diaria en tiempo real",
-        "  • Sistema de llamada con audio TTS",
-        "  • Pantalla pública con Realtime",
-        "  • Control granular de permisos",
-        "  • 152 tests automatizados",
-        "  • Sin errores de typecheck/lint"
-    ])
-
-# Slide 24: Ventajas Competitivas
-add_content_slide(prs, "Ventajas Competitivas",
-    [
-        "🚀 Sistema integrado (sin cambios en HSI)",
-        "⚡ Tiempo real (sin recargas)",
-        "📱 Responsive (desktop, tablet, mobile)",
-        "🔒 Seguro (RLS, autenticación, permisos)",
-        "🌐 Multi-tenancy (múltiples instituciones)",
-        "♿ Accesible (WCAG compliant)",
-        "📊 Escalable (PostgreSQL + Supabase)",
-        "🎯 Intuitivo (UI clara y lógica)",
-        "🎚️ Toggle para estado inicial (flexibilidad)",
-        "📢 Audio TTS en español (diferenciador)"
-    ])
-
-# Slide 25: Roadmap Futuro
-add_two_column_slide(prs, "Roadmap Futuro",
-    [
-        "Corto Plazo (1-2 meses):",
-        "✓ Integración HSI",
-        "✓ Reportes avanzados",
-        "✓ Notificaciones push",
-        "",
-        "Mediano Plazo (3-6 meses):",
-        "✓ App móvil para pacientes",
-        "✓ Confirmación por SMS",
-        "✓ Asignación automática"
-    ],
-    [
-        "Largo Plazo (6+ meses):",
-        "✓ Predicción de demora (ML)",
-        "✓ Gestor de camas",
-        "✓ Sistema de emergencia",
-        "",
-        "Opcionales:",
-        "✓ Integración con PACS",
-        "✓ Teleconsulta",
-        "✓ Analítica avanzada"
-    ])
-
-# Slide 26: Conclusión y CTA
-add_content_slide(prs, "Conclusión y Próximos Pasos",
-    [
-        "✅ Sistema completo de gestión de turnos",
-        "✅ Mejora significativa en experiencia del paciente",
-        "✅ Fácil integración con institutos existentes",
-        "",
-        "📈 Impacto esperado:",
-        "• Reducción de tiempos de espera",
-        "• Mayor satisfacción de pacientes",
-        "• Optimización de recursos",
-        "• Mejor trazabilidad de procesos",
-        "",
-        "🎯 Próximos pasos:",
-        "• Feedback de instituciones piloto",
-        "• Refinamiento según necesidades",
-        "• Rollout a más instituciones"
-    ])
-
-# Slide 27: Contacto y Links
-add_title_slide(prs, "¡Gracias!",
-    "GitHub: github.com/licjavierbarrios/turnero-zs\n\n" +
-    "Email: licjavierbarrios@gmail.com\n\n" +
-    "Demo: [URL en producción]")
-
-# Guardar presentación
-output_path = "Turnero_ZS_Presentacion.pptx"
-prs.save(output_path)
-print("[OK] Presentacion creada exitosamente: " + output_path)
-print("[INFO] Total de slides: " + str(len(prs.slides)))
-print("[INFO] Videos necesarios: 19")
-print("[INFO] Duracion total de videos: 7-8 minutos")
+def load_spec(spec_path=SPEC_PATH):
+    """Leer la lista de slides desde la spec JSON"""
+    with open(spec_path, encoding="utf-8") as f:
+        return json.load(f)["slides"]
+
+
+@span("render")
+def render_slide(prs, spec):
+    """Renderizar un slide de la spec con el helper que corresponde a su tipo"""
+    kind = spec["kind"]
+    if kind == "title":
+        return add_title_slide(prs, spec["title"], spec["subtitle"])
+    if kind == "content":
+        return add_content_slide(prs, spec["title"], spec["points"], spec.get("video"))
+    if kind == "two_column":
+        return add_two_column_slide(prs, spec["title"], spec["left"], spec["right"])
+    if kind == "chart":
+        return add_chart_slide(prs, spec["title"], spec.get("chart", "line"), spec["series"],
+                               spec.get("categories"), spec.get("x_title"),
+                               spec.get("y_title"), spec.get("x_format"))
+    raise ValueError(f"Tipo de slide desconocido: {kind!r}")
+
+
+def _render_key(styling):
+    """Todo lo que, además de la spec, cambia el XML de un slide"""
+    return {"version": RENDER_VERSION, "palette": list(_palette()), "styling": styling}
+
+
+@span("slide_cache")
+def slide_hash(spec, styling=DEFAULT_STYLING):
+    """Hash de contenido de un slide: spec + clave de render"""
+    payload = json.dumps({"spec": spec, "render": _render_key(styling)},
+                         sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SlideCache:
+    """Cache en disco del XML renderizado de cada slide, indexado por hash"""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.xml"
+
+    @span("slide_cache")
+    def get(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            return self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    @span("slide_cache")
+    def put(self, key, xml):
+        if not self.cache_dir:
+            return
+        # Escritura atómica: un build concurrente nunca lee un XML a medias
+        # (temporal por proceso, para builds en paralelo de deck_batch)
+        tmp_path = self._path(key).with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(xml)
+        tmp_path.replace(self._path(key))
+
+
+@span("shapes")
+def _restore_slide(prs, kind, xml):
+    """Agregar un slide vacío y reemplazar su contenido por el XML cacheado"""
+    slide = _new_slide(prs, _slide_layout(prs, kind)[0])
+    sld = slide._element
+    for child in list(sld):
+        sld.remove(child)
+    for child in parse_xml(xml):
+        sld.append(child)
+    return slide
+
+
+def new_presentation(styling=DEFAULT_STYLING, template=None):
+    """
+    Presentación vacía con el tamaño de slide de la demo
+
+    `template` son los bytes de presentation_template(styling): abrirlos
+    evita rearmar master y layouts; solo se reescribe la paleta del tema.
+    """
+    if styling not in STYLINGS:
+        raise ValueError(f"Modo de estilos desconocido: {styling!r}")
+    if template is not None:
+        prs = Presentation(io.BytesIO(template))
+        if styling == "master":
+            apply_palette(prs, COLOR_PRIMARY, COLOR_SECONDARY, COLOR_ACCENT,
+                          COLOR_DARK, COLOR_LIGHT)
+        return prs
+    prs = Presentation()
+    prs.slide_width = Inches(10)
+    prs.slide_height = Inches(7.5)
+    if styling == "master":
+        apply_master_styles(prs, COLOR_PRIMARY, COLOR_SECONDARY, COLOR_ACCENT,
+                            COLOR_DARK, COLOR_LIGHT)
+    return prs
+
+
+def presentation_template(styling=DEFAULT_STYLING):
+    """Presentación vacía de new_presentation(styling) guardada como bytes"""
+    buffer = io.BytesIO()
+    new_presentation(styling).save(buffer)
+    return buffer.getvalue()
+
+
+def build_presentation(spec_path=SPEC_PATH, cache_dir=CACHE_DIR, styling=DEFAULT_STYLING,
+                       metrics=None, chart_points=CHART_MAX_POINTS, slides=None,
+                       template=None):
+    """
+    Construir la presentación a partir de la spec
+
+    Los slides cuyo hash ya está en el cache se restauran desde el XML
+    guardado; el resto se renderiza y se agrega al cache. Con `metrics`
+    (QueueMetrics de queue_metrics.py) los slides marcados con "metrics" se
+    completan con los números del export y se agregan los gráficos; si no,
+    quedan con su texto fijo.
+
+    Los slides "chart" se reducen a `chart_points` puntos por serie y no
+    pasan por el cache: el gráfico vive en partes propias (chartN.xml y su
+    libro Excel) que el XML del slide no incluye.
+
+    `slides` reemplaza a la spec leída de `spec_path` (p. ej. un subconjunto
+    por institución) y `template` se pasa a new_presentation.
+
+    Returns:
+        (prs, stats) donde stats cuenta slides reutilizados y renderizados
+        y lista en "charts" (título, puntos originales, puntos escritos)
+    """
+    prs = new_presentation(styling, template)
+    cache = SlideCache(cache_dir)
+    stats = {"reused": 0, "rendered": 0, "charts": []}
+
+    if slides is None:
+        slides = load_spec(spec_path)
+    if metrics is not None:
+        from queue_metrics import fill_metrics_slides
+        slides = fill_metrics_slides(slides, metrics)
+
+    for spec in slides:
+        if spec["kind"] == "chart":
+            spec, raw, kept = downsample_chart(spec, chart_points)
+            render_slide(prs, spec)
+            stats["charts"].append((spec["title"], raw, kept))
+            stats["rendered"] += 1
+            continue
+        key = slide_hash(spec, styling)
+        xml = cache.get(key)
+        if xml is not None:
+            _restore_slide(prs, spec["kind"], xml)
+            stats["reused"] += 1
+            continue
+        slide = render_slide(prs, spec)
+        cache.put(key, etree.tostring(slide._element, encoding="UTF-8", standalone=True))
+        stats["rendered"] += 1
+
+    return prs, stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from deck_pipeline import build_deck
+    from deck_trace import add_trace_arguments, tracing_from_args
+    from deck_writer import add_policy_arguments, policy_from_args
+
+    parser = argparse.ArgumentParser(description="Generar la presentación de Turnero ZS")
+    parser.add_argument("--spec", default=str(SPEC_PATH), help="Spec JSON de los slides")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="Archivo .pptx de salida")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Renderizar todos los slides sin usar el cache")
+    parser.add_argument("--styling", choices=STYLINGS, default=DEFAULT_STYLING,
+                        help="Formato en el slide master (master) o en cada párrafo (inline)")
+    parser.add_argument("--metrics", metavar="EXPORT",
+                        help="Export CSV/JSONL de turnos para el slide de métricas")
+    parser.add_argument("--chart-points", type=int, default=CHART_MAX_POINTS,
+                        help="Puntos por serie en los gráficos (0 = sin reducir)")
+    parser.add_argument("--compact", action="store_true",
+                        help="Quitar los layouts que ningún slide usa (deck_compact.py)")
+    add_policy_arguments(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+
+    with tracing_from_args(args):
+        metrics = None
+        if args.metrics:
+            from deck_trace import phase
+            from queue_metrics import aggregate
+            with phase("metrics", source=args.metrics) as info:
+                metrics = aggregate(args.metrics)
+                info["rows"] = metrics.rows
+            print("[INFO] Metricas calculadas de " + str(metrics.rows) + " filas (" +
+                  metrics.source + ")")
+
+        result = build_deck(args.output, spec_path=args.spec,
+                            cache_dir=None if args.no_cache else CACHE_DIR,
+                            styling=args.styling, metrics=metrics,
+                            chart_points=args.chart_points, policy=policy_from_args(args),
+                            compact=args.compact)
+    if result.cached:
+        print("[OK] Sin cambios desde el último build: " + result.output_path)
+    else:
+        print("[OK] Presentacion creada exitosamente: " + result.output_path)
+    if result.sha256:
+        print("[INFO] SHA-256: " + result.sha256)
+    print("[INFO] Total de slides: " + str(result.slides))
+    print("[INFO] Slides reutilizados del cache: " + str(result.reused))
+    print("[INFO] Slides renderizados: " + str(result.rendered))
+    for title, raw, kept in result.charts:
+        print("[INFO] Grafico '" + title + "': " + str(kept) + " de " + str(raw) +
+              " puntos")
+    if result.compacted:
+        print("[INFO] Layouts sin usar quitados: " + str(result.compacted["layouts"]) +
+              " (" + str(result.compacted["parts"]) + " partes, " +
+              str(round(result.compacted["saved"] / 1024, 1)) + " KB sin comprimir)")
+
+    from video_map import VIDEOS, video_names
+    from mp4_probe import format_duration, probe_videos
+
+    infos, problems = probe_videos("videos_demo", video_names(VIDEOS))
+    total = sum(info.duration for info in infos.values())
+    print("[INFO] Videos necesarios: " + str(len(video_names(VIDEOS))) +
+          " (disponibles: " + str(len(infos)) + ")")
+    print("[INFO] Duracion total de videos: " + format_duration(total))
+    for name, reason in problems.items():
+        print("[WARN] " + name + ": " + reason)
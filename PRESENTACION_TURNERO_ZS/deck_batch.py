@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Build en lote: una presentación por institución, en paralelo
+
+Cada CAPS u hospital recibe la presentación con su nombre, su paleta, los
+slides que le interesan y sus videos. En vez de correr create_presentation.py
+una vez por institución (intérprete, import de python-pptx y armado del
+master cada vez), las variantes se reparten en deck_pipeline.build_pool. Cada
+worker importa python-pptx y arma la presentación base con master y layouts
+una sola vez al arrancar (queda como bytes); por variante solo abre esos
+bytes, cambia la paleta del tema y genera los slides.
+
+Variantes (instituciones.json):
+
+    {"institutions": [
+        {"name": "CAPS Barrio Norte",
+         "output": "Turnero_ZS_CAPS_Norte.pptx",        (opcional)
+         "colors": {"primary": "0EA5E9", "dark": "0F172A"},
+         "slides": [0, 1, 2, "5-20", 26],
+         "videos": {"6": "05-cargar-paciente-form.mp4"}}
+    ]}
+
+- colors: cualquier subconjunto de PALETTE_NAMES (hex RRGGBB)
+- slides: índices de slides.json o rangos "a-b"; por defecto todos
+- videos: índice en slides.json → archivo (o lista de archivos); reemplaza
+  a los del campo "video" de la spec. Los índices se trasladan a la
+  posición del slide dentro del subconjunto
+
+El nombre se agrega al subtítulo del primer slide de título. El cache de
+slides es compartido entre los workers.
+"""
+
+import json
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import as_completed
+from pathlib import Path
+
+from video_map import spec_videos
+
+VARIANTS_PATH = Path(__file__).with_name("instituciones.json")
+
+
+def load_variants(path=VARIANTS_PATH):
+    """Leer la lista de variantes por institución"""
+    with open(path, encoding="utf-8") as f:
+        variants = json.load(f)["institutions"]
+    for variant in variants:
+        if not variant.get("name"):
+            raise ValueError(f"Variante sin nombre en {path}")
+    return variants
+
+
+def output_name(variant):
+    """Archivo de salida de la variante: el indicado o uno derivado del nombre"""
+    if variant.get("output"):
+        return variant["output"]
+    ascii_name = (unicodedata.normalize("NFKD", variant["name"])
+                  .encode("ascii", "ignore").decode("ascii"))
+    return "Turnero_ZS_" + re.sub(r"[^A-Za-z0-9]+", "_", ascii_name).strip("_") + ".pptx"
+
+
+def slide_subset(selection, total):
+    """Índices de slides.json elegidos ("a-b" es un rango inclusivo), en orden"""
+    if selection is None:
+        return list(range(total))
+    indices = []
+    for item in selection:
+        if isinstance(item, str) and "-" in item:
+            first, last = (int(v) for v in item.split("-", 1))
+            indices.extend(range(first, last + 1))
+        else:
+            indices.append(int(item))
+    invalid = [i for i in indices if not 0 <= i < total]
+    if invalid:
+        raise ValueError(f"Slides fuera de rango (la spec tiene {total}): {invalid}")
+    return indices
+
+
+def variant_slides(spec_slides, variant):
+    """
+    (slides, videos) de la variante
+
+    Los videos son los del campo "video" de cada slide de la spec, salvo que
+    la variante traiga los suyos. Los de slides que no están en el
+    subconjunto se omiten.
+    """
+    indices = slide_subset(variant.get("slides"), len(spec_slides))
+    slides = [dict(spec_slides[i]) for i in indices]
+    for spec in slides:
+        if spec["kind"] == "title":
+            spec["subtitle"] = f"{spec['subtitle']}\n{variant['name']}"
+            break
+
+    videos = spec_videos(spec_slides)
+    if variant.get("videos") is not None:
+        videos = {int(index): name for index, name in variant["videos"].items()}
+    position = {original: new for new, original in enumerate(indices)}
+    videos = {position[index]: name for index, name in videos.items() if index in position}
+    return slides, videos
+
+
+def build_batch(variants, output_dir, spec_slides, videos_dir=None,
+                cache_dir=None, styling="master", policy=None, jobs=None):
+    """
+    Construir todas las variantes en un pool de procesos
+
+    Genera (variante, BuildResult, segundos) a medida que terminan; un error
+    en una variante se propaga al consumirla.
+    """
+    from deck_pipeline import build_pool, build_variant
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    options = {"videos_dir": videos_dir, "cache_dir": cache_dir, "styling": styling,
+               "policy": policy}
+    jobs = jobs or min(len(variants), os.cpu_count() or 1)
+
+    with build_pool(jobs, styling) as pool:
+        futures = {}
+        for variant in variants:
+            slides, videos = variant_slides(spec_slides, variant)
+            future = pool.submit(build_variant, variant, slides, videos,
+                                 str(output_dir / output_name(variant)), options)
+            futures[future] = variant
+        for future in as_completed(futures):
+            yield (futures[future], *future.result())
+
+
+if __name__ == "__main__":
+    import argparse
+    from dataclasses import replace
+
+    from create_presentation import (CACHE_DIR, DEFAULT_STYLING, SPEC_PATH, STYLINGS,
+                                     load_spec)
+    from deck_writer import add_policy_arguments, policy_from_args
+
+    parser = argparse.ArgumentParser(
+        description="Generar una presentación por institución en paralelo")
+    parser.add_argument("--variants", default=str(VARIANTS_PATH),
+                        help="JSON con las variantes por institución")
+    parser.add_argument("--spec", default=str(SPEC_PATH), help="Spec JSON de los slides")
+    parser.add_argument("--output-dir", default="decks", help="Carpeta de salida")
+    parser.add_argument("--videos-dir", help="Carpeta de videos (sin esto no se insertan)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Renderizar todos los slides sin usar el cache")
+    parser.add_argument("--styling", choices=STYLINGS, default=DEFAULT_STYLING,
+                        help="Formato en el slide master (master) o en cada párrafo (inline)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos en paralelo (por defecto, uno por CPU)")
+    add_policy_arguments(parser)
+    args = parser.parse_args()
+
+    variants = load_variants(args.variants)
+    # Un thread de deflate por proceso: el paralelismo ya lo da el pool
+    if args.jobs is not None:
+        print("[WARN] --jobs no aplica en lote: cada proceso comprime con un thread")
+    policy = replace(policy_from_args(args), workers=1)
+
+    start = time.perf_counter()
+    for variant, result, seconds in build_batch(
+            variants, args.output_dir, load_spec(args.spec), args.videos_dir,
+            None if args.no_cache else CACHE_DIR, args.styling, policy, args.workers):
+        videos = ""
+        if result.videos is not None:
+            videos = (f", videos {result.videos['inserted']}"
+                      f" (faltan {result.videos['missing']})")
+        state = "sin cambios" if result.cached else f"{seconds:.2f} s"
+        print(f"[OK] {variant['name']}: {result.output_path} "
+              f"({result.slides} slides{videos}, {state})")
+    print(f"[INFO] {len(variants)} presentaciones en {time.perf_counter() - start:.2f} s")
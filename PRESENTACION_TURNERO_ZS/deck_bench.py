@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de generación de la presentación e inserción de videos
+
+Arma presentaciones sintéticas de 10, 100, 1.000 y 10.000 slides (portadas,
+slides de contenido y de dos columnas con la cantidad de bullets pedida) y
+mide dos casos por tamaño:
+
+- slides-N: build_presentation + save_presentation, sin cache de slides
+- videos-N: lo mismo más insert_videos con MP4 de prueba generados en una
+  carpeta temporal (tamaño y cantidad configurables)
+
+Cada corrida va en un proceso nuevo, así el pico de RSS es el del caso y no
+arrastra lo de los anteriores. Por caso se guarda el tiempo total y por
+etapa (build, videos, save), el pico de RSS, el pico de tracemalloc (en una
+corrida aparte, porque tracemalloc hace más lento el código medido) y el
+tamaño del .pptx.
+
+Los resultados van a un JSON (bench_results.json); con --save-baseline
+quedan como referencia (bench_baseline.json) y las corridas siguientes se
+comparan contra ella: un caso más lento, con más memoria o más pesado que
+la referencia por encima de THRESHOLDS es una regresión y el comando sale
+con código 1.
+
+Con --startup mide en cambio el arranque de turnero_deck.py: corre `--help` y
+`check` con `python -X importtime`, suma el tiempo propio de cada módulo y
+falla si pasa STARTUP_BUDGET_MS o si se cargó algo de STARTUP_FORBIDDEN.
+"""
+
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+SIZES = (10, 100, 1000, 10000)
+RESULTS_PATH = "bench_results.json"
+BASELINE_PATH = Path(__file__).with_name("bench_baseline.json")
+
+# Aumento tolerado respecto de la referencia, por métrica
+THRESHOLDS = {"wall_s": 1.25, "rss_peak_kb": 1.20, "tracemalloc_peak_kb": 1.20,
+              "output_bytes": 1.05}
+# Diferencias de tiempo menores a esto son ruido, sea cual sea el porcentaje
+MIN_TIME_DELTA_S = 0.05
+
+VIDEO_DURATION_S = 20
+
+# Tiempo total de imports tolerado al arrancar turnero_deck.py, por comando
+STARTUP_BUDGET_MS = {"--help": 100, "check": 150}
+# Paquetes que no deben cargarse en esos comandos
+STARTUP_FORBIDDEN = ("pptx", "lxml", "numpy")
+
+
+# ============================================================================
+# INPUTS SINTÉTICOS
+# ============================================================================
+
+def _box(box_type, *payloads):
+    data = b"".join(payloads)
+    return struct.pack(">I4s", 8 + len(data), box_type) + data
+
+
+def _full_box(box_type, version, *payloads):
+    return _box(box_type, struct.pack(">I", version << 24), *payloads)
+
+
+_MATRIX = struct.pack(">9I", 0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+
+
+def dummy_mp4(path, size, index=0, duration=VIDEO_DURATION_S, width=1280, height=720):
+    """
+    Escribir un MP4 de prueba de `size` bytes
+
+    Tiene lo que leen mp4_probe y PowerPoint para listarlo (ftyp, moov con
+    mvhd y un track de video avc1, moov antes de mdat); el mdat es relleno.
+    El mdat empieza con `index`: videos del mismo tamaño con distinto índice
+    tienen otro contenido y media_store no los junta en una sola parte.
+    """
+    timescale = 1000
+    mvhd = _full_box(b"mvhd", 0, struct.pack(">5I", 0, 0, timescale, duration * timescale,
+                                            0x10000),
+                     struct.pack(">H10x", 0x100), _MATRIX, bytes(24), struct.pack(">I", 2))
+    tkhd = _full_box(b"tkhd", 0, struct.pack(">5I", 0, 0, 1, 0, duration * timescale),
+                     bytes(8), struct.pack(">4H", 0, 0, 0, 0), _MATRIX,
+                     struct.pack(">II", width << 16, height << 16))
+    hdlr = _full_box(b"hdlr", 0, bytes(4), b"vide", bytes(12), b"VideoHandler\0")
+    avc1 = _box(b"avc1", bytes(6), struct.pack(">H", 1), bytes(16),
+                struct.pack(">HH", width, height), bytes(50))
+    stbl = _box(b"stbl", _full_box(b"stsd", 0, struct.pack(">I", 1), avc1))
+    moov = _box(b"moov", mvhd,
+                _box(b"trak", tkhd, _box(b"mdia", hdlr, _box(b"minf", stbl))))
+    ftyp = _box(b"ftyp", b"isom", struct.pack(">I", 0x200), b"isomavc1mp41")
+
+    stamp = struct.pack(">8sQ", b"deckbnch", index)
+    padding = max(size - len(ftyp) - len(moov) - 8 - len(stamp), 0)
+    chunk = bytes(1024 * 1024)
+    with open(path, "wb") as f:
+        f.write(ftyp + moov + struct.pack(">I4s", 8 + len(stamp) + padding, b"mdat") + stamp)
+        while padding:
+            written = f.write(chunk[:padding])
+            padding -= written
+
+
+def synthetic_slides(count, bullets):
+    """Spec de `count` slides: una portada cada 10, el resto contenido y dos columnas"""
+    slides = []
+    for i in range(count):
+        if i % 10 == 0:
+            slides.append({"kind": "title", "title": f"Sección {i // 10 + 1}",
+                           "subtitle": f"Benchmark de {count} slides\nBloque {i}"})
+        elif i % 3 == 0:
+            half = max(bullets // 2, 1)
+            slides.append({"kind": "two_column", "title": f"Comparación {i}",
+                           "left": [f"• Izquierda {i}.{j}" for j in range(half)],
+                           "right": [f"• Derecha {i}.{j}" for j in range(half)]})
+        else:
+            slides.append({"kind": "content", "title": f"Slide {i}",
+                           "points": [f"• Punto {j} del slide {i}: turnos, colas y "
+                                      f"servicios" for j in range(bullets)]})
+    return slides
+
+
+def video_map(slide_count, video_count):
+    """{índice de slide: archivo} con los videos repartidos entre los slides de contenido"""
+    candidates = [i for i in range(slide_count) if i % 10]
+    if not candidates or not video_count:
+        return {}
+    step = max(len(candidates) // video_count, 1)
+    return {index: f"bench-{n:02d}.mp4"
+            for n, index in enumerate(candidates[::step][:video_count])}
+
+
+# ============================================================================
+# CORRIDAS
+# ============================================================================
+
+def run_case(case, trace=False):
+    """Correr un caso en este proceso; devuelve sus métricas"""
+    from create_presentation import build_presentation
+    from deck_trace import peak_rss_kb
+    from deck_writer import save_presentation
+    from insert_videos_pptx import insert_videos
+
+    slides = synthetic_slides(case["slides"], case["bullets"])
+    videos = video_map(case["slides"], case["videos"])
+    output_path = Path(case["work_dir"]) / f"{case['name']}.pptx"
+
+    if trace:
+        tracemalloc.start()
+    phases = {}
+    start = time.perf_counter()
+    prs, _ = build_presentation(cache_dir=None, slides=slides)
+    phases["build"] = time.perf_counter() - start
+    if videos:
+        mark = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            insert_videos(prs, case["videos_dir"], videos)
+        phases["videos"] = time.perf_counter() - mark
+    mark = time.perf_counter()
+    save_presentation(prs, output_path)
+    phases["save"] = time.perf_counter() - mark
+    wall = time.perf_counter() - start
+
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {"tracemalloc_peak_kb": peak // 1024}
+    result = {"wall_s": round(wall, 4),
+              "phases": {name: round(seconds, 4) for name, seconds in phases.items()},
+              "output_bytes": output_path.stat().st_size}
+    rss = peak_rss_kb()
+    if rss is not None:  # None en Windows: la métrica no se compara
+        result["rss_peak_kb"] = rss
+    return result
+
+
+def _isolated(case, trace=False):
+    """run_case en un proceso nuevo (spawn), sin memoria heredada"""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_case, case, trace).result()
+
+
+def run_benchmarks(sizes=SIZES, bullets=5, videos=4, video_mb=8, repeat=1, trace=True,
+                   progress=print):
+    """
+    Correr todos los casos; devuelve el dict que se guarda como JSON
+
+    Con `repeat` > 1 se queda con el menor tiempo y el mayor pico de memoria.
+    """
+    params = {"bullets": bullets, "videos": videos, "video_mb": video_mb, "repeat": repeat}
+    results = {"meta": _meta(), "params": params, "cases": {}}
+
+    with tempfile.TemporaryDirectory(prefix="deck_bench_") as work_dir:
+        videos_dir = Path(work_dir) / "videos"
+        videos_dir.mkdir()
+        for n in range(videos):
+            dummy_mp4(videos_dir / f"bench-{n:02d}.mp4", video_mb * 1024 * 1024, n)
+
+        for size in sizes:
+            for kind, count in (("slides", 0), ("videos", videos)):
+                if kind == "videos" and not videos:
+                    continue
+                case = {"name": f"{kind}-{size}", "slides": size, "bullets": bullets,
+                        "videos": count, "videos_dir": str(videos_dir), "work_dir": work_dir}
+                runs = [_isolated(case) for _ in range(repeat)]
+                result = min(runs, key=lambda run: run["wall_s"])
+                rss = ""
+                if "rss_peak_kb" in result:
+                    result["rss_peak_kb"] = max(run["rss_peak_kb"] for run in runs)
+                    rss = f"RSS {result['rss_peak_kb'] / 1024:7.1f} MB  "
+                if trace:
+                    result.update(_isolated(case, trace=True))
+                results["cases"][case["name"]] = result
+                progress(f"{case['name']:>14}: {result['wall_s']:8.3f} s  {rss}"
+                         f"{result['output_bytes'] / 1e6:8.2f} MB")
+    return results
+
+
+# ============================================================================
+# ARRANQUE DEL CLI
+# ============================================================================
+
+def import_time(argv):
+    """(ms de imports, módulos de primer nivel cargados) de `turnero_deck.py argv`"""
+    cli = Path(__file__).with_name("turnero_deck.py")
+    proc = subprocess.run([sys.executable, "-X", "importtime", str(cli), *argv],
+                          capture_output=True, text=True)
+    total_us = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        modules.add(name.strip().split(".")[0])
+    return total_us / 1000, modules
+
+
+def run_startup(repeat=3):
+    """{comando: {"import_ms", "budget_ms", "forbidden"}}, con el menor de `repeat`"""
+    results = {}
+    with tempfile.TemporaryDirectory() as videos_dir:
+        commands = {"--help": ["--help"], "check": ["check", videos_dir]}
+        for command, argv in commands.items():
+            runs = [import_time(argv) for _ in range(repeat)]
+            modules = set().union(*(loaded for _, loaded in runs))
+            results[command] = {
+                "import_ms": round(min(ms for ms, _ in runs), 1),
+                "budget_ms": STARTUP_BUDGET_MS[command],
+                "forbidden": sorted(modules.intersection(STARTUP_FORBIDDEN)),
+            }
+    return results
+
+
+def _meta():
+    import pptx
+    return {"python": platform.python_version(), "python_pptx": pptx.__version__,
+            "platform": platform.platform(), "cpus": os.cpu_count(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+# ============================================================================
+# COMPARACIÓN
+# ============================================================================
+
+def compare(results, baseline):
+    """
+    Comparar cada métrica con la referencia
+
+    Returns:
+        Lista de (caso, métrica, referencia, actual, cociente, es_regresión)
+        de los casos y métricas presentes en ambos
+    """
+    rows = []
+    for name, case in results["cases"].items():
+        reference = baseline["cases"].get(name)
+        if reference is None:
+            continue
+        for metric, threshold in THRESHOLDS.items():
+            if metric not in case or metric not in reference or not reference[metric]:
+                continue
+            before, now = reference[metric], case[metric]
+            ratio = now / before
+            regressed = ratio > threshold
+            if metric == "wall_s" and now - before < MIN_TIME_DELTA_S:
+                regressed = False
+            rows.append((name, metric, before, now, ratio, regressed))
+    return rows
+
+
+def print_comparison(rows):
+    def fmt(value):
+        return f"{value:>14,.3f}" if isinstance(value, float) else f"{value:>14,}"
+
+    for name, metric, before, now, ratio, regressed in rows:
+        mark = "❌" if regressed else "  "
+        print(f"{mark} {name:>14} {metric:<20} {fmt(before)} → {fmt(now)} "
+              f"({(ratio - 1) * 100:+6.1f}%)")
+
+
+def _write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Benchmarks de generación de la presentación e inserción de videos")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES),
+                        help="Cantidades de slides (por defecto 10 100 1000 10000)")
+    parser.add_argument("--bullets", type=int, default=5, help="Bullets por slide de contenido")
+    parser.add_argument("--videos", type=int, default=4,
+                        help="Videos por presentación en los casos videos-N (0 = sin esos casos)")
+    parser.add_argument("--video-mb", type=int, default=8, help="Tamaño de cada video de prueba")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Corridas por caso (se toma el menor tiempo)")
+    parser.add_argument("--no-tracemalloc", action="store_true",
+                        help="No medir el pico de tracemalloc (la mitad de corridas)")
+    parser.add_argument("--output", default=RESULTS_PATH, help="JSON de resultados")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH),
+                        help="JSON de referencia para comparar")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Guardar estos resultados como referencia")
+    parser.add_argument("--startup", action="store_true",
+                        help="Medir el arranque de turnero_deck.py contra STARTUP_BUDGET_MS")
+    args = parser.parse_args()
+
+    if args.startup:
+        failed = 0
+        for command, row in run_startup(max(args.repeat, 3)).items():
+            over = row["import_ms"] > row["budget_ms"]
+            state = "REGRESION" if over or row["forbidden"] else "ok"
+            extra = f", carga {', '.join(row['forbidden'])}" if row["forbidden"] else ""
+            print(f"turnero-deck {command:7} {row['import_ms']:7.1f} ms "
+                  f"(límite {row['budget_ms']} ms{extra})  {state}")
+            failed += state != "ok"
+        sys.exit(1 if failed else 0)
+
+    results = run_benchmarks(args.sizes, args.bullets, args.videos, args.video_mb,
+                             args.repeat, not args.no_tracemalloc)
+    _write_json(args.output, results)
+    print(f"[OK] Resultados en {args.output}")
+
+    if args.save_baseline:
+        _write_json(args.baseline, results)
+        print(f"[OK] Referencia guardada en {args.baseline}")
+        sys.exit(0)
+
+    try:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"[INFO] Sin referencia ({args.baseline}); guardala con --save-baseline")
+        sys.exit(0)
+
+    if baseline["params"] != results["params"]:
+        print(f"[WARN] La referencia usa otros parámetros: {baseline['params']}")
+    rows = compare(results, baseline)
+    print_comparison(rows)
+    regressions = [row for row in rows if row[-1]]
+    if regressions:
+        print(f"[ERROR] {len(regressions)} regresiones respecto de {args.baseline}")
+        sys.exit(1)
+    print("[OK] Sin regresiones")
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Compactación de la presentación: layouts sin usar y partes huérfanas
+
+La presentación sale del template por defecto de python-pptx, que trae 11
+layouts, y los slides usan tres o cuatro. Los demás (y lo que solo ellos
+referencian) viajan igual en cada .pptx y PowerPoint los carga al abrir.
+Después de varias corridas de la etapa de videos sobre el mismo archivo
+también pueden quedar placeholders de videos que ya están insertados,
+videos repetidos en un slide y media que ya nadie usa.
+
+Dos formas:
+
+- compact_presentation(prs): en memoria, antes de guardar (--compact en
+  los builds). Quita los layouts que ningún slide usa; al guardar,
+  python-pptx ya no escribe lo que quedó sin referencias.
+- compact_package(pptx): sobre un .pptx ya escrito, a nivel ZIP como
+  deck_patch.py. Además de los layouts quita los masters sin slides,
+  los placeholders obsoletos, los videos repetidos en un slide y toda parte
+  a la que no se llega recorriendo las relaciones desde el paquete. Lo que
+  queda se copia crudo, sin recomprimir.
+"""
+
+import os
+import shutil
+import zipfile
+from pathlib import Path
+
+from lxml import etree
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml import parse_xml
+
+from deck_patch import (NS_CT, NS_P, NS_R, NS_RELS, _rels_name, _resolve, _serialize,
+                        slide_partnames)
+from deck_validate import _source_part
+from deck_writer import DEFAULT_POLICY, bytes_entry, open_zip, raw_entry, write_entries
+from insert_videos_pptx import (ADVANCE_MARGIN_S, PLACEHOLDER_PREFIX, autoplay_seconds,
+                                sequence_autoplay, set_auto_advance)
+
+CONTENT_TYPES_NAME = "[Content_Types].xml"
+ROOT_RELS_NAME = "_rels/.rels"
+
+# Relaciones de un slide que se pueden quitar si su XML ya no usa el rId
+_DROPPABLE_RELTYPES = {RT.MEDIA, RT.VIDEO, RT.IMAGE, RT.AUDIO}
+
+
+def _part_bytes(part):
+    blob = part.blob
+    return len(blob) if blob is not None else 0
+
+
+def compact_presentation(prs):
+    """
+    Quitar de `prs` los layouts que ningún slide usa
+
+    Llamarla después de agregar todos los slides: los helpers de
+    create_presentation buscan los layouts por nombre.
+
+    Returns:
+        dict con layouts (quitados), parts (partes que ya no se escriben) y
+        saved (bytes sin comprimir de esas partes)
+    """
+    package = prs.part.package
+    before = set(package.iter_parts())
+    used = {slide.slide_layout.part for slide in prs.slides}
+    removed = 0
+    for master in prs.slide_masters:
+        layouts = master.slide_layouts
+        sldLayoutIdLst = layouts._sldLayoutIdLst
+        for sldLayoutId in list(sldLayoutIdLst.sldLayoutId_lst):
+            if master.part.related_part(sldLayoutId.rId) in used:
+                continue
+            # Como SlideLayouts.remove(), sin recorrer todos los slides por layout
+            sldLayoutIdLst.remove(sldLayoutId)
+            master.part.drop_rel(sldLayoutId.rId)
+            removed += 1
+    dropped = before - set(package.iter_parts())
+    return {"layouts": removed, "parts": len(dropped),
+            "saved": sum(_part_bytes(part) for part in dropped)}
+
+
+# ============================================================================
+# COMPACTACIÓN DE UN .PPTX YA ESCRITO
+# ============================================================================
+
+def _relationships(root):
+    return list(root.iter(f"{{{NS_RELS}}}Relationship"))
+
+
+def _targets(source, rels_root, reltype=None):
+    """{rId: parte} de las relaciones internas (de tipo `reltype` si se pasa)"""
+    if rels_root is None:
+        return {}
+    return {rel.get("Id"): _resolve(source, rel.get("Target"))
+            for rel in _relationships(rels_root)
+            if rel.get("TargetMode") != "External"
+            and (reltype is None or rel.get("Type") == reltype)}
+
+
+def _drop_rels(rels_root, rIds):
+    for rel in _relationships(rels_root):
+        if rel.get("Id") in rIds:
+            rels_root.remove(rel)
+
+
+def _drop_video_timing(sld, shape_id):
+    """
+    Quitar los nodos de p:timing que reproducen el shape `shape_id`: su
+    p:video y, si arranca solo, su efecto en la secuencia principal
+    """
+    for target in sld.xpath(f'.//p:timing//p:spTgt[@spid="{shape_id}"]'):
+        node = target
+        # Subir hasta el hijo directo de la raíz del timing o de la secuencia
+        # principal, sin dejar contenedores vacíos
+        while node.getparent() is not None:
+            parent = node.getparent()
+            if parent.tag == f"{{{NS_P}}}childTnLst" and (
+                    len(parent) > 1
+                    or parent.getparent().get("nodeType") in ("tmRoot", "mainSeq")):
+                break
+            node = parent
+        if node.getparent() is not None:
+            node.getparent().remove(node)
+    for seq in sld.xpath("./p:timing//p:seq[p:cTn/@nodeType='mainSeq']"):
+        if not len(seq.find(f"{{{NS_P}}}cTn/{{{NS_P}}}childTnLst")):
+            seq.getparent().remove(seq)
+
+
+def _clean_slide(sld, stats):
+    """
+    Quitar videos repetidos (queda el último insertado) y placeholders de
+    videos que ya están o que están repetidos
+
+    Returns:
+        True si el slide cambió
+    """
+    changed = False
+    videos = {}
+    for pic in sld.xpath(".//p:pic[p:nvPicPr/p:nvPr/a:videoFile]"):
+        videos.setdefault(pic.xpath("string(p:nvPicPr/p:cNvPr/@name)"), []).append(pic)
+    for pics in videos.values():
+        for pic in pics[:-1]:
+            _drop_video_timing(sld, pic.xpath("string(p:nvPicPr/p:cNvPr/@id)"))
+            pic.getparent().remove(pic)
+            stats["videos"] += 1
+            changed = True
+    if changed and sld.xpath("./p:transition/@advTm"):
+        # Los videos que quedan se reproducen uno detrás del otro
+        sequence_autoplay(sld)
+        set_auto_advance(sld, autoplay_seconds(sld) + ADVANCE_MARGIN_S)
+
+    seen = set()
+    prefix = f"{PLACEHOLDER_PREFIX}: "
+    for sp in sld.xpath(f'.//p:sp[starts-with(p:nvSpPr/p:cNvPr/@name, "{prefix}")]'):
+        video_name = sp.xpath("string(p:nvSpPr/p:cNvPr/@name)")[len(prefix):]
+        if video_name in videos or video_name in seen:
+            sp.getparent().remove(sp)
+            stats["placeholders"] += 1
+            changed = True
+        seen.add(video_name)
+    return changed
+
+
+def _unused_rIds(xml_root, rels_root, reltypes):
+    """rId de `reltypes` que el XML de la parte ya no usa"""
+    used = {value for element in xml_root.iter() for name, value in element.attrib.items()
+            if value and name.startswith(f"{{{NS_R}}}")}
+    return {rel.get("Id") for rel in _relationships(rels_root)
+            if rel.get("Type") in reltypes and rel.get("Id") not in used}
+
+
+def _reachable(rels, root_targets):
+    """Partes a las que se llega desde el paquete siguiendo las relaciones"""
+    reached = set()
+    pending = list(root_targets)
+    while pending:
+        part = pending.pop()
+        if part in reached:
+            continue
+        reached.add(part)
+        rels_root = rels.get(_rels_name(part))
+        if rels_root is not None:
+            pending.extend(_targets(part, rels_root).values())
+    return reached
+
+
+def compact_package(pptx_path, output_path=None, policy=DEFAULT_POLICY):
+    """
+    Compactar un .pptx ya escrito
+
+    Args:
+        pptx_path: .pptx a compactar
+        output_path: Archivo de salida (por defecto se reemplaza pptx_path)
+        policy: CompressionPolicy para las partes reescritas
+
+    Returns:
+        dict con layouts, masters, placeholders, videos y parts (quitados),
+        rewritten (partes reescritas), bytes_before, bytes_after y saved
+    """
+    pptx_path = Path(pptx_path)
+    output_path = Path(output_path) if output_path else pptx_path
+    stats = {"layouts": 0, "masters": 0, "placeholders": 0, "videos": 0, "parts": 0,
+             "rewritten": 0, "bytes_before": pptx_path.stat().st_size}
+
+    with zipfile.ZipFile(pptx_path) as src:
+        names = set(src.namelist())
+        rels = {name: etree.fromstring(src.read(name)) for name in names
+                if name.endswith(".rels")}
+        replaced = {}
+
+        # Slides: videos repetidos y placeholders obsoletos
+        slides = slide_partnames(src)
+        for slide in slides:
+            sld = parse_xml(src.read(slide))
+            if not _clean_slide(sld, stats):
+                continue
+            replaced[slide] = _serialize(sld)
+            slide_rels = rels.get(_rels_name(slide))
+            if slide_rels is None:
+                continue
+            _drop_rels(slide_rels, _unused_rIds(sld, slide_rels, _DROPPABLE_RELTYPES))
+            replaced[_rels_name(slide)] = _serialize(slide_rels)
+
+        # Layouts que ningún slide usa, y masters sin ningún layout usado
+        used_layouts = {layout for slide in slides
+                        for layout in _targets(slide, rels.get(_rels_name(slide)),
+                                               RT.SLIDE_LAYOUT).values()}
+        presentation = next(iter(_targets("", rels[ROOT_RELS_NAME], RT.OFFICE_DOCUMENT)
+                                 .values()))
+        pres_rels_name = _rels_name(presentation)
+        masters = _targets(presentation, rels[pres_rels_name], RT.SLIDE_MASTER)
+        master_layouts = {rId: _targets(master, rels.get(_rels_name(master)), RT.SLIDE_LAYOUT)
+                          for rId, master in masters.items()}
+        if used_layouts:
+            unused_masters = {rId for rId, layouts in master_layouts.items()
+                              if not used_layouts.intersection(layouts.values())}
+            if unused_masters:
+                pres = etree.fromstring(src.read(presentation))
+                for sldMasterId in pres.iter(f"{{{NS_P}}}sldMasterId"):
+                    if sldMasterId.get(f"{{{NS_R}}}id") in unused_masters:
+                        sldMasterId.getparent().remove(sldMasterId)
+                _drop_rels(rels[pres_rels_name], unused_masters)
+                replaced[presentation] = _serialize(pres)
+                replaced[pres_rels_name] = _serialize(rels[pres_rels_name])
+                stats["masters"] = len(unused_masters)
+
+            for rId, layouts in master_layouts.items():
+                unused = {layout_rId for layout_rId, layout in layouts.items()
+                          if layout not in used_layouts}
+                if rId in unused_masters or not unused:
+                    continue
+                master = masters[rId]
+                master_xml = etree.fromstring(src.read(master))
+                for sldLayoutId in master_xml.iter(f"{{{NS_P}}}sldLayoutId"):
+                    if sldLayoutId.get(f"{{{NS_R}}}id") in unused:
+                        sldLayoutId.getparent().remove(sldLayoutId)
+                _drop_rels(rels[_rels_name(master)], unused)
+                replaced[master] = _serialize(master_xml)
+                replaced[_rels_name(master)] = _serialize(rels[_rels_name(master)])
+                stats["layouts"] += len(unused)
+
+        # Todo lo que ya no se alcanza desde el paquete
+        reached = _reachable(rels, _targets("", rels[ROOT_RELS_NAME]).values())
+        dropped = {name for name in names
+                   if name != CONTENT_TYPES_NAME and not name.endswith(".rels")
+                   and name not in reached}
+        dropped |= {name for name in names if name.endswith(".rels")
+                    and name != ROOT_RELS_NAME
+                    and _source_part(name) not in reached}
+        stats["parts"] = sum(1 for name in dropped if not name.endswith(".rels"))
+
+        if dropped:
+            content_types = etree.fromstring(src.read(CONTENT_TYPES_NAME))
+            for override in list(content_types.iter(f"{{{NS_CT}}}Override")):
+                if override.get("PartName").lstrip("/") in dropped:
+                    content_types.remove(override)
+            replaced[CONTENT_TYPES_NAME] = _serialize(content_types)
+
+        if not replaced and not dropped:
+            if output_path != pptx_path:
+                shutil.copyfile(pptx_path, output_path)
+            stats.update(bytes_after=stats["bytes_before"], saved=0)
+            return stats
+
+        entries = []
+        for info in src.infolist():
+            if info.filename in dropped:
+                continue
+            if info.filename in replaced:
+                entries.append(bytes_entry(info.filename, replaced[info.filename]))
+            else:
+                entries.append(raw_entry(src, info))
+        stats["rewritten"] = len(replaced)
+
+        tmp_path = output_path.with_name(output_path.name + ".tmp")
+        with open_zip(tmp_path, policy) as dst:
+            write_entries(dst, entries, policy)
+
+    os.replace(tmp_path, output_path)
+    stats["bytes_after"] = output_path.stat().st_size
+    stats["saved"] = stats["bytes_before"] - stats["bytes_after"]
+    return stats
+
+
+def print_compact_summary(stats):
+    print(f"Layouts quitados: {stats['layouts']}, masters: {stats['masters']}")
+    print(f"Placeholders obsoletos: {stats['placeholders']}, videos repetidos: {stats['videos']}")
+    print(f"Partes huérfanas quitadas: {stats['parts']} (reescritas: {stats['rewritten']})")
+    print(f"Tamaño: {stats['bytes_before'] / 1024:.1f} KB → "
+          f"{stats['bytes_after'] / 1024:.1f} KB ({stats['saved'] / 1024:.1f} KB menos)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from deck_policy import add_policy_arguments, policy_from_args
+
+    parser = argparse.ArgumentParser(
+        description="Quitar layouts sin usar y partes huérfanas de un .pptx")
+    parser.add_argument("pptx", help=".pptx a compactar")
+    parser.add_argument("--output", help="Archivo de salida (por defecto se reemplaza el .pptx)")
+    add_policy_arguments(parser)
+    args = parser.parse_args()
+
+    stats = compact_package(args.pptx, args.output, policy_from_args(args))
+    print(f"[OK] {args.output or args.pptx}")
+    print_compact_summary(stats)
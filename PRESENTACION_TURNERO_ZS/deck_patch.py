@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Modo patch: actualizar los videos de un .pptx sin pasar por python-pptx
+
+Abre la presentación como ZIP y reescribe solo los slides con video que
+cambian (más sus .rels y [Content_Types].xml). El resto de las entradas,
+incluidos los videos ya embebidos, se copian crudas, sin descomprimir ni
+recomprimir, así que re-ejecutar la etapa de videos cuesta casi solo E/S.
+Un video cuyo contenido ya está en el paquete (mismo CRC32 y tamaño que una
+entrada de ppt/media/, según el manifest de video_manifest) no se vuelve a
+agregar: el slide apunta a esa entrada.
+
+patch_slides hace lo mismo para un cambio en la spec: reemplaza el XML de
+los slides que cambiaron (renderizados aparte) conservando sus videos, y
+copia el resto del paquete crudo.
+"""
+
+import os
+import posixpath
+import re
+import shutil
+import time
+import zipfile
+from pathlib import Path
+
+from lxml import etree
+from pptx.media import SPEAKER_IMAGE_BYTES
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml import parse_xml
+from pptx.oxml.shapes.picture import CT_Picture
+from pptx.shapes.shapetree import SlideShapes
+
+from deck_writer import (DEFAULT_POLICY, bytes_entry, file_entry, open_zip, raw_entry,
+                         write_entries)
+from insert_videos_pptx import (ADVANCE_MARGIN_S, PLACEHOLDER_PREFIX, VIDEOS,
+                                add_video_placeholder, autoplay_seconds, set_auto_advance,
+                                set_video_autoplay, video_box)
+from mp4_probe import format_duration
+from video_manifest import verify_videos
+from video_map import slide_videos, video_names
+
+NS_RELS = "http://schemas.openxmlformats.org/package/2006/relationships"
+NS_CT = "http://schemas.openxmlformats.org/package/2006/content-types"
+NS_R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_P = "http://schemas.openxmlformats.org/presentationml/2006/main"
+
+REQUIRED_DEFAULTS = {"mp4": "video/mp4", "png": "image/png"}
+
+
+class _PatchedSlide:
+    """Lo mínimo de un Slide de python-pptx que usa add_video_placeholder"""
+
+    def __init__(self, sld):
+        self._element = sld
+        self.shapes = SlideShapes(sld.cSld.spTree, self)
+
+
+def _serialize(element):
+    return etree.tostring(element, encoding="UTF-8", standalone=True)
+
+
+def _rels_name(partname):
+    """ppt/slides/slide3.xml → ppt/slides/_rels/slide3.xml.rels"""
+    directory, filename = posixpath.split(partname)
+    return posixpath.join(directory, "_rels", filename + ".rels")
+
+
+def _resolve(source, target):
+    """Resolver un Target relativo de un .rels respecto de la parte origen"""
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), target))
+
+
+def slide_partnames(zf):
+    """Nombres de las partes de slide en el orden de la presentación"""
+    rels = etree.fromstring(zf.read("ppt/_rels/presentation.xml.rels"))
+    targets = {rel.get("Id"): _resolve("ppt/presentation.xml", rel.get("Target"))
+               for rel in rels.iter(f"{{{NS_RELS}}}Relationship")}
+    presentation = etree.fromstring(zf.read("ppt/presentation.xml"))
+    return [targets[sld_id.get(f"{{{NS_R}}}id")]
+            for sld_id in presentation.iter(f"{{{NS_P}}}sldId")]
+
+
+def _next_index(names, prefix):
+    """Próximo número libre para ppt/media/<prefix>N.*"""
+    pattern = re.compile(rf"^ppt/media/{prefix}(\d+)\.")
+    used = [int(m.group(1)) for m in map(pattern.match, names) if m]
+    return max(used, default=0) + 1
+
+
+class _Rels:
+    """Un .rels parseado con alta de relaciones nuevas"""
+
+    def __init__(self, xml):
+        if xml is None:
+            self.root = etree.Element(f"{{{NS_RELS}}}Relationships", nsmap={None: NS_RELS})
+        else:
+            self.root = etree.fromstring(xml)
+        ids = [int(rel.get("Id")[3:]) for rel in self.root
+               if rel.get("Id", "").startswith("rId") and rel.get("Id")[3:].isdigit()]
+        self._next = max(ids, default=0) + 1
+
+    def add(self, reltype, target):
+        rId = f"rId{self._next}"
+        self._next += 1
+        etree.SubElement(self.root, f"{{{NS_RELS}}}Relationship",
+                         Id=rId, Type=reltype, Target=target)
+        return rId
+
+
+def _find_video(sld, video_name):
+    return sld.xpath(f'.//p:pic[p:nvPicPr/p:cNvPr/@name="{video_name}"]'
+                     f'[p:nvPicPr/p:nvPr/a:videoFile]')
+
+
+def _find_placeholders(sld, video_name):
+    return sld.xpath(f'.//p:sp[p:nvSpPr/p:cNvPr/@name="{PLACEHOLDER_PREFIX}: {video_name}"]')
+
+
+def _patch_content_types(xml):
+    """Agregar los Default que falten; devuelve el XML nuevo o None si no cambió"""
+    root = etree.fromstring(xml)
+    present = {d.get("Extension").lower() for d in root.iter(f"{{{NS_CT}}}Default")}
+    missing = [ext for ext in REQUIRED_DEFAULTS if ext not in present]
+    if not missing:
+        return None
+    for ext in missing:
+        default = etree.Element(f"{{{NS_CT}}}Default", Extension=ext,
+                                ContentType=REQUIRED_DEFAULTS[ext])
+        # Los Default van antes de los Override
+        first_override = root.find(f"{{{NS_CT}}}Override")
+        if first_override is not None:
+            first_override.addprevious(default)
+        else:
+            root.append(default)
+    return _serialize(root)
+
+
+def _find_poster(zf):
+    """Reutilizar el poster de parlante si ya está en el paquete"""
+    crc = zipfile.crc32(SPEAKER_IMAGE_BYTES)
+    for info in zf.infolist():
+        if (info.filename.startswith("ppt/media/") and info.CRC == crc
+                and info.file_size == len(SPEAKER_IMAGE_BYTES)):
+            return info.filename
+    return None
+
+
+def _media_part(zf, slide_name, pic):
+    """Entrada de ppt/media/ a la que apunta el video `pic` del slide"""
+    rId = pic.xpath("./p:nvPicPr/p:nvPr/a:videoFile/@r:link")[0]
+    rels = etree.fromstring(zf.read(_rels_name(slide_name)))
+    for rel in rels.iter(f"{{{NS_RELS}}}Relationship"):
+        if rel.get("Id") == rId:
+            return _resolve(slide_name, rel.get("Target"))
+    raise KeyError(f"{slide_name}: relación {rId} no encontrada")
+
+
+def _media_by_content(zf):
+    """{(CRC32, tamaño): entrada} de la media que ya está en el paquete"""
+    return {(info.CRC, info.file_size): info.filename for info in zf.infolist()
+            if info.filename.startswith("ppt/media/")}
+
+
+def patch_videos(pptx_path, videos_dir="videos_demo", output_path=None,
+                 policy=DEFAULT_POLICY, refresh=(), videos=None):
+    """
+    Insertar los videos disponibles en un .pptx reescribiendo solo lo necesario
+
+    Los slides que ya tienen su video quedan intactos. Los que tenían
+    placeholder y ahora tienen el video disponible reciben el video (y se
+    quita el placeholder). Los que siguen sin video reciben un placeholder
+    si todavía no lo tienen. Los videos nombrados en `refresh` (regrabados)
+    reemplazan el contenido de la parte de media que ya usa su slide, y se
+    ajusta el avance automático a la nueva duración.
+
+    Args:
+        pptx_path: .pptx a actualizar
+        videos_dir: Carpeta donde están los videos
+        output_path: Archivo de salida (por defecto se reemplaza pptx_path)
+        policy: CompressionPolicy para las partes reescritas y la media nueva
+        refresh: Nombres de videos cuyo archivo cambió
+        videos: Mapa índice de slide → video o lista de videos (por defecto
+            VIDEOS, el de slides.json)
+
+    Returns:
+        dict con inserted, refreshed, missing, unchanged, rewritten,
+        copied_bytes, streamed, total_duration y probe_time
+    """
+    pptx_path = Path(pptx_path)
+    output_path = Path(output_path) if output_path else pptx_path
+    videos_path = Path(videos_dir)
+    refresh = set(refresh)
+    videos = VIDEOS if videos is None else videos
+    stats = {"inserted": 0, "refreshed": 0, "missing": 0, "unchanged": 0, "rewritten": 0,
+             "copied_bytes": 0, "streamed": 0, "total_duration": 0.0, "probe_time": 0.0}
+
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    try:
+        with zipfile.ZipFile(pptx_path) as src:
+            names = src.namelist()
+            slides = slide_partnames(src)
+            replaced = {}
+            new_media = {}
+            refreshed_media = {}
+            next_media = _next_index(names, "media")
+            poster = _find_poster(src)
+            new_poster = None
+            by_content = _media_by_content(src)
+
+            start = time.perf_counter()
+            report = verify_videos(videos_path, video_names(videos))
+            stats["probe_time"] = time.perf_counter() - start
+
+            for slide_index, video_list in slide_videos(videos):
+                if slide_index >= len(slides):
+                    print(f"⚠️  Slide {slide_index} no existe (total slides: {len(slides)})")
+                    continue
+
+                slide_name = slides[slide_index]
+                sld = parse_xml(src.read(slide_name))
+                rels_name = _rels_name(slide_name)
+                rels = None
+                changed = False
+                for position, video_name in enumerate(video_list):
+                    box = video_box(position, len(video_list))
+                    video_path = videos_path / video_name
+                    video = report.videos[video_name]
+                    info = video.info
+                    existing = _find_video(sld, video_name)
+                    if existing:
+                        if video_name not in refresh or info is None:
+                            stats["unchanged"] += 1
+                            continue
+                        media_name = _media_part(src, slide_name, existing[0])
+                        refreshed_media[media_name] = video_path
+                        set_video_autoplay(sld, existing[0].shape_id, info.duration)
+                        set_auto_advance(sld, autoplay_seconds(sld) + ADVANCE_MARGIN_S)
+                        changed = True
+                        stats["refreshed"] += 1
+                        stats["total_duration"] += info.duration
+                        print(f"🔄 Slide {slide_index}: {video_name} "
+                              f"({format_duration(info.duration)})")
+                        continue
+
+                    placeholders = _find_placeholders(sld, video_name)
+                    if video.status == "corrupt":
+                        print(f"❌ Slide {slide_index}: {video_name} corrupto ({video.detail})")
+
+                    if info is None:
+                        if placeholders:
+                            stats["unchanged"] += 1
+                            continue
+                        print(f"⚠️  Slide {slide_index}: {video_name} NO encontrado")
+                        add_video_placeholder(_PatchedSlide(sld), video_name, box)
+                        changed = True
+                        stats["missing"] += 1
+                        continue
+
+                    if rels is None:
+                        rels = _Rels(src.read(rels_name) if rels_name in names else None)
+
+                    digest = video.digest
+                    media_name = by_content.get((digest.crc32, digest.size))
+                    if media_name is None:
+                        media_name = f"ppt/media/media{next_media}{video_path.suffix.lower()}"
+                        next_media += 1
+                        new_media[media_name] = video_path
+                        by_content[(digest.crc32, digest.size)] = media_name
+                    if poster is None:
+                        poster = new_poster = f"ppt/media/image{_next_index(names, 'image')}.png"
+                    media_target = posixpath.relpath(media_name, posixpath.dirname(slide_name))
+                    media_rId = rels.add(RT.MEDIA, media_target)
+                    video_rId = rels.add(RT.VIDEO, media_target)
+                    poster_rId = rels.add(RT.IMAGE,
+                                          posixpath.relpath(poster, posixpath.dirname(slide_name)))
+
+                    for placeholder in placeholders:
+                        placeholder.getparent().remove(placeholder)
+                    shapes = _PatchedSlide(sld).shapes
+                    pic = CT_Picture.new_video_pic(shapes._next_shape_id, video_name, video_rId,
+                                                   media_rId, poster_rId, *box)
+                    sld.cSld.spTree.append(pic)
+                    sld.get_or_add_childTnLst().add_video(pic.shape_id)
+                    set_video_autoplay(sld, pic.shape_id, info.duration)
+                    set_auto_advance(sld, autoplay_seconds(sld) + ADVANCE_MARGIN_S)
+                    changed = True
+                    stats["inserted"] += 1
+                    stats["total_duration"] += info.duration
+                    print(f"✅ Slide {slide_index}: {video_name} "
+                          f"({format_duration(info.duration)})")
+
+                if changed:
+                    replaced[slide_name] = _serialize(sld)
+                if rels is not None:
+                    replaced[rels_name] = _serialize(rels.root)
+
+            if new_media:
+                content_types = _patch_content_types(src.read("[Content_Types].xml"))
+                if content_types is not None:
+                    replaced["[Content_Types].xml"] = content_types
+
+            if not replaced:
+                if output_path != pptx_path:
+                    shutil.copyfile(pptx_path, output_path)
+                return stats
+
+            entries = []
+            for info in src.infolist():
+                if info.filename in replaced:
+                    entries.append(bytes_entry(info.filename, replaced.pop(info.filename)))
+                elif info.filename in refreshed_media:
+                    entries.append(file_entry(info.filename, refreshed_media[info.filename]))
+                else:
+                    entries.append(raw_entry(src, info))
+            # .rels nuevos (slides que no tenían relaciones)
+            entries.extend(bytes_entry(name, xml) for name, xml in replaced.items())
+            entries.extend(file_entry(name, path) for name, path in new_media.items())
+            if new_poster:
+                entries.append(bytes_entry(new_poster, SPEAKER_IMAGE_BYTES))
+            stats["rewritten"] = sum(1 for kind, _, _ in entries if kind == "bytes")
+
+            with open_zip(tmp_path, policy) as dst:
+                written = write_entries(dst, entries, policy)
+            stats["copied_bytes"] = written["raw"]
+            stats["streamed"] = written["streamed"]
+        os.replace(tmp_path, output_path)
+    finally:
+        # Si algo falló no queda el .tmp a medio escribir
+        tmp_path.unlink(missing_ok=True)
+    return stats
+
+
+# ============================================================================
+# SLIDES CAMBIADOS EN LA SPEC
+# ============================================================================
+
+class NotPatchable(ValueError):
+    """El cambio no se puede aplicar a nivel ZIP: hace falta el build completo"""
+
+
+# Relaciones de un slide que patch_slides conserva tal cual
+_KEPT_RELTYPES = {RT.SLIDE_LAYOUT, RT.MEDIA, RT.VIDEO, RT.IMAGE, RT.NOTES_SLIDE}
+
+
+def _carry_videos(old, new):
+    """
+    Pasar del slide `old` al `new` los videos, los placeholders de video, el
+    timing y el avance automático (elementos p:sld)
+
+    Los shapes llevan ids nuevos, después de los del slide renderizado, y el
+    timing se actualiza con esos ids. Los rId de los videos siguen siendo
+    los del .rels del slide, que se conserva.
+    """
+    spTree = new.cSld.spTree
+    next_id = max((int(v) for v in new.xpath(".//p:cNvPr/@id")), default=0) + 1
+    ids = {}
+    shapes = old.xpath(
+        f'./p:cSld/p:spTree/p:pic[p:nvPicPr/p:nvPr/a:videoFile]'
+        f' | ./p:cSld/p:spTree/p:sp[starts-with(p:nvSpPr/p:cNvPr/@name, '
+        f'"{PLACEHOLDER_PREFIX}: ")]')
+    for shape in shapes:
+        cNvPr = shape.xpath("./*/p:cNvPr")[0]
+        ids[cNvPr.get("id")] = str(next_id)
+        cNvPr.set("id", str(next_id))
+        next_id += 1
+        spTree.append(shape)
+
+    anchor = new.find(f"{{{NS_P}}}extLst")
+    for tag in ("transition", "timing"):
+        for element in new.findall(f"{{{NS_P}}}{tag}"):
+            new.remove(element)
+        element = old.find(f"{{{NS_P}}}{tag}")
+        if element is None:
+            continue
+        for target in element.iter(f"{{{NS_P}}}spTgt"):
+            target.set("spid", ids.get(target.get("spid"), target.get("spid")))
+        if anchor is not None:
+            anchor.addprevious(element)
+        else:
+            new.append(element)
+
+
+def patch_slides(pptx_path, slides, output_path=None, policy=DEFAULT_POLICY):
+    """
+    Reemplazar el XML de algunos slides sin rearmar el resto del paquete
+
+    Para un cambio en la spec que no agrega ni quita slides: cada slide
+    cambiado se renderiza aparte (p. ej. con build_presentation) y acá se
+    reemplaza su parte. Los videos, placeholders y el avance automático que
+    tenía el slide pasan al XML nuevo; el resto de las entradas, incluida
+    toda la media, se copia cruda.
+
+    Args:
+        pptx_path: .pptx a actualizar
+        slides: {índice: (XML del slide renderizado, parte de su layout)}
+        output_path: Archivo de salida (por defecto se reemplaza pptx_path)
+        policy: CompressionPolicy para las partes reescritas
+
+    Returns:
+        dict con replaced, rewritten y copied_bytes
+
+    Raises:
+        NotPatchable: si algún slide no se puede reemplazar así (gráficos,
+            relaciones propias, un layout que el paquete no tiene)
+    """
+    pptx_path = Path(pptx_path)
+    output_path = Path(output_path) if output_path else pptx_path
+    stats = {"replaced": 0, "rewritten": 0, "copied_bytes": 0}
+
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    try:
+        with zipfile.ZipFile(pptx_path) as src:
+            names = set(src.namelist())
+            partnames = slide_partnames(src)
+            replaced = {}
+            for index, (xml, layout) in sorted(slides.items()):
+                if index >= len(partnames):
+                    raise NotPatchable(f"el slide {index} no está en {pptx_path.name}")
+                slide_name = partnames[index]
+                rels_name = _rels_name(slide_name)
+                new = parse_xml(xml)
+                if new.xpath(".//@r:*"):
+                    raise NotPatchable(f"el slide {index} renderizado usa relaciones propias")
+                if layout not in names:
+                    raise NotPatchable(f"{layout} no está en {pptx_path.name}")
+
+                rels = etree.fromstring(src.read(rels_name))
+                for rel in rels.iter(f"{{{NS_RELS}}}Relationship"):
+                    if rel.get("Type") not in _KEPT_RELTYPES:
+                        kind = rel.get("Type").rsplit("/", 1)[-1]
+                        raise NotPatchable(f"el slide {index} tiene una relación {kind}")
+                    if rel.get("Type") == RT.SLIDE_LAYOUT:
+                        rel.set("Target", posixpath.relpath(layout, posixpath.dirname(slide_name)))
+
+                _carry_videos(parse_xml(src.read(slide_name)), new)
+                replaced[slide_name] = _serialize(new)
+                replaced[rels_name] = _serialize(rels)
+                stats["replaced"] += 1
+
+            if not replaced:
+                if output_path != pptx_path:
+                    shutil.copyfile(pptx_path, output_path)
+                return stats
+
+            entries = [bytes_entry(info.filename, replaced[info.filename])
+                       if info.filename in replaced else raw_entry(src, info)
+                       for info in src.infolist()]
+            stats["rewritten"] = len(replaced)
+
+            with open_zip(tmp_path, policy) as dst:
+                written = write_entries(dst, entries, policy)
+            stats["copied_bytes"] = written["raw"]
+        os.replace(tmp_path, output_path)
+    finally:
+        # Si algo falló no queda el .tmp a medio escribir
+        tmp_path.unlink(missing_ok=True)
+    return stats
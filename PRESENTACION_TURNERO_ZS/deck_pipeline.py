@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Pipeline de build de la presentación en una sola pasada
+
+Genera los slides desde la spec, inserta los videos sobre la misma
+presentación en memoria y escribe el .pptx una única vez. create_presentation.py
+e insert_videos_pptx.py son wrappers de línea de comandos sobre build_deck().
+
+En modo reproducible (policy.date_time fijo) la salida es idéntica byte a
+byte para el mismo input y, si el .pptx ya es el build de ese input, no se
+vuelve a generar (ver deck_repro.py).
+
+Cada etapa (spec, slides, videos, save) es una phase de deck_trace.py: con
+--trace queda una línea JSON por etapa con su duración.
+
+Para muchos builds seguidos (deck_batch.py, deck_service.py) build_pool()
+arma un pool de procesos que ya cargaron python-pptx y el master, y
+build_variant() construye una variante por institución en uno de ellos.
+"""
+
+import contextlib
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+
+from create_presentation import (CACHE_DIR, CHART_MAX_POINTS, DEFAULT_STYLING, SPEC_PATH,
+                                 _render_key, build_presentation, load_spec)
+from deck_compact import compact_presentation
+from deck_repro import (build_input_hash, cached_build, file_sha256, normalize_presentation,
+                        record_build)
+from deck_trace import phase, record_package
+from deck_writer import DEFAULT_POLICY, save_presentation
+from insert_videos_pptx import insert_videos
+from video_manifest import verify_videos
+from video_map import slide_videos, spec_videos, video_names
+
+
+@dataclass
+class BuildResult:
+    output_path: str
+    slides: int
+    reused: int             # slides restaurados del cache
+    rendered: int           # slides renderizados
+    videos: dict | None     # stats de insert_videos (None si no hubo etapa de videos)
+    streamed_bytes: int     # bytes de media copiados en streaming
+    charts: list            # (título, puntos originales, puntos escritos) por gráfico
+    sha256: str | None = None   # hash del .pptx (solo en modo reproducible)
+    cached: bool = False        # True si no se regeneró porque el input no cambió
+    compacted: dict | None = None   # stats de compact_presentation (si se pidió)
+
+
+def build_deck(output_path, spec_path=SPEC_PATH, videos_dir=None, cache_dir=CACHE_DIR,
+               styling=DEFAULT_STYLING, metrics=None, chart_points=CHART_MAX_POINTS,
+               policy=DEFAULT_POLICY, slides=None, videos=None, template=None, linked=False,
+               progress=None, compact=False):
+    """
+    Construir la presentación completa y guardarla
+
+    Args:
+        output_path: Archivo .pptx de salida
+        spec_path: Spec JSON de los slides
+        videos_dir: Carpeta de videos; si es None no se insertan videos
+        cache_dir: Cache de slides renderizados (None para desactivarlo)
+        styling: "master" (formato en el slide master) o "inline"
+        metrics: QueueMetrics para completar los slides de métricas (opcional)
+        chart_points: Puntos por serie en los gráficos (0 = sin reducir)
+        policy: CompressionPolicy para escribir el .pptx
+        slides: Lista de slides en lugar de la spec de `spec_path` (opcional)
+        videos: Mapa índice de slide → video o lista de videos (por defecto
+            el campo "video" de cada slide de la spec)
+        template: Bytes de presentation_template para no rearmar el master
+        linked: Vincular los videos en lugar de embeberlos (la carpeta se
+            escribe aparte con media_bundle.write_bundle)
+        progress: Función progress(etapa, **datos) que se llama al terminar
+            cada etapa ("slides", "videos", "saved"; "cached" si no se regeneró)
+        compact: Quitar los layouts que ningún slide usa antes de guardar
+            (ver deck_compact.py)
+    """
+    if progress is None:
+        def progress(stage, **info):
+            pass
+
+    with phase("spec") as info:
+        if slides is None:
+            slides = load_spec(spec_path)
+        if metrics is not None:
+            from queue_metrics import fill_metrics_slides
+            slides = fill_metrics_slides(slides, metrics)
+        info["slides"] = len(slides)
+    if videos is None:
+        videos = spec_videos(slides)
+
+    input_hash = None
+    if policy.date_time is not None:
+        with phase("input_hash") as info:
+            input_hash = deck_input_hash(slides, videos_dir, videos, styling, chart_points,
+                                         policy, linked, compact)
+            cached = cached_build(output_path, input_hash)
+            info["cached"] = cached is not None
+        if cached is not None:
+            progress("cached")
+            return BuildResult(**{**cached, "output_path": str(output_path), "cached": True})
+
+    with phase("slides") as info:
+        prs, stats = build_presentation(spec_path, cache_dir, styling, None, chart_points,
+                                        slides, template)
+        info.update(rendered=stats["rendered"], reused=stats["reused"])
+    progress("slides", rendered=stats["rendered"], reused=stats["reused"])
+    video_stats = None
+    if videos_dir:
+        with phase("videos") as info:
+            video_stats = insert_videos(prs, videos_dir, videos, linked)
+            info.update(inserted=video_stats["inserted"], missing=video_stats["missing"],
+                        hashed=video_stats["hashed"])
+        progress("videos", inserted=video_stats["inserted"], missing=video_stats["missing"])
+    compacted = None
+    if compact:
+        with phase("compact") as info:
+            compacted = compact_presentation(prs)
+            info.update(compacted)
+    if policy.date_time is not None:
+        normalize_presentation(prs, policy.date_time)
+    with phase("save") as info:
+        streamed = save_presentation(prs, output_path, policy)
+        info["streamed_bytes"] = streamed
+    record_package(output_path, len(prs.slides), streamed)
+    progress("saved", streamed_bytes=streamed)
+    result = BuildResult(str(output_path), len(prs.slides), stats["reused"],
+                         stats["rendered"], video_stats, streamed, stats["charts"],
+                         compacted=compacted)
+    if input_hash is not None:
+        result.sha256 = file_sha256(output_path)
+        record_build(output_path, input_hash, result)
+    return result
+
+
+def deck_input_hash(slides, videos_dir=None, videos=None, styling=DEFAULT_STYLING,
+                    chart_points=CHART_MAX_POINTS, policy=DEFAULT_POLICY, linked=False,
+                    compact=False):
+    """
+    Hash de todo lo que determina el .pptx; los videos cuentan por contenido
+
+    Recibe los mismos argumentos que build_deck (los slides ya cargados).
+    verify_videos reescribe el manifest de la carpeta de videos: no llamarla
+    desde dos threads a la vez.
+    """
+    video_content = None
+    if videos_dir:
+        videos = spec_videos(slides) if videos is None else videos
+        report = verify_videos(videos_dir, video_names(videos))
+        video_content = {
+            str(index): [[name, report.videos[name].status,
+                          report.videos[name].digest and report.videos[name].digest.sha1]
+                         for name in names]
+            for index, names in slide_videos(videos)}
+    policy_inputs = {k: v for k, v in asdict(policy).items() if k != "workers"}
+    return build_input_hash(slides=slides, render=_render_key(styling),
+                            chart_points=chart_points, videos=video_content,
+                            linked=linked, compact=compact, policy=policy_inputs)
+
+
+# ============================================================================
+# POOL DE WORKERS
+# ============================================================================
+
+# Estado de cada worker de build_pool (lo arma _init_worker)
+_WORKER = {}
+
+
+def build_pool(workers, styling=DEFAULT_STYLING, events=None):
+    """
+    Pool de procesos para build_variant
+
+    Cada worker importa python-pptx y arma la presentación base con master y
+    layouts una sola vez al arrancar (queda como bytes); por variante solo
+    abre esos bytes, cambia la paleta del tema y genera los slides.
+
+    Args:
+        workers: Cantidad de procesos
+        styling: "master" o "inline", el mismo para todas las variantes
+        events: multiprocessing.Queue opcional donde build_variant deja el
+            progreso de cada build como (job_id, etapa, datos)
+    """
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(styling, events))
+
+
+def _init_worker(styling, events):
+    import create_presentation
+    from create_presentation import presentation_template
+
+    _WORKER["module"] = create_presentation
+    _WORKER["defaults"] = {name: str(getattr(create_presentation, "COLOR_" + name.upper()))
+                           for name in create_presentation.PALETTE_NAMES}
+    _WORKER["template"] = presentation_template(styling)
+    _WORKER["events"] = events
+
+
+def build_variant(variant, slides, videos, output_path, options, job_id=None):
+    """
+    Construir una variante en un worker de build_pool
+
+    Args:
+        variant: Variante como las de instituciones.json (se usan sus colors)
+        slides, videos: Los de deck_batch.variant_slides
+        output_path: Archivo .pptx de salida
+        options: dict con videos_dir, cache_dir, styling y policy para build_deck
+        job_id: Identificador del pedido en la cola de eventos (opcional)
+
+    Returns:
+        (BuildResult, segundos)
+    """
+    start = time.perf_counter()
+    events = _WORKER["events"]
+    progress = None
+    if events is not None and job_id is not None:
+        def progress(stage, **info):
+            events.put((job_id, stage, info))
+
+    module = _WORKER["module"]
+    module.set_palette(**{**_WORKER["defaults"], **variant.get("colors", {})})
+
+    # La salida por slide de la etapa de videos se descarta: los workers
+    # escriben a la vez y el resumen lo arma el proceso principal
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = build_deck(
+            output_path, videos_dir=options["videos_dir"], cache_dir=options["cache_dir"],
+            styling=options["styling"], policy=options["policy"], slides=slides,
+            videos=videos, template=_WORKER["template"], progress=progress)
+    seconds = time.perf_counter() - start
+    if progress is not None:
+        progress("built", seconds=round(seconds, 3))
+    return result, seconds
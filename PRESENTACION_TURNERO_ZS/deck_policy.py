@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Política de compresión de los .pptx que se escriben
+
+Separada de deck_writer.py (que importa python-pptx) para que las opciones
+de línea de comandos se puedan armar sin cargar python-pptx: turnero_deck.py
+las usa para `--help` antes de saber qué subcomando corre.
+"""
+
+import os
+import time
+from dataclasses import dataclass
+
+# Fecha mínima de una entrada ZIP; fecha fija por defecto en modo reproducible
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+# Extensiones que ya vienen comprimidas: deflate no gana casi nada
+PRECOMPRESSED_EXTENSIONS = {
+    "mp4", "mov", "m4v", "avi", "wmv", "mp3", "m4a",
+    "png", "jpg", "jpeg", "gif",
+}
+
+
+@dataclass(frozen=True)
+class CompressionPolicy:
+    """Cómo comprimir cada parte al escribir el .pptx"""
+
+    xml_level: int = 6          # nivel de deflate para XML y demás partes (0-9)
+    store_media: bool = True    # media ya comprimida → ZIP_STORED
+    workers: int | None = None  # threads para deflate (None = os.cpu_count())
+    date_time: tuple | None = None  # fecha fija de las entradas (None = hora actual)
+
+    def compress_type(self, membername):
+        import zipfile  # diferido: `turnero-deck check` y `--help` no lo necesitan
+
+        ext = membername.rsplit(".", 1)[-1].lower()
+        if self.store_media and ext in PRECOMPRESSED_EXTENSIONS:
+            return zipfile.ZIP_STORED
+        return zipfile.ZIP_DEFLATED
+
+
+DEFAULT_POLICY = CompressionPolicy()
+
+
+def add_policy_arguments(parser):
+    """Opciones de línea de comandos para la política de compresión"""
+    parser.add_argument("--compresslevel", type=int, default=DEFAULT_POLICY.xml_level,
+                        choices=range(10), metavar="0-9",
+                        help="Nivel de deflate para las partes XML (por defecto 6)")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Threads para comprimir (por defecto, uno por CPU)")
+    parser.add_argument("--reproducible", action="store_true",
+                        help="Salida idéntica byte a byte para el mismo input (fecha fija "
+                             "SOURCE_DATE_EPOCH o 1980-01-01) y sin rearmar si no cambió")
+
+
+def reproducible_date():
+    """Fecha de las entradas en modo reproducible: SOURCE_DATE_EPOCH o ZIP_EPOCH"""
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if not epoch:
+        return ZIP_EPOCH
+    return max(time.gmtime(int(epoch))[:6], ZIP_EPOCH)
+
+
+def policy_from_args(args):
+    return CompressionPolicy(xml_level=args.compresslevel, workers=args.jobs,
+                             date_time=reproducible_date() if args.reproducible else None)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Builds reproducibles y cache de presentaciones ya generadas
+
+Con la política de compresión en modo reproducible (--reproducible, fecha
+fija en CompressionPolicy.date_time) el mismo input da el mismo .pptx byte a
+byte:
+
+- las entradas del ZIP llevan la fecha fija (SOURCE_DATE_EPOCH o 1980-01-01)
+- las propiedades del documento (docProps/core.xml) se normalizan: autor,
+  fechas y revisión fijos en lugar de los del template de python-pptx
+- los libros Excel embebidos de los gráficos se reescriben sin la fecha de
+  creación que les pone xlsxwriter
+
+El orden de las partes, los ids de shapes y los rId ya son deterministas:
+salen del orden de la spec y los slides del cache son idénticos a los
+renderizados.
+
+Además, build_input_hash resume todo lo que determina la salida (spec,
+paleta y versión de render, videos por contenido, política y código del
+generador). build_deck lo guarda junto al .pptx (<salida>.build.json) y, si
+en el próximo build coincide y el archivo no cambió, no vuelve a generarlo.
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import zipfile
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+
+import pptx
+from pptx.parts.embeddedpackage import EmbeddedXlsxPart
+
+DOCUMENT_AUTHOR = "Turnero ZS"
+
+_XLSX_DATES = re.compile(rb"(<dcterms:(created|modified) [^>]*>)[^<]*(</dcterms:\2>)")
+
+
+def normalize_core_properties(prs, date_time):
+    """Propiedades del documento fijas, con fecha `date_time`"""
+    props = prs.core_properties
+    stamp = datetime(*date_time)
+    props.author = DOCUMENT_AUTHOR
+    props.last_modified_by = DOCUMENT_AUTHOR
+    props.comments = ""
+    props.revision = 1
+    props.created = stamp
+    props.modified = stamp
+
+
+def normalize_xlsx(blob, date_time):
+    """Libro Excel con fechas de creación y de entradas ZIP fijas"""
+    stamp = datetime(*date_time).strftime("%Y-%m-%dT%H:%M:%SZ").encode("ascii")
+    output = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(blob)) as src, \
+            zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            data = src.read(info)
+            if info.filename == "docProps/core.xml":
+                data = _XLSX_DATES.sub(rb"\g<1>" + stamp + rb"\g<3>", data)
+            zinfo = zipfile.ZipInfo(info.filename, date_time)
+            zinfo.compress_type = zipfile.ZIP_DEFLATED
+            zinfo.external_attr = info.external_attr
+            dst.writestr(zinfo, data)
+    return output.getvalue()
+
+
+def normalize_part(part, date_time):
+    """Normalizar una parte si lo necesita (hoy, los libros de los gráficos)"""
+    if isinstance(part, EmbeddedXlsxPart):
+        part._blob = normalize_xlsx(part.blob, date_time)
+
+
+def normalize_presentation(prs, date_time):
+    """Dejar `prs` lista para un guardado reproducible"""
+    normalize_core_properties(prs, date_time)
+    for part in prs.part.package.iter_parts():
+        normalize_part(part, date_time)
+
+
+# ============================================================================
+# CACHE DE BUILDS
+# ============================================================================
+
+def _code_hash():
+    """Hash de los módulos del generador y de la versión de python-pptx"""
+    digest = hashlib.sha256(pptx.__version__.encode("ascii"))
+    for path in sorted(Path(__file__).parent.glob("*.py")):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def build_input_hash(**inputs):
+    """SHA-256 de los inputs del build (valores JSON) más el código del generador"""
+    payload = json.dumps({**inputs, "code": _code_hash()}, sort_keys=True,
+                         ensure_ascii=False, separators=(",", ":"), default=list)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _record_path(output_path):
+    output_path = Path(output_path)
+    return output_path.with_name(output_path.name + ".build.json")
+
+
+def load_build_record(output_path):
+    """
+    Registro del build de `output_path` (hash de inputs y resultado), si el
+    .pptx sigue con el tamaño y mtime con los que se escribió; si no, None
+    """
+    try:
+        with open(_record_path(output_path), encoding="utf-8") as f:
+            record = json.load(f)
+        st = os.stat(output_path)
+    except (FileNotFoundError, ValueError):
+        return None
+    if record.get("size") != st.st_size or record.get("mtime_ns") != st.st_mtime_ns:
+        return None
+    return record
+
+
+def cached_build(output_path, input_hash):
+    """Resultado guardado si `output_path` ya es el build de `input_hash`, si no None"""
+    record = load_build_record(output_path)
+    if record is None or record.get("input") != input_hash:
+        return None
+    return record["result"]
+
+
+def record_build(output_path, input_hash, result):
+    """Guardar el hash de inputs y el resultado (dataclass) junto al .pptx"""
+    st = os.stat(output_path)
+    record = {"input": input_hash, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+              "result": asdict(result)}
+    path = _record_path(output_path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=1, ensure_ascii=False)
+    os.replace(tmp_path, path)
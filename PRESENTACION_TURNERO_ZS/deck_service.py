@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+"""
+Servicio local de build de presentaciones
+
+Proceso de larga duración para que la app web pida presentaciones con la
+marca de cada institución sin lanzar create_presentation.py e
+insert_videos_pptx.py por pedido. Escucha HTTP en localhost o en un socket
+Unix (--socket) y expone:
+
+    POST /jobs              pedido: una variante como las de instituciones.json
+                            ({"name", "colors", "slides", "videos"})
+    GET  /jobs/<id>         estado del pedido
+    GET  /jobs/<id>/events  progreso en JSON por línea (NDJSON) hasta que termina
+    GET  /jobs/<id>/deck    el .pptx generado
+    GET  /health            workers, cola y pedidos
+
+- Los builds corren en un pool de procesos que ya importaron python-pptx y
+  armaron el master al arrancar (deck_pipeline.build_pool, como deck_batch) y
+  comparten el cache de slides.
+- La cola es acotada (--queue-size): con la cola llena el POST responde 503
+  con Retry-After en lugar de acumular pedidos sin límite.
+- Cada pedido se identifica por el hash de sus inputs (spec, variante,
+  contenido de los videos, código del generador). Un pedido igual a uno en
+  curso se une a ese; uno igual a uno ya generado responde con el .pptx que
+  está en .deck_service/ sin volver a construirlo. Los builds son
+  reproducibles, así que el mismo pedido da los mismos bytes.
+"""
+
+import io
+import json
+import multiprocessing
+import queue
+import re
+import shutil
+import socketserver
+import threading
+import time
+import traceback
+from dataclasses import asdict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from create_presentation import (CACHE_DIR, CHART_MAX_POINTS, DEFAULT_STYLING, PALETTE_NAMES,
+                                 SPEC_PATH, load_spec)
+from deck_batch import output_name, slide_subset, variant_slides
+from deck_pipeline import build_pool, build_variant, deck_input_hash
+from deck_repro import build_input_hash, load_build_record
+from deck_writer import CompressionPolicy, reproducible_date
+
+SERVICE_DIR = Path(__file__).with_name(".deck_service")
+DEFAULT_PORT = 8765
+QUEUE_SIZE = 16
+CACHE_ENTRIES = 100         # presentaciones que se conservan en SERVICE_DIR
+FOLLOW_TIMEOUT_S = 15       # espera máxima entre líneas del stream de eventos
+
+FINISHED = ("done", "failed")
+
+# Campos de un pedido y su tipo
+REQUEST_FIELDS = {"name": str, "colors": dict, "slides": list, "videos": dict}
+
+
+class InvalidRequest(Exception):
+    """El cuerpo del pedido no es una variante válida (responde 400)"""
+
+
+def parse_request(body, total_slides):
+    """
+    Validar el cuerpo de POST /jobs
+
+    Args:
+        body: Bytes del cuerpo (JSON)
+        total_slides: Slides de la spec, para los índices de "slides"
+
+    Returns:
+        La variante (dict) con solo los campos de REQUEST_FIELDS
+
+    Raises:
+        InvalidRequest: con el motivo, para devolverlo al cliente
+    """
+    try:
+        variant = json.loads(body)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise InvalidRequest(f"El cuerpo no es JSON válido: {e}") from None
+    if not isinstance(variant, dict):
+        raise InvalidRequest("El pedido tiene que ser un objeto JSON")
+    unknown = variant.keys() - REQUEST_FIELDS.keys()
+    if unknown:
+        raise InvalidRequest(f"Campos desconocidos: {', '.join(sorted(unknown))}")
+    for name, kind in REQUEST_FIELDS.items():
+        if name in variant and not isinstance(variant[name], kind):
+            raise InvalidRequest(f"\"{name}\" tiene que ser {kind.__name__}")
+    if not variant.get("name", "").strip():
+        raise InvalidRequest("El pedido necesita un nombre (\"name\")")
+
+    for name, value in variant.get("colors", {}).items():
+        if name not in PALETTE_NAMES:
+            raise InvalidRequest(f"Color desconocido: {name} "
+                                 f"(válidos: {', '.join(PALETTE_NAMES)})")
+        if not isinstance(value, str) or not re.fullmatch(r"#?[0-9A-Fa-f]{6}", value):
+            raise InvalidRequest(f"Color inválido: {name}={value!r} (hex RRGGBB)")
+
+    if "slides" in variant:
+        for item in variant["slides"]:
+            valid = (isinstance(item, int) and not isinstance(item, bool)
+                     or isinstance(item, str) and re.fullmatch(r"\d+(-\d+)?", item))
+            if not valid:
+                raise InvalidRequest(f"Slide inválido: {item!r} (índice o rango \"a-b\")")
+        try:
+            slide_subset(variant["slides"], total_slides)
+        except ValueError as e:
+            raise InvalidRequest(str(e)) from None
+
+    for index, video in variant.get("videos", {}).items():
+        if not re.fullmatch(r"\d+", index) or not 0 <= int(index) < total_slides:
+            raise InvalidRequest(f"Índice de video inválido: {index!r}")
+        names = [video] if isinstance(video, str) else video
+        if not isinstance(names, list) or not names or not all(
+                isinstance(name, str) and re.fullmatch(r"[\w.-]+\.mp4", name)
+                for name in names):
+            raise InvalidRequest(f"Video inválido en {index}: {video!r} "
+                                 f"(archivo .mp4 o lista de archivos)")
+    return variant
+
+
+class Job:
+    """Un pedido de build, con su historial de eventos"""
+
+    def __init__(self, job_id, variant, output_path):
+        self.id = job_id
+        self.variant = variant
+        self.output_path = output_path
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.events = []
+        self.worker_done = threading.Event()
+        self._start = time.monotonic()
+        self._changed = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+    def emit(self, stage, **info):
+        with self._changed:
+            self.events.append({"stage": stage, "t": round(time.monotonic() - self._start, 3),
+                                **info})
+            self._changed.notify_all()
+
+    def finish(self, status, **info):
+        with self._changed:
+            self.status = status
+            self.emit(status, **info)
+
+    def follow(self):
+        """Eventos desde el primero, a medida que llegan, hasta que el pedido termina"""
+        index = 0
+        while True:
+            with self._changed:
+                if index >= len(self.events) and not self.finished:
+                    self._changed.wait(FOLLOW_TIMEOUT_S)
+                new = self.events[index:]
+                index += len(new)
+                finished = self.finished and index >= len(self.events)
+            if not new and not finished:
+                # Línea vacía para detectar clientes que se fueron
+                yield None
+            yield from new
+            if finished:
+                return
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.variant["name"], "status": self.status,
+                "result": self.result, "error": self.error,
+                "events": len(self.events)}
+
+
+class DeckService:
+    """Cola acotada de pedidos, pool de workers y cache de resultados"""
+
+    def __init__(self, spec_path=SPEC_PATH, videos_dir="videos_demo", output_dir=SERVICE_DIR,
+                 cache_dir=CACHE_DIR, styling=DEFAULT_STYLING, workers=2,
+                 queue_size=QUEUE_SIZE, cache_entries=CACHE_ENTRIES):
+        self.spec_path = Path(spec_path)
+        self.videos_dir = Path(videos_dir) if videos_dir else None
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.styling = styling
+        self.workers = workers
+        self.cache_entries = cache_entries
+        self.policy = CompressionPolicy(workers=1, date_time=reproducible_date())
+        self.options = {"videos_dir": self.videos_dir, "cache_dir": cache_dir,
+                        "styling": styling, "policy": self.policy}
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._pending = queue.Queue(maxsize=queue_size)
+
+        # El pool arranca (y cada worker carga python-pptx y el master) antes
+        # de crear threads: con fork, los procesos no heredan threads a medias
+        self._events = multiprocessing.Queue()
+        self._pool = build_pool(workers, styling, self._events)
+        self._pool.submit(int).result()
+
+        self._threads = [threading.Thread(target=self._pump_events, daemon=True)]
+        self._threads += [threading.Thread(target=self._dispatch, daemon=True)
+                          for _ in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, body):
+        """
+        Validar y encolar un pedido; devuelve el Job (nuevo, en curso o ya generado)
+
+        Raises:
+            InvalidRequest: si el cuerpo no es una variante válida
+            queue.Full: si la cola de pedidos está llena
+        """
+        spec = load_spec(self.spec_path)
+        variant = parse_request(body, len(spec))
+        slides, videos = variant_slides(spec, variant)
+        job_id = self._request_key(variant, slides, videos)[:16]
+        output_path = self.output_dir / f"{job_id}.pptx"
+
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is not None and job.status != "failed" and (
+                    not job.finished or output_path.exists()):
+                return job
+            job = Job(job_id, variant, output_path)
+            record = load_build_record(output_path)
+            if record is not None:
+                job.result = record["result"]
+                job.finish("done", cached=True)
+            else:
+                self._pending.put_nowait((job, slides, videos))
+                job.emit("queued", position=self._pending.qsize())
+            self.jobs[job_id] = job
+        return job
+
+    def _request_key(self, variant, slides, videos):
+        """Hash de todo lo que determina el .pptx del pedido"""
+        with self._lock:
+            # verify_videos reescribe el manifest: un thread por vez
+            deck_inputs = deck_input_hash(slides, self.videos_dir, videos, self.styling,
+                                          CHART_MAX_POINTS, self.policy)
+        return build_input_hash(deck=deck_inputs, colors=variant.get("colors", {}))
+
+    def _dispatch(self):
+        """Thread despachador: un pedido por vez en el pool"""
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            job, slides, videos = item
+            job.status = "running"
+            job.emit("started")
+            future = self._pool.submit(build_variant, job.variant, slides, videos,
+                                       str(job.output_path), self.options, job.id)
+            try:
+                result, seconds = future.result()
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                job.finish("failed", error=job.error)
+                continue
+            # Los eventos del worker llegan por otra cola: esperar el último
+            job.worker_done.wait(5)
+            job.result = asdict(result)
+            job.finish("done", seconds=round(seconds, 3), sha256=result.sha256)
+            self._prune()
+
+    def _pump_events(self):
+        """Pasar el progreso que mandan los workers al Job que corresponde"""
+        while True:
+            item = self._events.get()
+            if item is None:
+                return
+            job_id, stage, info = item
+            job = self.jobs.get(job_id)
+            if job is None:
+                continue
+            job.emit(stage, **info)
+            if stage == "built":
+                job.worker_done.set()
+
+    def _prune(self):
+        """Dejar en output_dir solo las CACHE_ENTRIES presentaciones más recientes"""
+        decks = sorted(self.output_dir.glob("*.pptx"), key=lambda p: p.stat().st_mtime,
+                       reverse=True)
+        with self._lock:
+            for path in decks[self.cache_entries:]:
+                job = self.jobs.get(path.stem)
+                if job is not None and not job.finished:
+                    continue
+                path.unlink(missing_ok=True)
+                path.with_name(path.name + ".build.json").unlink(missing_ok=True)
+                self.jobs.pop(path.stem, None)
+
+    def health(self):
+        statuses = [job.status for job in list(self.jobs.values())]
+        return {"workers": self.workers, "queued": self._pending.qsize(),
+                "queue_size": self._pending.maxsize,
+                "running": statuses.count("running"), "jobs": len(statuses)}
+
+    def close(self):
+        for _ in range(self.workers):
+            self._pending.put(None)
+        self._pool.shutdown(cancel_futures=True)
+        self._events.put(None)
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    server_version = "TurneroDeck/1"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def address_string(self):
+        # En un socket Unix no hay dirección del cliente
+        return self.client_address[0] if self.client_address else "unix"
+
+    def _send_json(self, status, payload, headers=()):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _job(self, job_id):
+        job = self.service.jobs.get(job_id)
+        if job is None:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Pedido {job_id} no encontrado"})
+        return job
+
+    def do_POST(self):
+        if self.path != "/jobs":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Ruta desconocida"})
+            return
+        length = self.headers.get("Content-Length", "")
+        if not length.isdigit():
+            self._send_json(HTTPStatus.LENGTH_REQUIRED, {"error": "Falta Content-Length"})
+            return
+        try:
+            job = self.service.submit(self.rfile.read(int(length)))
+        except InvalidRequest as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+            return
+        except queue.Full:
+            self._send_json(HTTPStatus.SERVICE_UNAVAILABLE,
+                            {"error": "Cola de pedidos llena"}, [("Retry-After", "5")])
+            return
+        except Exception:
+            # log_error escapa los saltos de línea: el traceback va aparte
+            self.log_error("Error interno en POST /jobs")
+            traceback.print_exc()
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Error interno"})
+            return
+        status = HTTPStatus.OK if job.status == "done" else HTTPStatus.ACCEPTED
+        self._send_json(status, job.to_dict(), [("Location", f"/jobs/{job.id}")])
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if parts == ["health"]:
+            self._send_json(HTTPStatus.OK, self.service.health())
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = self._job(parts[1])
+            if job is not None:
+                self._send_json(HTTPStatus.OK, job.to_dict())
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+            job = self._job(parts[1])
+            if job is not None:
+                self._stream_events(job)
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "deck":
+            job = self._job(parts[1])
+            if job is not None:
+                self._send_deck(job)
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Ruta desconocida"})
+
+    def _stream_events(self, job):
+        """Un evento JSON por línea; la respuesta termina cuando termina el pedido"""
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        try:
+            for event in job.follow():
+                line = b"\n" if event is None else json.dumps(event).encode("utf-8") + b"\n"
+                self.wfile.write(line)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_deck(self, job):
+        if job.status != "done":
+            self._send_json(HTTPStatus.CONFLICT, {"error": f"Pedido en estado {job.status}"})
+            return
+        try:
+            f = open(job.output_path, "rb")
+        except FileNotFoundError:
+            self._send_json(HTTPStatus.GONE, {"error": "La presentación ya no está en cache"})
+            return
+        with f:
+            size = f.seek(0, io.SEEK_END)
+            f.seek(0)
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "application/vnd.openxmlformats-officedocument"
+                                             ".presentationml.presentation")
+            self.send_header("Content-Length", str(size))
+            self.send_header("Content-Disposition",
+                             f'attachment; filename="{output_name(job.variant)}"')
+            self.end_headers()
+            shutil.copyfileobj(f, self.wfile)
+
+
+class ServiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class UnixServiceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, host="127.0.0.1", port=DEFAULT_PORT, socket_path=None):
+    """Servidor HTTP en (host, port) o en el socket Unix `socket_path`"""
+    if socket_path:
+        Path(socket_path).unlink(missing_ok=True)
+        server = UnixServiceServer(str(socket_path), ServiceHandler)
+    else:
+        server = ServiceServer((host, port), ServiceHandler)
+    server.service = service
+    return server
+
+
+def smoke_test(spec_path=SPEC_PATH, videos_dir=None, styling=DEFAULT_STYLING):
+    """
+    Levantar el servicio en un puerto libre, pedir una presentación por HTTP
+    y validarla
+
+    Recorre lo mismo que un pedido de la app web (POST /jobs, eventos,
+    descarga), así un cambio en las funciones que usa el servicio se ve acá
+    y no como un 400 o 500 en producción.
+
+    Returns:
+        Lista de problemas (vacía si todo anduvo)
+    """
+    import http.client
+    import tempfile
+
+    from deck_validate import validate_package
+
+    problems = []
+    with tempfile.TemporaryDirectory() as tmp:
+        service = DeckService(spec_path, videos_dir, Path(tmp) / "service",
+                              Path(tmp) / "cache", styling, workers=1)
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        conn = http.client.HTTPConnection(*server.server_address[:2], timeout=120)
+
+        def request(method, path, body=None):
+            conn.request(method, path, body and json.dumps(body))
+            response = conn.getresponse()
+            return response.status, response.read()
+
+        try:
+            status, body = request("POST", "/jobs", {"name": "Smoke test", "slides": ["x"]})
+            if status != HTTPStatus.BAD_REQUEST:
+                problems.append(f"un pedido inválido respondió {status} en lugar de 400")
+            status, body = request("POST", "/jobs", {"name": "Smoke test",
+                                                     "colors": {"primary": "0EA5E9"}})
+            if status not in (HTTPStatus.OK, HTTPStatus.ACCEPTED):
+                return [f"POST /jobs respondió {status}: {body.decode('utf-8', 'replace')}"]
+            job_id = json.loads(body)["id"]
+            status, body = request("GET", f"/jobs/{job_id}/events")
+            stages = [json.loads(line)["stage"] for line in body.splitlines() if line.strip()]
+            if not stages or stages[-1] != "done":
+                return [f"el pedido terminó en {stages[-1] if stages else 'nada'}: "
+                        f"{body.decode('utf-8', 'replace')[-500:]}"]
+            status, body = request("GET", f"/jobs/{job_id}/deck")
+            if status != HTTPStatus.OK:
+                return [f"GET /jobs/{job_id}/deck respondió {status}"]
+            deck = Path(tmp) / "smoke.pptx"
+            deck.write_bytes(body)
+            problems += [f"{issue.part}: {issue.message}"
+                         for issue in validate_package(deck).by_level("error")]
+            # El mismo pedido otra vez sale del cache de resultados
+            status, body = request("POST", "/jobs", {"name": "Smoke test",
+                                                     "colors": {"primary": "0EA5E9"}})
+            if status != HTTPStatus.OK or json.loads(body)["id"] != job_id:
+                problems.append(f"el pedido repetido respondió {status} en lugar del cache")
+        finally:
+            conn.close()
+            server.shutdown()
+            server.server_close()
+            service.close()
+    return problems
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from create_presentation import STYLINGS
+
+    parser = argparse.ArgumentParser(description="Servicio local de build de presentaciones")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección (por defecto localhost)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Puerto HTTP")
+    parser.add_argument("--socket", help="Escuchar en este socket Unix en lugar de TCP")
+    parser.add_argument("--spec", default=str(SPEC_PATH), help="Spec JSON de los slides")
+    parser.add_argument("--videos-dir", default="videos_demo",
+                        help="Carpeta de videos (vacío para no insertarlos)")
+    parser.add_argument("--output-dir", default=str(SERVICE_DIR),
+                        help="Carpeta de las presentaciones generadas (cache de resultados)")
+    parser.add_argument("--styling", choices=STYLINGS, default=DEFAULT_STYLING,
+                        help="Formato en el slide master (master) o en cada párrafo (inline)")
+    parser.add_argument("--workers", type=int, default=2, help="Procesos de build")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE,
+                        help="Pedidos en espera antes de responder 503")
+    parser.add_argument("--cache-entries", type=int, default=CACHE_ENTRIES,
+                        help="Presentaciones que se conservan en la carpeta de salida")
+    parser.add_argument("--smoke", action="store_true",
+                        help="Levantar el servicio en un puerto libre, pedir una "
+                             "presentación y validarla (sale con 1 si algo falla)")
+    args = parser.parse_args()
+
+    if args.smoke:
+        start = time.perf_counter()
+        problems = smoke_test(args.spec, args.videos_dir or None, args.styling)
+        for problem in problems:
+            print(f"[ERROR] {problem}")
+        if problems:
+            raise SystemExit(1)
+        print(f"[OK] Servicio: pedido, eventos, descarga y cache en "
+              f"{time.perf_counter() - start:.1f} s")
+        raise SystemExit(0)
+
+    service = DeckService(args.spec, args.videos_dir or None, args.output_dir,
+                          styling=args.styling, workers=args.workers,
+                          queue_size=args.queue_size, cache_entries=args.cache_entries)
+    server = make_server(service, args.host, args.port, args.socket)
+    where = args.socket or f"http://{args.host}:{args.port}"
+    print(f"[OK] Servicio escuchando en {where} ({args.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print()
+    finally:
+        server.server_close()
+        service.close()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Writer en streaming para presentaciones con miles de slides
+
+Presentation mantiene el árbol lxml de todos los slides hasta prs.save(), y
+cada add_slide recorre todas las relaciones de la presentación (O(n) por
+slide, O(n²) en total). StreamingDeck tiene la misma API que
+create_presentation (add_title_slide, add_content_slide, add_two_column_slide)
+pero serializa cada slide apenas se termina, lo saca de la presentación y
+escribe los bytes al ZIP en tandas chicas, junto con las partes propias del
+slide (el gráfico de un slide "chart" y su libro Excel embebido). Al cerrar se escribe el resto del
+paquete, y presentation.xml, sus .rels y [Content_Types].xml se escriben
+como texto en bloques con una línea por slide (sin crear un Part de
+python-pptx ni un elemento lxml por slide).
+
+La memoria pico no crece con el contenido de los slides: por slide solo
+queda su nombre y su registro en el directorio central del ZIP. Los videos
+se agregan después con la etapa de videos en modo patch
+(insert_videos_pptx.py --pptx ... --patch), que tampoco carga la
+presentación con python-pptx.
+"""
+
+import os
+import re
+import time
+from pathlib import Path
+
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.packuri import CONTENT_TYPES_URI, PackURI
+from pptx.opc.spec import default_content_types
+
+import create_presentation
+from create_presentation import DEFAULT_STYLING, new_presentation, render_slide
+from deck_charts import CHART_MAX_POINTS, downsample_chart
+from deck_repro import normalize_core_properties, normalize_part
+from deck_writer import (DEFAULT_POLICY, bytes_entry, open_zip, package_entries, write_chunks,
+                         write_entries)
+
+# Slides serializados que se acumulan antes de escribirlos juntos (el deflate
+# de una tanda va en paralelo); es lo único pendiente en memoria
+FLUSH_EVERY = 32
+
+# Líneas de índice (sldId, Relationship, Override) por bloque escrito
+INDEX_BATCH = 1000
+
+FIRST_SLIDE_ID = 256
+
+
+class StreamingDeck:
+    """
+    Presentación que se escribe a disco a medida que se agregan slides
+
+    Uso:
+        with StreamingDeck("salida.pptx") as deck:
+            deck.add_title_slide("Turnero ZS", "Demo")
+            deck.add_content_slide("Servicios", ["Clínica", "Pediatría"])
+
+    El archivo se escribe en `<salida>.tmp` y se renombra al cerrar; si hay
+    una excepción dentro del with, el temporal se borra.
+    """
+
+    def __init__(self, output_path, styling=DEFAULT_STYLING, policy=DEFAULT_POLICY,
+                 chart_points=CHART_MAX_POINTS):
+        self.output_path = Path(output_path)
+        self.policy = policy
+        self.chart_points = chart_points
+        self.charts = []        # (título, puntos originales, puntos escritos)
+        self.prs = new_presentation(styling)
+        self._shared = set(self.prs.part.package.iter_parts())
+        self._tmp_path = self.output_path.with_name(self.output_path.name + ".tmp")
+        self._zf = open_zip(self._tmp_path, policy)
+        self._pending = []
+        self._slides = []       # partnames de los slides ya escritos, en orden
+        self._overrides = []    # (partname, content type) de las partes propias de slides
+        self._defaults = set()  # (extensión, content type) de esas partes
+        self._counters = {}     # último número usado por plantilla de partname
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def __len__(self):
+        return len(self._slides)
+
+    # ------------------------------------------------------------------
+    # API de slides (igual que create_presentation, sin el argumento prs)
+    # ------------------------------------------------------------------
+
+    def add_title_slide(self, title, subtitle):
+        self._flush_slide(create_presentation.add_title_slide(self.prs, title, subtitle))
+
+    def add_content_slide(self, title, content_points, video_info=None):
+        self._flush_slide(create_presentation.add_content_slide(
+            self.prs, title, content_points, video_info))
+
+    def add_two_column_slide(self, title, left_content, right_content):
+        self._flush_slide(create_presentation.add_two_column_slide(
+            self.prs, title, left_content, right_content))
+
+    def add_chart_slide(self, title, chart_type, series, categories=None,
+                        x_title=None, y_title=None, x_format=None):
+        self._flush_slide(create_presentation.add_chart_slide(
+            self.prs, title, chart_type, series, categories, x_title, y_title, x_format))
+
+    def add_spec(self, spec):
+        """Agregar un slide descrito como en slides.json (los gráficos se reducen)"""
+        if spec["kind"] == "chart":
+            spec, raw, kept = downsample_chart(spec, self.chart_points)
+            self.charts.append((spec["title"], raw, kept))
+        self._flush_slide(render_slide(self.prs, spec))
+
+    # ------------------------------------------------------------------
+
+    def _flush_slide(self, slide):
+        """Serializar el slide recién agregado y sacarlo de la presentación"""
+        part = slide.part
+        partname = PackURI(f"/ppt/slides/slide{len(self._slides) + 1}.xml")
+        part.partname = partname
+        self._flush_owned_parts(part)
+        self._pending.append(bytes_entry(partname.membername, part.blob))
+        self._pending.append(bytes_entry(partname.rels_uri.membername, part.rels.xml))
+        self._slides.append(partname)
+
+        # Es el único slide en sldIdLst: se quita junto con su relación
+        sldIdLst = self.prs.slides._sldIdLst
+        for sldId in sldIdLst.sldId_lst:
+            sldIdLst.remove(sldId)
+            self.prs.part.drop_rel(sldId.rId)
+
+        if len(self._pending) >= 2 * FLUSH_EVERY:
+            self._write_pending()
+
+    def _flush_owned_parts(self, slide_part):
+        """
+        Escribir las partes que solo usa este slide (gráfico, libro embebido)
+
+        Se sueltan junto con el slide, así que python-pptx volvería a usar
+        chart1.xml en el próximo gráfico; cada parte se renumera con un
+        contador propio por plantilla de nombre antes de serializarla.
+        """
+        stack = [slide_part]
+        while stack:
+            for rel in stack.pop().rels.values():
+                if rel.is_external or rel.target_part in self._shared:
+                    continue
+                part = rel.target_part
+                template = re.sub(r"\d+(\.\w+)$", r"%d\1", part.partname)
+                self._counters[template] = self._counters.get(template, 0) + 1
+                part.partname = PackURI(template % self._counters[template])
+                if self.policy.date_time:
+                    normalize_part(part, self.policy.date_time)
+                self._pending.append(bytes_entry(part.partname.membername, part.blob))
+                if part.rels:
+                    self._pending.append(bytes_entry(part.partname.rels_uri.membername,
+                                                     part.rels.xml))
+                ext = part.partname.ext.lower()
+                if (ext, part.content_type) in default_content_types:
+                    self._defaults.add((ext, part.content_type))
+                else:
+                    self._overrides.append((part.partname, part.content_type))
+                stack.append(part)
+
+    def _write_pending(self):
+        write_entries(self._zf, self._pending, self.policy)
+        self._pending = []
+
+    def _slide_rIds(self):
+        """rId de cada slide escrito, a continuación de las relaciones existentes"""
+        used = [int(rId[3:]) for rId in self.prs.part.rels.keys() if rId[3:].isdigit()]
+        first = max(used, default=0) + 1
+        return [f"rId{first + index}" for index in range(len(self._slides))]
+
+    def _write_index(self, name, data, marker, replacement, lines):
+        """
+        Escribir `data` insertando `lines` (generador de str) en lugar de `marker`
+
+        Con miles de slides, armar presentation.xml, su .rels y
+        [Content_Types].xml como árboles lxml cuesta más memoria que todo el
+        resto del build; se escriben como texto en bloques.
+        """
+        head, tail = data.rsplit(marker, 1)
+
+        def chunks():
+            yield head + replacement[0]
+            batch = []
+            for line in lines:
+                batch.append(line)
+                if len(batch) == INDEX_BATCH:
+                    yield "".join(batch).encode("utf-8")
+                    batch = []
+            yield "".join(batch).encode("utf-8")
+            yield replacement[1] + tail
+
+        write_chunks(self._zf, name, chunks(), self.policy)
+
+    def _content_type_lines(self):
+        for partname in self._slides:
+            yield f'<Override PartName="{partname}" ContentType="{CT.PML_SLIDE}"/>'
+        for partname, content_type in self._overrides:
+            yield f'<Override PartName="{partname}" ContentType="{content_type}"/>'
+        for ext, content_type in sorted(self._defaults):
+            yield f'<Default Extension="{ext}" ContentType="{content_type}"/>'
+
+    def close(self):
+        """Escribir presentation.xml y el resto del paquete y cerrar el archivo"""
+        self._write_pending()
+        if self.policy.date_time:
+            normalize_core_properties(self.prs, self.policy.date_time)
+
+        rIds = self._slide_rIds()
+        base_uri = self.prs.part.partname.baseURI
+        indexes = {
+            self.prs.part.partname.membername: (
+                b"<p:sldIdLst/>", (b"<p:sldIdLst>", b"</p:sldIdLst>"),
+                (f'<p:sldId id="{FIRST_SLIDE_ID + index}" r:id="{rId}"/>'
+                 for index, rId in enumerate(rIds))),
+            self.prs.part.partname.rels_uri.membername: (
+                b"</Relationships>", (b"", b"</Relationships>"),
+                (f'<Relationship Id="{rId}" Type="{RT.SLIDE}" '
+                 f'Target="{partname.relative_ref(base_uri)}"/>'
+                 for rId, partname in zip(rIds, self._slides))),
+            # Los Override de los slides van al final: el orden no es significativo
+            CONTENT_TYPES_URI.membername: (
+                b"</Types>", (b"", b"</Types>"),
+                self._content_type_lines()),
+        }
+
+        entries = []
+        for kind, name, data in package_entries(self.prs):
+            if name in indexes and self._slides:
+                self._write_index(name, data, *indexes[name])
+            else:
+                entries.append((kind, name, data))
+        write_entries(self._zf, entries, self.policy)
+        self._zf.close()
+        os.replace(self._tmp_path, self.output_path)
+
+    def abort(self):
+        """Descartar el archivo a medio escribir"""
+        self._zf.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+def stream_presentation(spec_slides, output_path, styling=DEFAULT_STYLING,
+                        policy=DEFAULT_POLICY, chart_points=CHART_MAX_POINTS):
+    """
+    Escribir los slides de una spec (lista de dicts) con StreamingDeck
+
+    Returns:
+        (slides escritos, gráficos como en StreamingDeck.charts)
+    """
+    with StreamingDeck(output_path, styling, policy, chart_points) as deck:
+        for spec in spec_slides:
+            deck.add_spec(spec)
+    return len(deck), deck.charts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from create_presentation import SPEC_PATH, STYLINGS, load_spec
+    from deck_trace import peak_rss_kb
+    from deck_writer import add_policy_arguments, policy_from_args
+
+    parser = argparse.ArgumentParser(
+        description="Generar una presentación grande escribiendo los slides en streaming")
+    parser.add_argument("--spec", default=str(SPEC_PATH), help="Spec JSON de los slides")
+    parser.add_argument("--output", required=True, help="Archivo .pptx de salida")
+    parser.add_argument("--styling", choices=STYLINGS, default=DEFAULT_STYLING,
+                        help="Formato en el slide master (master) o en cada párrafo (inline)")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Generar N slides ciclando los de la spec (para pruebas de escala)")
+    parser.add_argument("--metrics", metavar="EXPORT",
+                        help="Export CSV/JSONL de turnos para el slide de métricas")
+    parser.add_argument("--chart-points", type=int, default=CHART_MAX_POINTS,
+                        help="Puntos por serie en los gráficos (0 = sin reducir)")
+    add_policy_arguments(parser)
+    args = parser.parse_args()
+
+    slides = load_spec(args.spec)
+    if args.synthetic:
+        from styling_report import synthetic_spec
+        slides = synthetic_spec(slides, args.synthetic)["slides"]
+    if args.metrics:
+        from queue_metrics import aggregate, fill_metrics_slides
+        slides = fill_metrics_slides(slides, aggregate(args.metrics))
+
+    start = time.perf_counter()
+    count, charts = stream_presentation(slides, args.output, args.styling,
+                                        policy_from_args(args), args.chart_points)
+    elapsed = time.perf_counter() - start
+    peak_kb = peak_rss_kb()
+    print(f"[OK] Presentacion creada: {args.output}")
+    print(f"[INFO] Slides: {count} en {elapsed:.2f} s")
+    for title, raw, kept in charts:
+        print(f"[INFO] Grafico '{title}': {kept} de {raw} puntos")
+    if peak_kb is not None:
+        print(f"[INFO] Memoria maxima (RSS): {peak_kb / 1024:.0f} MB")
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Instrumentación por etapa de los builds, en JSON lines
+
+Con --trace ARCHIVO (create_presentation.py, insert_videos_pptx.py y
+turnero_deck.py build/videos) cada etapa escribe una línea JSON al
+terminar:
+
+    {"event": "phase", "name": "slides", "wall_s": 0.41, "rss_peak_kb": 81234, ...}
+    {"event": "package", "slides": 27, "media_streamed_bytes": 0,
+     "parts": {"slide.xml": {"parts": 27, "bytes": ..., "compressed": ...}, ...}}
+    {"event": "summary", "wall_s": 0.93, "phases": {...}, "spans": {...}}
+
+- phase: etapas del build (spec, slides, videos, save...) con su duración
+  y los datos que agrega cada una (slides renderizados, MB copiados...);
+  verify_videos va dentro de videos
+- package: bytes escritos por tipo de parte (nombre sin números: slide.xml,
+  media.mp4, slideLayout.xml.rels...), cantidad de slides y media copiada
+- summary: total de la corrida y los spans acumulados: armado de shapes,
+  texto, cache de slides, hash de videos y deflate del ZIP, que se llaman
+  miles de veces y por eso no tienen una línea cada uno
+
+rss_peak_kb es el pico de memoria del proceso hasta ese momento (null en
+Windows, que no tiene el módulo resource). Los spans que corren en threads
+(hash, deflate) suman el tiempo de cada thread.
+
+Con --profile ARCHIVO además se guarda un perfil de cProfile de toda la
+corrida (`python3 -m pstats ARCHIVO`).
+
+Sin --trace ni --profile todo esto es un no-op: span() solo compara una
+variable global antes de llamar a la función.
+"""
+
+import contextlib
+import json
+import sys
+import threading
+import time
+from functools import wraps
+
+# Trace activo (None = instrumentación apagada)
+_trace = None
+
+
+def peak_rss_kb():
+    """
+    Pico de RSS del proceso en KB (ru_maxrss ya está en KB en Linux), o None
+    donde no está el módulo resource (Windows)
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Trace:
+    """Destino de las líneas JSON y acumulador de phases y spans"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.start = time.perf_counter()
+        self.phases = {}         # {nombre: segundos}
+        self.spans = {}          # {nombre: [llamadas, segundos]}
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        record = {"event": event, "t_s": round(time.perf_counter() - self.start, 6),
+                  **fields, "rss_peak_kb": peak_rss_kb()}
+        with self._lock:
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.stream.flush()
+
+    def add_span(self, name, seconds):
+        with self._lock:
+            entry = self.spans.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def summary(self):
+        self.emit("summary", wall_s=round(time.perf_counter() - self.start, 6),
+                  phases={name: round(s, 6) for name, s in self.phases.items()},
+                  spans={name: {"calls": calls, "wall_s": round(s, 6)}
+                         for name, (calls, s) in self.spans.items()})
+
+
+@contextlib.contextmanager
+def phase(name, **fields):
+    """
+    Etapa del build: al salir escribe una línea "phase" con su duración
+
+    Devuelve un dict: lo que la etapa le agregue (y `fields`) va en la misma
+    línea.
+    """
+    trace = _trace
+    info = dict(fields)
+    if trace is None:
+        yield info
+        return
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        wall = time.perf_counter() - start
+        trace.phases[name] = trace.phases.get(name, 0.0) + wall
+        trace.emit("phase", name=name, wall_s=round(wall, 6), **info)
+
+
+def span(name):
+    """Decorador: acumula llamadas y tiempo de la función en el span `name`"""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _trace
+            if trace is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                trace.add_span(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def package_stats(output):
+    """{tipo de parte: {"parts", "bytes", "compressed"}} del .pptx, por tamaño comprimido"""
+    import re
+    import zipfile
+
+    parts = {}
+    with zipfile.ZipFile(output) as zf:
+        for info in zf.infolist():
+            kind = re.sub(r"\d+(?=\.)", "", info.filename.rsplit("/", 1)[-1], count=1)
+            entry = parts.setdefault(kind, {"parts": 0, "bytes": 0, "compressed": 0})
+            entry["parts"] += 1
+            entry["bytes"] += info.file_size
+            entry["compressed"] += info.compress_size
+    return dict(sorted(parts.items(), key=lambda item: -item[1]["compressed"]))
+
+
+def record_package(output, slides, streamed_bytes):
+    """Línea "package" del .pptx recién escrito (ruta o BytesIO)"""
+    if _trace is None:
+        return
+    parts = package_stats(output)
+    _trace.emit("package", output=None if hasattr(output, "read") else str(output),
+                slides=slides, media_streamed_bytes=streamed_bytes,
+                bytes=sum(entry["compressed"] for entry in parts.values()), parts=parts)
+
+
+@contextlib.contextmanager
+def tracing(path=None, profile=None):
+    """
+    Activar la instrumentación durante el bloque
+
+    Args:
+        path: Archivo de JSON lines ("-" para stderr); None para no escribirlas
+        profile: Archivo donde guardar el perfil de cProfile (opcional)
+    """
+    global _trace
+    with contextlib.ExitStack() as stack:
+        previous = _trace
+        if path is not None:
+            stream = sys.stderr if path == "-" else stack.enter_context(
+                open(path, "w", encoding="utf-8"))
+            _trace = Trace(stream)
+            _trace.emit("start", argv=sys.argv)
+            stack.callback(_trace.summary)
+        stack.callback(_restore, previous)
+        if profile is not None:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            stack.callback(profiler.dump_stats, profile)
+            stack.callback(profiler.disable)
+            profiler.enable()
+        yield _trace
+
+
+def _restore(previous):
+    global _trace
+    _trace = previous
+
+
+def add_trace_arguments(parser):
+    """Opciones --trace y --profile"""
+    parser.add_argument("--trace", metavar="JSONL",
+                        help="Escribir la instrumentación por etapa en JSON lines "
+                             "(- para stderr)")
+    parser.add_argument("--profile", metavar="PSTATS",
+                        help="Guardar un perfil de cProfile de la corrida")
+
+
+def tracing_from_args(args):
+    return tracing(args.trace, args.profile)
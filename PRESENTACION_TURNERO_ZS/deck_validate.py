@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Validación de un .pptx sin abrirlo con python-pptx ni con PowerPoint
+
+Recorre el ZIP una vez, entrada por entrada en el orden del archivo y en
+bloques, así la memoria no depende del tamaño de los videos:
+
+- ZIP: cada entrada se descomprime completa; se controlan el CRC-32, el
+  tamaño declarado y que el encabezado local coincida con el directorio
+  central (nombres duplicados, métodos de compresión no soportados)
+- XML: cada parte .xml/.rels tiene que ser XML bien formado; de las partes
+  se guardan solo los rId que usan (r:id, r:embed, r:link...)
+- [Content_Types].xml: toda parte tiene content type (Override o Default
+  por extensión), los .rels el de relaciones, y ningún Override ni Default
+  está repetido o apunta a una parte que no existe
+- relaciones: cada Target interno existe en el paquete, los Id no se
+  repiten, cada rId que usa una parte está en su .rels, cada slide tiene
+  su layout (y cada layout su master, y cada master su tema), y los videos e
+  imágenes vinculados (insert_videos_pptx.py --linked) existen junto a la
+  presentación
+
+Lo que PowerPoint "repara" al abrir (o directamente no abre) aparece como
+error; lo que solo sobra, como advertencia.
+"""
+
+import posixpath
+import time
+import zipfile
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from lxml import etree
+
+CHUNK_SIZE = 1024 * 1024
+
+CONTENT_TYPES_NAME = "[Content_Types].xml"
+ROOT_RELS_NAME = "_rels/.rels"
+
+NS_RELS = "http://schemas.openxmlformats.org/package/2006/relationships"
+NS_CT = "http://schemas.openxmlformats.org/package/2006/content-types"
+NS_R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+CT_RELS = "application/vnd.openxmlformats-package.relationships+xml"
+RT_OFFICE_DOCUMENT = NS_R + "/officeDocument"
+# Relaciones a media: el destino tiene que existir aunque sea externo
+MEDIA_RELTYPES = {NS_R + "/video", NS_R + "/image", NS_R + "/audio",
+                  "http://schemas.microsoft.com/office/2007/relationships/media"}
+# Relación que toda parte de cada tipo tiene que tener
+_CT_PML = "application/vnd.openxmlformats-officedocument.presentationml."
+REQUIRED_RELTYPES = {
+    _CT_PML + "slide+xml": NS_R + "/slideLayout",
+    _CT_PML + "slideLayout+xml": NS_R + "/slideMaster",
+    _CT_PML + "slideMaster+xml": NS_R + "/theme",
+}
+
+_R_ATTR_PREFIX = f"{{{NS_R}}}"
+
+
+@dataclass
+class Issue:
+    level: str       # "error" o "warning"
+    part: str        # entrada del ZIP ("" para el paquete)
+    message: str
+
+
+@dataclass
+class PackageReport:
+    path: str
+    entries: int = 0
+    size: int = 0            # bytes del .pptx
+    bytes_read: int = 0      # bytes descomprimidos
+    external: int = 0        # relaciones externas
+    elapsed: float = 0.0
+    issues: list = field(default_factory=list)
+
+    def error(self, part, message):
+        self.issues.append(Issue("error", part, message))
+
+    def warning(self, part, message):
+        self.issues.append(Issue("warning", part, message))
+
+    def by_level(self, level):
+        return [issue for issue in self.issues if issue.level == level]
+
+    @property
+    def ok(self):
+        return not self.by_level("error")
+
+
+def _source_part(rels_name):
+    """ppt/slides/_rels/slide3.xml.rels → ppt/slides/slide3.xml (_rels/.rels → "")"""
+    directory, filename = posixpath.split(rels_name)
+    return posixpath.join(posixpath.dirname(directory), filename[:-len(".rels")])
+
+
+def _resolve(source, target):
+    """Target interno de una relación → nombre de entrada del ZIP"""
+    target = unquote(target)
+    if target.startswith("/"):
+        return posixpath.normpath(target).lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), target))
+
+
+def _external_path(target, deck_dir):
+    """Ruta local de un Target externo, o None si es una URL (http, mailto...)"""
+    url = urlparse(target)
+    if url.scheme == "file":
+        path = unquote(url.path)
+    elif len(url.scheme) > 1:
+        return None
+    else:
+        path = unquote(target)      # relativa, o con letra de unidad (C:\...)
+    path = Path(path.replace("\\", "/"))
+    return path if path.is_absolute() else deck_dir / path
+
+
+def _read_entry(zf, info, report):
+    """
+    Descomprimir `info` completa en bloques
+
+    Returns:
+        La raíz XML si la entrada es .xml/.rels y está bien formada, si no None
+    """
+    parser = None
+    if info.filename.endswith((".xml", ".rels")):
+        parser = etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=True)
+    size = 0
+    try:
+        with zf.open(info) as f:
+            while chunk := f.read(CHUNK_SIZE):
+                size += len(chunk)
+                if parser is not None:
+                    parser.feed(chunk)
+    except (zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError,
+            RuntimeError) as e:
+        report.error(info.filename, f"no se puede leer: {e}")
+        return None
+    finally:
+        report.bytes_read += size
+    if size != info.file_size:
+        report.error(info.filename, f"tamaño {size}, el directorio declara {info.file_size}")
+        return None
+    if parser is None:
+        return None
+    try:
+        return parser.close()
+    except etree.XMLSyntaxError as e:
+        report.error(info.filename, f"XML inválido: {e}")
+        return None
+
+
+def _check_content_types(root, parts, report):
+    """
+    Cruzar [Content_Types].xml con las partes del ZIP ({minúsculas: nombre})
+
+    Returns:
+        {nombre de parte: content type}
+    """
+    defaults, overrides = {}, {}
+    for element in root:
+        if element.tag == f"{{{NS_CT}}}Default":
+            ext = element.get("Extension", "").lower()
+            if ext in defaults:
+                report.error(CONTENT_TYPES_NAME, f"Default repetido para .{ext}")
+            defaults[ext] = element.get("ContentType")
+        elif element.tag == f"{{{NS_CT}}}Override":
+            name = element.get("PartName", "").lstrip("/").lower()
+            if name in overrides:
+                report.error(CONTENT_TYPES_NAME, f"Override repetido para /{name}")
+            overrides[name] = element.get("ContentType")
+
+    content_types = {}
+    for key, name in parts.items():
+        if name == CONTENT_TYPES_NAME:
+            continue
+        content_type = content_types[name] = (overrides.get(key) or
+                                               defaults.get(key.rsplit(".", 1)[-1]))
+        if content_type is None:
+            report.error(name, "sin content type en [Content_Types].xml")
+        elif name.endswith(".rels") and content_type != CT_RELS:
+            report.error(name, f"content type {content_type} en una parte de relaciones")
+    for key in overrides.keys() - parts.keys():
+        report.error(CONTENT_TYPES_NAME, f"Override para /{key}, que no está en el paquete")
+    return content_types
+
+
+def _check_rels(rels_name, root, parts, used_ids, deck_dir, report):
+    """Resolver las relaciones de un .rels; devuelve sus tipos"""
+    source = _source_part(rels_name)
+    if source and source.lower() not in parts:
+        report.warning(rels_name, "relaciones de una parte que no está en el paquete")
+    ids, reltypes = set(), set()
+    for rel in root.iter(f"{{{NS_RELS}}}Relationship"):
+        rId, reltype, target = rel.get("Id"), rel.get("Type", ""), rel.get("Target")
+        if rId in ids:
+            report.error(rels_name, f"Id {rId} repetido")
+        ids.add(rId)
+        reltypes.add(reltype)
+        if not target:
+            report.error(rels_name, f"{rId} sin Target")
+            continue
+        kind = reltype.rsplit("/", 1)[-1]
+        if rel.get("TargetMode") == "External":
+            report.external += 1
+            path = _external_path(target, deck_dir)
+            if reltype in MEDIA_RELTYPES and path is not None and not path.is_file():
+                report.error(rels_name, f"{rId} ({kind}) vincula {target}, que no existe "
+                                        f"junto a la presentación")
+            continue
+        resolved = _resolve(source, target)
+        if resolved.lower() not in parts:
+            report.error(rels_name, f"{rId} ({kind}) apunta a /{resolved}, "
+                                    f"que no está en el paquete")
+    for rId in sorted(used_ids.get(source, set()) - ids):
+        report.error(source, f"usa {rId}, que no está en {rels_name}")
+    return reltypes
+
+
+def validate_package(path):
+    """
+    Validar un .pptx (o cualquier paquete OPC) leyéndolo una sola vez
+
+    Returns:
+        PackageReport
+    """
+    path = Path(path)
+    report = PackageReport(str(path), size=path.stat().st_size)
+    start = time.perf_counter()
+    try:
+        zf = zipfile.ZipFile(path)
+    except (zipfile.BadZipFile, OSError) as e:
+        report.error("", f"no es un ZIP válido: {e}")
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    with zf:
+        infos = [info for info in zf.infolist() if not info.is_dir()]
+        report.entries = len(infos)
+        parts = {}
+        for info in infos:
+            key = info.filename.lower()
+            if key in parts:
+                report.error(info.filename, "nombre repetido en el ZIP")
+            parts[key] = info.filename
+
+        content_types = None
+        rels = {}            # {.rels: raíz}
+        used_ids = {}        # {parte: rId que usa}
+        # En el orden del archivo: lectura secuencial
+        for info in sorted(infos, key=lambda info: info.header_offset):
+            if info.flag_bits & 0x1:
+                report.error(info.filename, "entrada cifrada")
+                continue
+            root = _read_entry(zf, info, report)
+            if root is None:
+                continue
+            if info.filename == CONTENT_TYPES_NAME:
+                content_types = root
+            elif info.filename.endswith(".rels"):
+                rels[info.filename] = root
+            else:
+                # r:id="" es válido (p. ej. el hlinkClick de los videos)
+                ids = {value for element in root.iter() for name, value in element.attrib.items()
+                       if value and name.startswith(_R_ATTR_PREFIX)}
+                if ids:
+                    used_ids[info.filename] = ids
+
+    if content_types is None:
+        report.error("", "falta [Content_Types].xml")
+        content_types = {}
+    else:
+        content_types = _check_content_types(content_types, parts, report)
+
+    if ROOT_RELS_NAME not in rels:
+        report.error("", "falta _rels/.rels")
+    elif not any(rel.get("Type") == RT_OFFICE_DOCUMENT
+                 for rel in rels[ROOT_RELS_NAME].iter(f"{{{NS_RELS}}}Relationship")):
+        report.error(ROOT_RELS_NAME, "sin relación officeDocument (presentation.xml)")
+
+    reltypes = {_source_part(rels_name): _check_rels(rels_name, root, parts, used_ids,
+                                                     path.parent, report)
+                for rels_name, root in rels.items()}
+    for part, ids in used_ids.items():
+        if part not in reltypes:
+            report.error(part, f"usa {', '.join(sorted(ids))} pero no tiene .rels")
+    for part, content_type in content_types.items():
+        required = REQUIRED_RELTYPES.get(content_type)
+        if required and required not in reltypes.get(part, ()):
+            report.error(part, f"sin relación {required.rsplit('/', 1)[-1]}")
+
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def print_report(report):
+    errors, warnings = report.by_level("error"), report.by_level("warning")
+    mb = report.size / (1024 * 1024)
+    speed = mb / report.elapsed if report.elapsed else 0
+    state = "OK" if report.ok else "ERROR"
+    print(f"[{state}] {report.path}: {report.entries} partes, {mb:.1f} MB en "
+          f"{report.elapsed:.2f} s ({speed:.0f} MB/s), {report.external} relaciones externas, "
+          f"{len(errors)} errores, {len(warnings)} advertencias")
+    for issue in errors + warnings:
+        label = "ERROR" if issue.level == "error" else "WARN"
+        print(f"  [{label}] {issue.part or '(paquete)'}: {issue.message}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validar presentaciones .pptx sin abrirlas")
+    parser.add_argument("decks", nargs="+", help="Archivos .pptx a validar")
+    args = parser.parse_args()
+
+    reports = [validate_package(deck) for deck in args.decks]
+    for report in reports:
+        print_report(report)
+    if not all(report.ok for report in reports):
+        raise SystemExit(1)
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Regenerar la presentación cada vez que cambian sus inputs (watch)
+
+Vigila la spec de slides (slides.json), el export de métricas si se pasa
+--metrics, los módulos del generador y la carpeta de videos. Usa inotify(7)
+vía ctypes cuando está disponible (Linux) y, si no, compara tamaño y mtime
+de los archivos cada POLL_INTERVAL_S.
+
+Una ráfaga de cambios (un editor que guarda en varios pasos, una copia de
+varios videos) se junta en un solo build: se espera DEBOUNCE_S sin cambios
+relevantes antes de regenerar. Qué se regenera depende de qué cambió:
+
+- solo la spec: se renderizan los slides que cambiaron y deck_patch.patch_slides
+  reemplaza sus partes en el .pptx existente; los videos y el resto de las
+  entradas se copian sin recomprimir. Si cambió la cantidad de slides, un
+  gráfico o algo que el .pptx no tiene (una imagen, otro layout) se hace el
+  build completo
+- métricas: build_deck completo; el cache de slides hace que solo se
+  rendericen los slides que cambiaron y el manifest de videos evita releer
+  los clips
+- solo videos: patch_videos sobre el .pptx existente; se reemplaza la parte
+  de media de los videos regrabados y se insertan los que faltaban, el
+  resto de las entradas se copia sin recomprimir. Si un video desapareció o
+  quedó corrupto se hace el build completo (el slide vuelve a placeholder)
+- módulos del generador: el proceso se reinicia (os.execv) para cargar el
+  código nuevo
+
+La salida siempre se escribe en un temporal y se renombra, así un visor que
+tenga abierta la presentación nunca lee un archivo a medio escribir.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+from lxml import etree
+
+from create_presentation import (CACHE_DIR, CHART_MAX_POINTS, DEFAULT_STYLING, OUTPUT_PATH,
+                                 SPEC_PATH, build_presentation, load_spec)
+from deck_patch import NotPatchable, patch_slides, patch_videos
+from deck_pipeline import build_deck
+from deck_writer import DEFAULT_POLICY
+import video_map
+from video_manifest import verify_videos
+
+DEBOUNCE_S = 0.5
+POLL_INTERVAL_S = 1.0
+
+GENERATOR_DIR = Path(__file__).parent
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE)
+
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class InotifyWatcher:
+    """Cambios en archivos de un conjunto de carpetas, con inotify vía ctypes"""
+
+    def __init__(self, directories):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self._directories = {}
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                os.close(self.fd)
+                raise OSError(errno, f"inotify_add_watch {directory}")
+            self._directories[wd] = Path(directory)
+
+    def wait(self, timeout):
+        """
+        Rutas con cambios en los próximos `timeout` segundos (None = sin límite)
+
+        Si la cola del kernel se desbordó se devuelven las carpetas vigiladas:
+        hay que suponer que cambió cualquier archivo de ellas.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        paths = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                paths.update(self._directories.values())
+            elif wd in self._directories and name:
+                paths.add(self._directories[wd] / os.fsdecode(name))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Misma interfaz que InotifyWatcher, comparando tamaño y mtime por intervalos"""
+
+    def __init__(self, directories, interval=POLL_INTERVAL_S):
+        self.directories = [Path(d) for d in directories]
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for directory in self.directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            st = entry.stat()
+                            snapshot[directory / entry.name] = (st.st_size, st.st_mtime_ns)
+            except FileNotFoundError:
+                pass
+        return snapshot
+
+    def wait(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = self.interval if deadline is None else deadline - time.monotonic()
+            if remaining <= 0:
+                return set()
+            time.sleep(min(self.interval, remaining))
+            snapshot = self._scan()
+            changed = {path for path in self._snapshot.keys() | snapshot.keys()
+                       if self._snapshot.get(path) != snapshot.get(path)}
+            self._snapshot = snapshot
+            if changed:
+                return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(directories, poll=False):
+    """InotifyWatcher si el sistema lo soporta (y no se pidió `poll`), si no PollingWatcher"""
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directories)
+
+
+class DeckInputs:
+    """Qué archivos vigilados afectan a la presentación y de qué forma"""
+
+    def __init__(self, spec_path, videos_dir, metrics_path=None, video_names=None):
+        self.spec_path = Path(spec_path).resolve()
+        self.metrics_path = Path(metrics_path).resolve() if metrics_path else None
+        self.videos_dir = Path(videos_dir).resolve() if videos_dir else None
+        if video_names is None:
+            video_names = video_map.video_names(video_map.load_videos(self.spec_path))
+        self.video_names = set(video_names)
+
+    @property
+    def directories(self):
+        directories = {self.spec_path.parent, GENERATOR_DIR.resolve()}
+        if self.metrics_path:
+            directories.add(self.metrics_path.parent)
+        if self.videos_dir:
+            directories.add(self.videos_dir)
+        return sorted(directories)
+
+    def classify(self, paths):
+        """{("spec"|"code"|"video", nombre)} de los cambios relevantes en `paths`"""
+        changes = set()
+        for path in paths:
+            path = path.resolve()
+            if path in (self.spec_path, self.metrics_path):
+                changes.add(("spec", path.name))
+            elif path == self.videos_dir:
+                # Desborde de la cola: pueden haber cambiado todos
+                changes.update(("video", name) for name in self.video_names)
+            elif path == self.spec_path.parent:
+                changes.add(("spec", self.spec_path.name))
+            elif self.videos_dir and path.parent == self.videos_dir:
+                if path.name in self.video_names:
+                    changes.add(("video", path.name))
+            elif path.parent == GENERATOR_DIR.resolve() and path.suffix == ".py":
+                changes.add(("code", path.name))
+        return changes
+
+
+def next_changes(watcher, inputs, debounce=DEBOUNCE_S):
+    """
+    Esperar un cambio relevante y juntar los que sigan llegando hasta que
+    pasen `debounce` segundos sin ninguno
+    """
+    changes = set()
+    while not changes:
+        changes = inputs.classify(watcher.wait(None))
+    quiet_until = time.monotonic() + debounce
+    while (remaining := quiet_until - time.monotonic()) > 0:
+        more = inputs.classify(watcher.wait(remaining))
+        if more:
+            changes |= more
+            quiet_until = time.monotonic() + debounce
+    return changes
+
+
+def _load_slides(spec_path, metrics):
+    """Slides de la spec, con los números de `metrics` si hay"""
+    slides = load_spec(spec_path)
+    if metrics is not None:
+        from queue_metrics import fill_metrics_slides
+        slides = fill_metrics_slides(slides, metrics)
+    return slides
+
+
+def patch_spec(output_path, inputs, options, state):
+    """
+    Aplicar un cambio de la spec reescribiendo solo los slides que cambiaron
+
+    Compara la spec con la del último build (state["slides"]), renderiza los
+    slides distintos (con el cache de slides) y los reemplaza a nivel ZIP
+    con deck_patch.patch_slides; la media se copia sin tocar.
+
+    Returns:
+        Línea de resumen, o None si hace falta el build completo (slides
+        agregados o quitados, gráficos, videos cambiados en la spec, un
+        layout que el .pptx no tiene)
+    """
+    if state.get("slides") is None or not Path(output_path).exists():
+        return None
+    slides = _load_slides(inputs.spec_path, state["metrics"])
+    previous = state["slides"]
+    if len(slides) != len(previous):
+        return None
+    changed = [index for index, (old, new) in enumerate(zip(previous, slides)) if old != new]
+    if any(slides[index]["kind"] == "chart" or previous[index]["kind"] == "chart"
+           or slides[index].get("video") != previous[index].get("video")
+           for index in changed):
+        return None
+    if not changed:
+        return "sin cambios en los slides"
+
+    prs, stats = build_presentation(cache_dir=options["cache_dir"], styling=options["styling"],
+                                    slides=[slides[index] for index in changed])
+    rendered = {index: (etree.tostring(slide._element, encoding="UTF-8", standalone=True),
+                        slide.slide_layout.part.partname.lstrip("/"))
+                for index, slide in zip(changed, prs.slides)}
+    try:
+        result = patch_slides(output_path, rendered, policy=options["policy"])
+    except NotPatchable:
+        return None
+    state["slides"] = slides
+    return (f"{result['replaced']} slides reescritos ({stats['rendered']} renderizados, "
+            f"{stats['reused']} del cache), {result['copied_bytes'] / 1e6:.1f} MB copiados "
+            f"sin cambios")
+
+
+def rebuild(changes, output_path, inputs, options, state):
+    """
+    Regenerar lo que afectan `changes`; devuelve una línea de resumen
+
+    options: cache_dir, styling, chart_points, policy y metrics (función que
+    devuelve QueueMetrics o None). state guarda los slides y las métricas
+    del último build, para saber qué slides cambiaron.
+    """
+    videos = {name for kind, name in changes if kind == "video"}
+    specs = {name for kind, name in changes if kind == "spec"}
+    metrics_changed = inputs.metrics_path is not None and inputs.metrics_path.name in specs
+    if specs and not videos and not metrics_changed:
+        summary = patch_spec(output_path, inputs, options, state)
+        if summary is not None:
+            return summary
+
+    if not specs and Path(output_path).exists():
+        report = verify_videos(inputs.videos_dir, inputs.video_names)
+        gone = [name for name in videos if report.videos[name].info is None]
+        if not gone:
+            refresh = [name for name in videos if report.videos[name].status == "changed"]
+            videos = video_map.spec_videos(state["slides"]) if state["slides"] else None
+            stats = patch_videos(output_path, inputs.videos_dir, policy=options["policy"],
+                                 refresh=refresh, videos=videos)
+            return (f"videos: {stats['refreshed']} reemplazados, {stats['inserted']} "
+                    f"insertados, {stats['copied_bytes'] / 1e6:.1f} MB copiados sin cambios")
+
+    metrics = options["metrics"]()
+    slides = _load_slides(inputs.spec_path, metrics)
+    result = build_deck(output_path, videos_dir=inputs.videos_dir,
+                        cache_dir=options["cache_dir"], styling=options["styling"],
+                        chart_points=options["chart_points"], policy=options["policy"],
+                        slides=slides)
+    state.update(slides=slides, metrics=metrics)
+    inputs.video_names = set(video_map.video_names(video_map.spec_videos(slides)))
+    if result.cached:
+        return "sin cambios"
+    summary = f"{result.rendered} slides renderizados, {result.reused} del cache"
+    if result.videos is not None:
+        summary += f", videos {result.videos['inserted']} (faltan {result.videos['missing']})"
+    return summary
+
+
+def watch(output_path, spec_path=SPEC_PATH, videos_dir="videos_demo", metrics_path=None,
+          cache_dir=CACHE_DIR, styling=DEFAULT_STYLING, chart_points=CHART_MAX_POINTS,
+          policy=DEFAULT_POLICY, debounce=DEBOUNCE_S, poll=False):
+    """Build inicial y luego un rebuild por cada ráfaga de cambios (hasta Ctrl+C)"""
+    def metrics():
+        if metrics_path is None:
+            return None
+        from queue_metrics import aggregate
+        return aggregate(metrics_path)
+
+    inputs = DeckInputs(spec_path, videos_dir, metrics_path)
+    options = {"cache_dir": cache_dir, "styling": styling, "chart_points": chart_points,
+               "policy": policy, "metrics": metrics}
+    state = {"slides": None, "metrics": None}
+    watcher = open_watcher(inputs.directories, poll)
+    mode = "inotify" if isinstance(watcher, InotifyWatcher) else "polling"
+    print(f"👀 Vigilando {', '.join(str(d) for d in inputs.directories)} ({mode})")
+
+    changes = {("spec", inputs.spec_path.name)}
+    try:
+        while True:
+            if any(kind == "code" for kind, _ in changes):
+                names = sorted(name for kind, name in changes if kind == "code")
+                print(f"🔁 Cambió el generador ({', '.join(names)}): reiniciando")
+                watcher.close()
+                os.execv(sys.executable, [sys.executable, *sys.argv])
+
+            start = time.perf_counter()
+            try:
+                summary = rebuild(changes, output_path, inputs, options, state)
+                print(f"[{time.strftime('%H:%M:%S')}] ✅ {output_path}: {summary} "
+                      f"({time.perf_counter() - start:.2f} s)")
+            except Exception as e:
+                # Una spec a medio editar no corta el watch: se espera el próximo cambio
+                print(f"[{time.strftime('%H:%M:%S')}] ❌ {type(e).__name__}: {e}")
+            changes = next_changes(watcher, inputs, debounce)
+            names = sorted({name for _, name in changes})
+            print(f"[{time.strftime('%H:%M:%S')}] Cambios: {', '.join(names)}")
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from create_presentation import STYLINGS
+    from deck_writer import add_policy_arguments, policy_from_args
+
+    parser = argparse.ArgumentParser(
+        description="Regenerar la presentación al cambiar la spec o los videos")
+    parser.add_argument("--spec", default=str(SPEC_PATH), help="Spec JSON de los slides")
+    # Con videos, como insert_videos_pptx.py: no pisa la presentación sin videos
+    parser.add_argument("--output", default=OUTPUT_PATH.replace(".pptx", "_con_videos.pptx"),
+                        help="Archivo .pptx de salida")
+    parser.add_argument("--videos-dir", default="videos_demo", help="Carpeta de videos")
+    parser.add_argument("--metrics", metavar="EXPORT",
+                        help="Export CSV/JSONL de turnos para el slide de métricas")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Renderizar todos los slides sin usar el cache")
+    parser.add_argument("--styling", choices=STYLINGS, default=DEFAULT_STYLING,
+                        help="Formato en el slide master (master) o en cada párrafo (inline)")
+    parser.add_argument("--chart-points", type=int, default=CHART_MAX_POINTS,
+                        help="Puntos por serie en los gráficos (0 = sin reducir)")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_S,
+                        help="Segundos sin cambios antes de regenerar (por defecto 0.5)")
+    parser.add_argument("--poll", action="store_true",
+                        help="Comparar archivos por intervalos en lugar de usar inotify")
+    add_policy_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        watch(args.output, args.spec, args.videos_dir, args.metrics,
+              None if args.no_cache else CACHE_DIR, args.styling, args.chart_points,
+              policy_from_args(args), args.debounce, args.poll)
+    except KeyboardInterrupt:
+        print()
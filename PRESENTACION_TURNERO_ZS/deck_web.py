@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Exportar la presentación como bundle web estático para la pantalla pública
+
+Las pantallas de sala ya corren la pantalla pública de la app; bajar un
+.pptx de cientos de MB a cada una no es viable. Este export toma la misma
+spec que create_presentation.py (con métricas y gráficos si se pasa
+--metrics) y los videos que nombra cada slide, y escribe bajo public/ (el
+de la app, en la raíz del repo) un bundle que la app sirve como archivos
+estáticos:
+
+    public/demo/index.json          índice de slides (título, tipo, fragmento, videos)
+    public/demo/slides/007.html     un fragmento HTML por slide
+    public/demo/videos/<video>.<hash>.mp4
+
+- Las pantallas piden index.json y después cada fragmento cuando lo van a
+  mostrar; los gráficos van como SVG dentro del fragmento.
+- Los videos se copian tal cual (un archivo por video, sin empaquetar) para
+  que el servidor los entregue con HTTP range requests. Los que no son
+  faststart (moov al final) se reordenan con mp4_faststart al copiarlos:
+  con el moov adelante el <video> arranca con los primeros KB.
+- El nombre de cada video lleva el hash de su contenido: se puede servir
+  con cache inmutable, y los videos que no cambiaron no se vuelven a copiar.
+
+index.json se escribe al final y de una vez: una pantalla nunca lee un
+índice que apunte a fragmentos o videos que todavía no están.
+"""
+
+import html
+import json
+import os
+import shutil
+from pathlib import Path
+
+import create_presentation
+from create_presentation import CHART_MAX_POINTS, SPEC_PATH, load_spec
+from deck_charts import downsample_chart
+from video_map import slide_videos, spec_videos, video_names
+from mp4_faststart import make_faststart
+from mp4_probe import Mp4Error, probe
+from video_manifest import verify_videos
+
+WEB_DIR = Path(__file__).resolve().parents[1] / "public" / "demo"
+INDEX_NAME = "index.json"
+INDEX_VERSION = 2
+
+# Lienzo de los gráficos SVG
+CHART_WIDTH, CHART_HEIGHT, CHART_MARGIN = 860, 480, 48
+
+
+def _lines(text):
+    return "<br>".join(html.escape(line) for line in text.split("\n"))
+
+
+def _bullets(points):
+    items = "".join(f"\n    <li>{html.escape(point)}</li>" for point in points if point)
+    return f"<ul>{items}\n  </ul>"
+
+
+def _video_tag(video, base_url):
+    prefix = f"{base_url}/" if base_url else ""
+    return (f'<video src="{html.escape(prefix + video["src"])}" '
+            f'width="{video["width"]}" height="{video["height"]}" '
+            f'preload="metadata" playsinline muted controls></video>')
+
+
+def chart_svg(spec):
+    """
+    SVG del gráfico de una spec "chart" (línea XY o barras agrupadas)
+
+    Una serie sin puntos (p. ej. un export sin turnos en el período) deja
+    el gráfico con solo los ejes.
+    """
+    colors = ["#" + c for c in create_presentation._palette()]
+    series_colors = [colors[0], colors[2], colors[1]]
+    left, top = CHART_MARGIN, CHART_MARGIN // 2
+    width, height = CHART_WIDTH - 2 * CHART_MARGIN, CHART_HEIGHT - 2 * CHART_MARGIN
+    shapes = []
+
+    if spec.get("chart", "line") == "line":
+        xs = [x for series in spec["series"] for x in series["x"]]
+        ys = [y for series in spec["series"] for y in series["y"]]
+        x_min = min(xs, default=0)
+        x_span = (max(xs, default=0) - x_min) or 1
+        y_max = max(max(ys, default=0), 1)
+        for n, series in enumerate(spec["series"]):
+            points = " ".join(
+                f"{left + (x - x_min) / x_span * width:.1f},"
+                f"{top + height - y / y_max * height:.1f}"
+                for x, y in zip(series["x"], series["y"]))
+            shapes.append(f'<polyline fill="none" stroke="{series_colors[n % 3]}" '
+                          f'stroke-width="2" points="{points}"/>')
+    else:
+        categories = spec["categories"]
+        values = [value for s in spec["series"] for value in s["values"] if value is not None]
+        y_max = max(max(values, default=0), 1)
+        group = width / max(len(categories), 1)
+        bar = group * 0.8 / max(len(spec["series"]), 1)
+        for i, category in enumerate(categories):
+            for n, series in enumerate(spec["series"]):
+                value = series["values"][i] or 0
+                bar_height = value / y_max * height
+                x = left + i * group + group * 0.1 + n * bar
+                shapes.append(f'<rect x="{x:.1f}" y="{top + height - bar_height:.1f}" '
+                              f'width="{bar:.1f}" height="{bar_height:.1f}" '
+                              f'fill="{series_colors[n % 3]}"/>')
+            shapes.append(f'<text x="{left + (i + 0.5) * group:.1f}" '
+                          f'y="{top + height + 18}" text-anchor="middle" font-size="12">'
+                          f'{html.escape(category)}</text>')
+
+    shapes.append(f'<line x1="{left}" y1="{top + height}" x2="{left + width}" '
+                  f'y2="{top + height}" stroke="#{create_presentation._palette()[3]}"/>')
+    shapes.append(f'<text x="{left - 6}" y="{top + 4}" text-anchor="end" font-size="12">'
+                  f'{y_max:g}</text>')
+    if spec.get("y_title"):
+        shapes.append(f'<text x="{left}" y="{top - 8}" font-size="12">'
+                      f'{html.escape(spec["y_title"])}</text>')
+    legend = " · ".join(html.escape(series["name"]) for series in spec["series"])
+    shapes.append(f'<text x="{left + width}" y="{top - 8}" text-anchor="end" '
+                  f'font-size="12">{legend}</text>')
+    body = "\n    ".join(shapes)
+    return (f'<svg viewBox="0 0 {CHART_WIDTH} {CHART_HEIGHT}" role="img" '
+            f'aria-label="{html.escape(spec["title"])}">\n    {body}\n  </svg>')
+
+
+def slide_fragment(index, spec, videos=(), base_url=""):
+    """Fragmento HTML de un slide de la spec, con sus videos (entradas de index.json)"""
+    kind = spec["kind"]
+    if kind == "title":
+        body = (f"<h1>{_lines(spec['title'])}</h1>\n"
+                f"  <p>{_lines(spec['subtitle'])}</p>")
+    elif kind == "content":
+        body = f"<h2>{html.escape(spec['title'])}</h2>\n  {_bullets(spec['points'])}"
+    elif kind == "two_column":
+        body = (f"<h2>{html.escape(spec['title'])}</h2>\n"
+                f'  <div class="columns">\n  {_bullets(spec["left"])}\n'
+                f'  {_bullets(spec["right"])}\n  </div>')
+    elif kind == "chart":
+        body = (f"<h2>{html.escape(spec['title'])}</h2>\n"
+                f'  <figure class="chart">\n  {chart_svg(spec)}\n  </figure>')
+    else:
+        raise ValueError(f"Tipo de slide desconocido: {kind!r}")
+    for video in videos:
+        body += "\n  " + _video_tag(video, base_url)
+    kind_class = kind.replace("_", "-")
+    return (f'<section class="slide slide-{kind_class}" data-index="{index}">\n'
+            f"  {body}\n</section>\n")
+
+
+def _write_if_changed(path, data):
+    """Escribir `data` (bytes) salvo que el archivo ya tenga ese contenido"""
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def _export_video(status, target, stats):
+    """
+    Copiar (y pasar a faststart si hace falta) un video verificado
+
+    Se escribe en un temporal y se renombra: si la copia se corta no queda
+    un video a medias con el nombre final (que la próxima exportación daría
+    por copiado).
+    """
+    if target.exists():
+        stats["videos_kept"] += 1
+        return status.info.faststart or probe(target).faststart
+    tmp_path = target.with_name(target.name + ".tmp")
+    try:
+        if status.info.faststart:
+            shutil.copyfile(status.info.path, tmp_path)
+            faststart = True
+            stats["videos_copied"] += 1
+        else:
+            try:
+                make_faststart(status.info.path, tmp_path)
+                faststart = True
+                stats["videos_relocated"] += 1
+            except Mp4Error as e:
+                print(f"⚠️  {status.name}: no se pudo pasar a faststart ({e}); se copia tal cual")
+                shutil.copyfile(status.info.path, tmp_path)
+                faststart = False
+                stats["videos_copied"] += 1
+        os.replace(tmp_path, target)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return faststart
+
+
+def export_web(output_dir=WEB_DIR, spec_path=SPEC_PATH, videos_dir="videos_demo",
+               metrics=None, chart_points=CHART_MAX_POINTS, videos=None, base_url=None):
+    """
+    Escribir el bundle web en `output_dir`
+
+    Args:
+        output_dir: Carpeta del bundle (por defecto public/demo)
+        spec_path: Spec JSON de los slides
+        videos_dir: Carpeta de videos; si es None los slides van sin video
+        metrics: QueueMetrics para completar métricas y agregar los gráficos
+        chart_points: Puntos por serie en los gráficos (0 = sin reducir)
+        videos: Mapa índice de slide → video o lista de videos (por defecto
+            el campo "video" de cada slide de la spec, como en el .pptx)
+        base_url: URL del bundle en la app (por defecto, la ruta de
+            output_dir debajo de public/, p. ej. /demo)
+
+    Returns:
+        dict con slides, fragments (reescritos), videos, videos_copied,
+        videos_relocated, videos_kept, missing, removed y bytes
+    """
+    output_dir = Path(output_dir)
+    if base_url is None:
+        parts = output_dir.resolve().parts
+        base_url = ("/" + "/".join(parts[parts.index("public") + 1:])
+                    if "public" in parts else "")
+    base_url = base_url.rstrip("/")
+    (output_dir / "slides").mkdir(parents=True, exist_ok=True)
+    (output_dir / "videos").mkdir(parents=True, exist_ok=True)
+
+    slides = load_spec(spec_path)
+    if metrics is not None:
+        from queue_metrics import fill_metrics_slides
+        slides = fill_metrics_slides(slides, metrics)
+    if videos is None:
+        videos = spec_videos(slides)
+
+    stats = {"slides": len(slides), "fragments": 0, "videos": 0, "videos_copied": 0,
+             "videos_relocated": 0, "videos_kept": 0, "missing": 0, "removed": 0,
+             "bytes": 0}
+    report = verify_videos(videos_dir, video_names(videos)) if videos_dir else None
+
+    exported = {}
+    for name in video_names(videos):
+        if report is None or name in exported:
+            continue
+        status = report.videos[name]
+        if status.info is None:
+            continue
+        target = (output_dir / "videos" /
+                  f"{Path(name).stem}.{status.digest.sha1[:10]}{Path(name).suffix.lower()}")
+        faststart = _export_video(status, target, stats)
+        info = status.info
+        exported[name] = {"src": f"videos/{target.name}", "type": "video/mp4",
+                          "bytes": target.stat().st_size, "duration": round(info.duration, 3),
+                          "width": info.width, "height": info.height, "faststart": faststart}
+        stats["bytes"] += target.stat().st_size
+
+    slide_names = dict(slide_videos(videos))
+    entries = []
+    for index, spec in enumerate(slides):
+        if spec["kind"] == "chart":
+            spec, _, _ = downsample_chart(spec, chart_points)
+        names = slide_names.get(index, [])
+        shown = [exported[name] for name in names if name in exported]
+        missing = [name for name in names if name not in exported]
+        stats["missing"] += len(missing)
+        fragment = f"slides/{index:03d}.html"
+        data = slide_fragment(index, spec, shown, base_url).encode("utf-8")
+        stats["fragments"] += _write_if_changed(output_dir / fragment, data)
+        stats["bytes"] += len(data)
+        entries.append({"index": index, "kind": spec["kind"],
+                        "title": spec["title"].replace("\n", " "), "html": fragment,
+                        "videos": shown, "missing_videos": missing})
+    stats["videos"] = len(exported)
+
+    index_data = json.dumps({"version": INDEX_VERSION, "base_url": base_url,
+                             "slides": entries}, ensure_ascii=False, indent=1)
+    _write_if_changed(output_dir / INDEX_NAME, index_data.encode("utf-8"))
+
+    # Lo que ya no figura en el índice (videos reemplazados, slides que sobran)
+    keep = {output_dir / entry["html"] for entry in entries}
+    keep |= {output_dir / video["src"] for video in exported.values()}
+    for folder in ("slides", "videos"):
+        for path in (output_dir / folder).iterdir():
+            if path not in keep:
+                path.unlink()
+                stats["removed"] += 1
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Exportar la presentación como bundle web para la pantalla pública")
+    parser.add_argument("--output-dir", default=str(WEB_DIR),
+                        help="Carpeta del bundle (por defecto public/demo)")
+    parser.add_argument("--spec", default=str(SPEC_PATH), help="Spec JSON de los slides")
+    parser.add_argument("--videos-dir", default="videos_demo", help="Carpeta de videos")
+    parser.add_argument("--metrics", metavar="EXPORT",
+                        help="Export CSV/JSONL de turnos para el slide de métricas")
+    parser.add_argument("--chart-points", type=int, default=CHART_MAX_POINTS,
+                        help="Puntos por serie en los gráficos (0 = sin reducir)")
+    parser.add_argument("--base-url",
+                        help="URL del bundle en la app (por defecto, la ruta bajo public/)")
+    args = parser.parse_args()
+
+    metrics = None
+    if args.metrics:
+        from queue_metrics import aggregate
+        metrics = aggregate(args.metrics)
+
+    stats = export_web(args.output_dir, args.spec, args.videos_dir or None, metrics,
+                       args.chart_points, base_url=args.base_url)
+    print(f"[OK] Bundle web en {args.output_dir}")
+    print(f"[INFO] Slides: {stats['slides']} ({stats['fragments']} fragmentos reescritos)")
+    print(f"[INFO] Videos: {stats['videos']} (copiados {stats['videos_copied']}, "
+          f"pasados a faststart {stats['videos_relocated']}, sin cambios "
+          f"{stats['videos_kept']}, faltan {stats['missing']})")
+    print(f"[INFO] Archivos viejos eliminados: {stats['removed']}")
+    print(f"[INFO] Tamaño del bundle: {stats['bytes'] / 1e6:.1f} MB")
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Escritura de presentaciones .pptx con media en streaming
+
+python-pptx guarda cada parte como un `bytes` completo en memoria, incluidos
+los videos. Acá los videos se registran como StreamedMediaPart (solo la ruta
+al archivo) y save_presentation los copia al ZIP en bloques de tamaño fijo,
+así la memoria pico no depende del tamaño de los videos. Los slides que
+usan el mismo contenido comparten una sola parte (StreamedMediaPart.get_or_add,
+con los hashes del manifest de video_manifest.py).
+
+La compresión sigue una CompressionPolicy (deck_policy.py): la media ya
+viene comprimida y se guarda sin comprimir; las partes XML se comprimen con
+deflate en paralelo en un pool de threads (zlib libera el GIL) y se escriben
+al ZIP ya comprimidas. Con date_time fijo en la política (--reproducible)
+todas las entradas llevan esa fecha y el mismo input da los mismos bytes
+(ver deck_repro.py).
+"""
+
+import copy
+import os
+import shutil
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.opc.oxml import serialize_part_xml
+from pptx.opc.package import Part
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from pptx.opc.serialized import _ContentTypesItem
+
+# La política vive en deck_policy.py; se reexporta para los módulos que la
+# importan desde acá
+from deck_policy import (DEFAULT_POLICY, PRECOMPRESSED_EXTENSIONS, ZIP_EPOCH,
+                         CompressionPolicy, add_policy_arguments, policy_from_args,
+                         reproducible_date)
+from deck_trace import span
+from media_store import hash_file
+from zip_raw import copy_raw_entry, write_raw_entry
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB por bloque
+
+MEDIA_CONTENT_TYPES = {
+    "mp4": CT.MP4,
+    "mov": CT.MOV,
+    "wmv": CT.WMV,
+    "avi": CT.AVI,
+}
+
+
+class StreamedMediaPart(Part):
+    """Parte de media cuyo contenido se lee del disco recién al escribir el paquete"""
+
+    def __init__(self, partname, content_type, package, path, digest=None):
+        super().__init__(partname, content_type, package)
+        self.path = Path(path)
+        self.digest = digest    # MediaDigest, si ya se calculó
+
+    @classmethod
+    def new(cls, package, path):
+        """Crear la parte con el próximo nombre libre en /ppt/media/"""
+        path = Path(path)
+        ext = path.suffix.lstrip(".").lower()
+        content_type = MEDIA_CONTENT_TYPES.get(ext, CT.VIDEO)
+        return cls(package.next_media_partname(ext), content_type, package, path)
+
+    @classmethod
+    def get_or_add(cls, package, path, index=None):
+        """
+        Parte para `path`, o la que ya tenga el paquete con el mismo contenido
+
+        El contenido se compara por hash (de `index` si se pasa el
+        VideoReport de verify_videos; si no, se lee el archivo).
+        """
+        digest = index.digest(path) if index is not None else hash_file(path)
+        for part in package.iter_parts():
+            if isinstance(part, cls) and part.digest == digest:
+                return part
+        part = cls.new(package, path)
+        part.digest = digest
+        return part
+
+    @property
+    def blob(self):
+        """Contenido completo (solo para compatibilidad con prs.save())"""
+        return self.path.read_bytes()
+
+    @property
+    def sha1(self):
+        """SHA1 del archivo, calculado en bloques (python-pptx lo usa para deduplicar)"""
+        if self.digest is None:
+            self.digest = hash_file(self.path)
+        return self.digest.sha1
+
+
+def bytes_entry(name, data):
+    return ("bytes", name, data)
+
+
+def file_entry(name, path):
+    return ("file", name, Path(path))
+
+
+def raw_entry(src, info):
+    return ("raw", info.filename, (src, info))
+
+
+@span("deflate")
+def _deflate(data, level):
+    """(datos comprimidos, crc) con deflate crudo, como lo guarda ZIP"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(), zlib.crc32(data)
+
+
+def _new_zipinfo(name, compress_type, date_time=None):
+    zinfo = zipfile.ZipInfo(name, date_time or time.localtime(time.time())[:6])
+    zinfo.compress_type = compress_type
+    zinfo.external_attr = 0o600 << 16
+    return zinfo
+
+
+def open_zip(output_path, policy=DEFAULT_POLICY):
+    """ZipFile de escritura con el nivel de deflate de la política"""
+    return zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_DEFLATED,
+                           compresslevel=policy.xml_level, strict_timestamps=False)
+
+
+def write_entries(zf, entries, policy=DEFAULT_POLICY):
+    """
+    Escribir entradas en `zf` siguiendo la política de compresión
+
+    `entries` es una lista de bytes_entry / file_entry / raw_entry. Las
+    entradas en memoria que van con deflate se comprimen todas en paralelo
+    antes de escribir; los archivos se copian en bloques y las raw_entry se
+    copian sin recomprimir. El orden de escritura es el de `entries`.
+
+    Returns:
+        dict con los bytes escritos por tipo: deflated, stored, streamed, raw
+    """
+    written = {"deflated": 0, "stored": 0, "streamed": 0, "raw": 0}
+    to_deflate = [data for kind, name, data in entries
+                  if kind == "bytes" and policy.compress_type(name) == zipfile.ZIP_DEFLATED]
+
+    with ThreadPoolExecutor(max_workers=policy.workers or os.cpu_count()) as pool:
+        compressed = iter(pool.map(lambda data: _deflate(data, policy.xml_level), to_deflate))
+
+        for kind, name, payload in entries:
+            if kind == "raw":
+                src, info = payload
+                if policy.date_time:
+                    info = copy.copy(info)
+                    info.date_time = policy.date_time
+                written["raw"] += copy_raw_entry(src, info, zf)
+                continue
+
+            compress_type = policy.compress_type(name)
+            zinfo = _new_zipinfo(name, compress_type, policy.date_time)
+            if kind == "file":
+                with open(payload, "rb") as src, zf.open(zinfo, "w", force_zip64=True) as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+                written["streamed"] += zinfo.file_size
+            elif compress_type == zipfile.ZIP_DEFLATED:
+                data, zinfo.CRC = next(compressed)
+                zinfo.file_size = len(payload)
+                zinfo.compress_size = len(data)
+                write_raw_entry(zf, zinfo, [data])
+                written["deflated"] += len(data)
+            else:
+                zf.writestr(zinfo, payload)
+                written["stored"] += len(payload)
+
+    return written
+
+
+def write_chunks(zf, name, chunks, policy=DEFAULT_POLICY):
+    """Escribir una entrada a partir de bloques de bytes, sin armarla entera en memoria"""
+    zinfo = _new_zipinfo(name, policy.compress_type(name), policy.date_time)
+    with zf.open(zinfo, "w", force_zip64=True) as dst:
+        for chunk in chunks:
+            dst.write(chunk)
+    return zinfo.file_size
+
+
+@span("serialize")
+def package_entries(prs):
+    """
+    Entradas del paquete de `prs` en el mismo orden que prs.save()
+
+    Las StreamedMediaPart van como file_entry; el resto, como bytes_entry.
+    """
+    package = prs.part.package
+    parts = tuple(package.iter_parts())
+
+    entries = [
+        bytes_entry(CONTENT_TYPES_URI.membername,
+                    serialize_part_xml(_ContentTypesItem.xml_for(parts))),
+        bytes_entry(PACKAGE_URI.rels_uri.membername, package._rels.xml),
+    ]
+    for part in parts:
+        if isinstance(part, StreamedMediaPart):
+            entries.append(file_entry(part.partname.membername, part.path))
+        else:
+            entries.append(bytes_entry(part.partname.membername, part.blob))
+        if part._rels:
+            entries.append(bytes_entry(part.partname.rels_uri.membername, part.rels.xml))
+    return entries
+
+
+def save_presentation(prs, output_path, policy=DEFAULT_POLICY):
+    """
+    Guardar la presentación igual que prs.save(), pero copiando las
+    StreamedMediaPart en bloques en lugar de cargarlas en memoria y
+    comprimiendo según `policy`
+
+    Si `output_path` es una ruta, el ZIP se escribe en `<salida>.tmp` y se
+    renombra al terminar: quien tenga abierta la presentación (o la esté
+    copiando) nunca ve un archivo a medio escribir.
+
+    Returns:
+        Bytes de media copiados en streaming
+    """
+    if not isinstance(output_path, (str, os.PathLike)):
+        with open_zip(output_path, policy) as zf:
+            written = write_entries(zf, package_entries(prs), policy)
+        return written["streamed"]
+
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    try:
+        with open_zip(tmp_path, policy) as zf:
+            written = write_entries(zf, package_entries(prs), policy)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    os.replace(tmp_path, output_path)
+    return written["streamed"]
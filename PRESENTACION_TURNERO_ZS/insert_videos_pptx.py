@@ -2,38 +2,132 @@
 """
 Script para insertar videos en la presentación PowerPoint
 Ejecuta después de tener los videos grabados
+
+Con --linked los videos no se embeben: los slides los vinculan desde la
+carpeta videos_demo/ junto a la presentación (ver media_bundle.py).
 """
 
+import io
+import time
+
 from pptx import Presentation
+from pptx.media import SPEAKER_IMAGE_BYTES
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls, qn
+from pptx.oxml.shapes.picture import CT_Picture
+from pptx.oxml.xmlchemy import OxmlElement
 from pptx.util import Inches
 from pathlib import Path
 
+from deck_writer import (DEFAULT_POLICY, StreamedMediaPart, add_policy_arguments,
+                         policy_from_args, save_presentation)
+from deck_trace import phase, record_package
+from media_bundle import link_target, write_bundle
+from mp4_probe import format_duration
+from video_manifest import STATUSES, verify_videos
+from video_map import VIDEOS, slide_videos, video_names  # qué video va en qué slide
+
+# Segundos extra después del video antes de avanzar al siguiente slide
+ADVANCE_MARGIN_S = 2
+
+# Nombre de los cuadros de texto que marcan un video faltante
+PLACEHOLDER_PREFIX = "Video Placeholder"
+
+# Lugar de los videos (y sus placeholders) en el slide; si el slide tiene
+# varios, se reparten a lo ancho separados por VIDEO_GAP
+VIDEO_AREA = (Inches(2), Inches(1.5), Inches(6), Inches(4))
+VIDEO_GAP = Inches(0.2)
+
+P14_MEDIA = "{http://schemas.microsoft.com/office/powerpoint/2010/main}media"
+
+# Secuencia principal de animaciones del slide (la que arma PowerPoint)
+_MAIN_SEQ_XML = (
+    f'<p:seq {nsdecls("p")} concurrent="1" nextAc="seek">'
+    '<p:cTn id="{seq}" dur="indefinite" nodeType="mainSeq"><p:childTnLst/></p:cTn>'
+    '<p:prevCondLst><p:cond evt="onPrev" delay="0"><p:tgtEl><p:sldTgt/></p:tgtEl>'
+    '</p:cond></p:prevCondLst>'
+    '<p:nextCondLst><p:cond evt="onNext" delay="0"><p:tgtEl><p:sldTgt/></p:tgtEl>'
+    '</p:cond></p:nextCondLst></p:seq>'
+)
+
+# Efecto "Reproducir" con inicio "Después de la anterior" y sin retardo: el
+# video arranca solo al mostrarse el slide, como "Iniciar: automáticamente"
+_AUTOPLAY_XML = (
+    f'<p:par {nsdecls("p")}><p:cTn id="{{group}}" fill="hold"><p:stCondLst>'
+    '<p:cond delay="indefinite"/><p:cond evt="onBegin" delay="0"><p:tn val="{seq}"/></p:cond>'
+    '</p:stCondLst><p:childTnLst><p:par><p:cTn id="{step}" fill="hold"><p:stCondLst>'
+    '<p:cond delay="0"/></p:stCondLst><p:childTnLst>'
+    '<p:par><p:cTn id="{effect}" presetID="1" presetClass="mediacall" presetSubtype="0" '
+    'fill="hold" nodeType="afterEffect"><p:stCondLst><p:cond delay="0"/></p:stCondLst>'
+    '<p:childTnLst><p:cmd type="call" cmd="playFrom(0.0)"><p:cBhvr>'
+    '<p:cTn id="{cmd}" dur="{dur}" fill="hold"/><p:tgtEl><p:spTgt spid="{spid}"/></p:tgtEl>'
+    '</p:cBhvr></p:cmd></p:childTnLst></p:cTn></p:par>'
+    '</p:childTnLst></p:cTn></p:par></p:childTnLst></p:cTn></p:par>'
+)
+
+def video_box(position, count):
+    """(left, top, width, height) del video `position` de los `count` del slide"""
+    left, top, width, height = VIDEO_AREA
+    if count <= 1:
+        return VIDEO_AREA
+    each = (width - VIDEO_GAP * (count - 1)) // count
+    return (left + position * (each + VIDEO_GAP), top, each, height * each // width)
+
 def insert_video_in_slide(slide, video_path, left=Inches(2), top=Inches(1.5),
-                         width=Inches(6), height=Inches(4)):
+                         width=Inches(6), height=Inches(4), index=None, link=None,
+                         duration=None):
     """
     Inserta un video en un slide
 
+    El video no se lee en memoria: se registra como StreamedMediaPart y
+    save_presentation lo copia al .pptx en bloques al guardar. Por eso la
+    presentación debe guardarse con save_presentation(), no con prs.save().
+    Si otro slide ya tiene un video con el mismo contenido, se reusa su parte.
+
     Args:
         slide: El slide donde insertar
         video_path: Ruta del video MP4
         left, top: Posición
         width, height: Tamaño
+        index: VideoReport con los hashes ya calculados (opcional)
+        link: Ruta relativa a la presentación; si se pasa, el video se
+            vincula como archivo externo en lugar de embeberse
+        duration: Duración en segundos; si se pasa, el video arranca solo al
+            mostrarse el slide (set_video_autoplay). Sin esto se reproduce
+            con un clic, como con shapes.add_movie()
     """
     try:
-        # Nota: python-pptx tiene limitaciones con videos en algunas versiones
-        # Este es un método alternativo usando XML
-
-        # Para versiones nuevas de python-pptx:
-        from pptx.oxml import parse_xml
-        from pptx.util import Pt
-
         video_file = Path(video_path)
         if not video_file.exists():
             print(f"ERROR: Archivo no encontrado: {video_path}")
             return False
 
-        # Agregar video a través de movie element
-        # (Esto es un workaround ya que python-pptx no soporta bien videos)
+        # Mismo XML que genera shapes.add_movie(), pero sin pasar por
+        # Video.from_path_or_file_like() que carga todo el archivo
+        slide_part = slide.part
+        if link:
+            media_rId = slide_part.relate_to(link, RT.MEDIA, is_external=True)
+            video_rId = slide_part.relate_to(link, RT.VIDEO, is_external=True)
+        else:
+            media_part = StreamedMediaPart.get_or_add(slide_part.package, video_file, index)
+            media_rId = slide_part.relate_to(media_part, RT.MEDIA)
+            video_rId = slide_part.relate_to(media_part, RT.VIDEO)
+        _, poster_rId = slide_part.get_or_add_image_part(io.BytesIO(SPEAKER_IMAGE_BYTES))
+
+        shapes = slide.shapes
+        pic = CT_Picture.new_video_pic(shapes._next_shape_id, video_file.name,
+                                       video_rId, media_rId, poster_rId,
+                                       left, top, width, height)
+        if link:
+            # Un video vinculado se referencia con r:link también en p14:media
+            media = pic.find(f".//{P14_MEDIA}")
+            media.set(qn("r:link"), media.attrib.pop(qn("r:embed")))
+        shapes._spTree.append(pic)
+        shapes._add_video_timing(pic)
+        if duration is not None:
+            set_video_autoplay(slide._element, pic.shape_id, duration)
+
         print(f"Agregando video: {video_file.name}")
         return True
 
@@ -41,12 +135,96 @@ def insert_video_in_slide(slide, video_path, left=Inches(2), top=Inches(1.5),
         print(f"Error insertando video: {e}")
         return False
 
-def add_video_placeholder(slide, video_name):
+def set_video_autoplay(sld, shape_id, seconds):
+    """
+    Hacer que el video `shape_id` del slide (elemento p:sld) arranque solo
+
+    El timing que agrega python-pptx (p:video con delay="indefinite") solo
+    reproduce el video con un clic. Esto agrega a la secuencia principal un
+    efecto "Reproducir" que empieza con el slide; si el slide ya tiene
+    videos que arrancan solos, este arranca cuando termina el anterior. Así
+    el avance automático (set_auto_advance con autoplay_seconds) coincide
+    con el final del último video. Si el video ya tiene el efecto, solo se
+    actualiza su duración (video regrabado).
+    """
+    dur = str(int(round(seconds * 1000)))
+    cmds = sld.xpath(f'./p:timing//p:cmd[p:cBhvr/p:tgtEl/p:spTgt/@spid="{shape_id}"]')
+    if cmds:
+        for cmd in cmds:
+            cmd.find(f"{qn('p:cBhvr')}/{qn('p:cTn')}").set("dur", dur)
+        sequence_autoplay(sld)
+        return
+
+    root = sld.xpath("./p:timing/p:tnLst/p:par/p:cTn/p:childTnLst")[0]
+    ids = iter(range(max(int(v) for v in sld.xpath("./p:timing//p:cTn/@id")) + 1, 1 << 31))
+    main_seq = root.xpath("./p:seq/p:cTn[@nodeType='mainSeq']")
+    if main_seq:
+        main_seq = main_seq[0]
+    else:
+        root.insert(0, parse_xml(_MAIN_SEQ_XML.format(seq=next(ids))))
+        main_seq = root[0][0]
+    effect = parse_xml(_AUTOPLAY_XML.format(
+        group=next(ids), step=next(ids), effect=next(ids), cmd=next(ids), dur=dur,
+        seq=main_seq.get("id"), spid=shape_id))
+    groups = main_seq.find(qn("p:childTnLst"))
+    children = f"{qn('p:cTn')}/{qn('p:childTnLst')}"
+    if len(groups):
+        # El grupo que arranca con el slide ya existe: este video es un paso más
+        groups[0].find(children).append(effect.find(f"{children}/{qn('p:par')}"))
+        sequence_autoplay(sld)
+    else:
+        groups.append(effect)
+
+def _autoplay_steps(sld):
+    """Pasos (p:par) del grupo de la secuencia principal que arranca con el slide"""
+    groups = sld.xpath("./p:timing//p:seq/p:cTn[@nodeType='mainSeq']/p:childTnLst/p:par")
+    if not groups:
+        return []
+    return list(groups[0].find(f"{qn('p:cTn')}/{qn('p:childTnLst')}"))
+
+def _step_ms(step):
+    """Duración en ms de un paso: la del video más largo que reproduce"""
+    return max((int(cmd.find(f"{qn('p:cBhvr')}/{qn('p:cTn')}").get("dur", 0))
+                for cmd in step.iter(qn("p:cmd"))), default=0)
+
+def sequence_autoplay(sld):
+    """Cada paso del grupo arranca cuando termina el anterior"""
+    start = 0
+    for step in _autoplay_steps(sld):
+        step.find(f"{qn('p:cTn')}/{qn('p:stCondLst')}/{qn('p:cond')}").set("delay", str(start))
+        start += _step_ms(step)
+
+def autoplay_seconds(sld):
+    """Segundos desde que se muestra el slide hasta que termina su último video"""
+    return sum(_step_ms(step) for step in _autoplay_steps(sld)) / 1000
+
+def set_auto_advance(sld, seconds):
+    """
+    Configura el avance automático del slide (elemento p:sld) después de
+    `seconds` segundos (sigue avanzando también con clic)
+    """
+    transition = sld.find(qn("p:transition"))
+    if transition is None:
+        transition = OxmlElement("p:transition")
+        # p:transition va antes de p:timing y p:extLst en el esquema de p:sld
+        anchor = sld.find(qn("p:timing"))
+        if anchor is None:
+            anchor = sld.find(qn("p:extLst"))
+        if anchor is not None:
+            anchor.addprevious(transition)
+        else:
+            sld.append(transition)
+    transition.set("advTm", str(int(round(seconds * 1000))))
+
+def add_video_placeholder(slide, video_name, box=VIDEO_AREA):
     """
     Agrega un placeholder de texto indicando dónde va el video
     Esta es una alternativa si python-pptx no soporta videos directamente
+
+    `box` es (left, top, width, height), el del video (ver video_box)
     """
-    textbox = slide.shapes.add_textbox(Inches(2), Inches(1.5), Inches(6), Inches(4))
+    textbox = slide.shapes.add_textbox(*box)
+    textbox.name = f"{PLACEHOLDER_PREFIX}: {video_name}"
     text_frame = textbox.text_frame
     text_frame.word_wrap = True
 
@@ -61,94 +239,239 @@ def add_video_placeholder(slide, video_name):
     p.font.size = Pt(14)
     p.font.bold = True
 
-# Video mapping - qué video va en qué slide
-VIDEOS = {
-    2: "01-flujo-paciente-overview.mp4",      # Slide 2 (index 2)
-    6: "02-login-admin.mp4",                   # Slide 6
-    7: "03-login-usuario-general.mp4",         # Slide 7
-    8: "04-dashboard-overview.mp4",            # Slide 8
-    9: "05-cargar-paciente-form.mp4",          # Slide 9
-    10: "06-cargar-paciente-servicios.mp4",    # Slide 10
-    11: "07-cargar-paciente-toggle.mp4",       # Slide 11 (IMPORTANTE)
-    12: "08-cargar-paciente-submit.mp4",       # Slide 12
-    13: "09-cola-pacientes-overview.mp4",      # Slide 13
-    14: "10-habilitar-paciente.mp4",           # Slide 14
-    15: "11-permiso-denegado.mp4",             # Slide 15
-    16: "12-llamar-paciente.mp4",              # Slide 16
-    17: "13-registrar-atencion.mp4",           # Slide 17
-    18: "14-filtros-basicos.mp4",              # Slide 18
-    19: "15-filtros-multiples.mp4",            # Slide 19
-    20: "16-pantalla-publica-overview.mp4",    # Slide 20
-    21: "17-pantalla-realtime.mp4",            # Slide 21
-    22: "18-roles-y-permisos.mp4",             # Slide 22
-    23: "19-info-paciente.mp4",                # Slide 23
-}
-
-def insert_all_videos(pptx_path, videos_dir="videos_demo"):
+def insert_videos(prs, videos_dir="videos_demo", videos=None, linked=False):
     """
-    Abre presentación existente e inserta placeholders para videos
+    Inserta los videos de VIDEOS en una presentación ya cargada en memoria
+    (o placeholders si faltan). No guarda nada.
 
     Args:
-        pptx_path: Ruta al archivo .pptx
+        prs: Presentación (por ejemplo, la que devuelve build_presentation)
         videos_dir: Carpeta donde están los videos
-    """
-
-    print(f"Abriendo presentación: {pptx_path}")
-    prs = Presentation(pptx_path)
+        videos: Mapa índice de slide → archivo (o lista de archivos) en
+            lugar de VIDEOS
+        linked: Vincular los videos (videos_demo/<archivo>) en lugar de
+            embeberlos; stats["linked"] lista lo que necesita write_bundle
 
+    Returns:
+        dict con expected (videos pedidos), inserted, missing (placeholders:
+        videos que faltan, corruptos o que no se pudieron insertar),
+        total_duration, probe_time (verificación de la carpeta), unique_media
+        (partes de video distintas), hashed (videos leídos; el resto salió
+        del manifest de la carpeta) y status ({estado: cantidad} según
+        video_manifest)
+    """
     videos_path = Path(videos_dir)
     if not videos_path.exists():
         print(f"Creando carpeta: {videos_dir}")
         videos_path.mkdir(exist_ok=True)
 
-    inserted_count = 0
-    missing_count = 0
+    slides = list(prs.slides)
+    stats = {"inserted": 0, "missing": 0, "total_duration": 0.0, "probe_time": 0.0,
+             "linked": {}}
+    videos = VIDEOS if videos is None else videos
+    stats["expected"] = sum(len(names) for _, names in slide_videos(videos))
 
-    for slide_index, video_name in VIDEOS.items():
-        if slide_index >= len(prs.slides):
-            print(f"⚠️  Slide {slide_index} no existe (total slides: {len(prs.slides)})")
+    # Un solo recorrido de la carpeta; solo se leen los videos que cambiaron
+    start = time.perf_counter()
+    with phase("verify_videos") as info:
+        report = verify_videos(videos_path, video_names(videos))
+        info.update(videos=len(report.videos), hashed=report.hashed)
+    stats["probe_time"] = time.perf_counter() - start
+
+    for slide_index, names in slide_videos(videos):
+        if slide_index >= len(slides):
+            print(f"⚠️  Slide {slide_index} no existe (total slides: {len(slides)})")
             continue
 
-        slide = prs.slides[slide_index]
-        video_path = videos_path / video_name
-
-        if video_path.exists():
-            print(f"✅ Slide {slide_index}: {video_name} encontrado")
-            # Intentar insertar video real
-            try:
-                insert_video_in_slide(slide, str(video_path))
-                inserted_count += 1
-            except:
-                # Si falla, agregar placeholder
-                add_video_placeholder(slide, video_name)
-        else:
-            print(f"⚠️  Slide {slide_index}: {video_name} NO encontrado")
-            # Agregar placeholder
-            add_video_placeholder(slide, video_name)
-            missing_count += 1
+        slide = slides[slide_index]
+        for position, video_name in enumerate(names):
+            video_path = videos_path / video_name
+            video = report.videos[video_name]
+            box = video_box(position, len(names))
+
+            if video.status != "missing":
+                info = video.info
+                if info is None:
+                    print(f"❌ Slide {slide_index}: {video_name} corrupto ({video.detail})")
+
+                # Intentar insertar video real; si falla, agregar placeholder
+                link = link_target(video_name) if linked else None
+                if info is not None and insert_video_in_slide(slide, str(video_path), *box,
+                                                              index=report, link=link,
+                                                              duration=info.duration):
+                    print(f"✅ Slide {slide_index}: {video_name} "
+                          f"({format_duration(info.duration)}, {info.width}x{info.height}, "
+                          f"{info.codec or '?'})")
+                    set_auto_advance(slide._element,
+                                     autoplay_seconds(slide._element) + ADVANCE_MARGIN_S)
+                    stats["total_duration"] += info.duration
+                    stats["inserted"] += 1
+                    if linked:
+                        entry = stats["linked"].setdefault(
+                            video_name, {"path": str(video_path), "duration": info.duration,
+                                         "size": video.digest.size, "sha1": video.digest.sha1,
+                                         "slides": []})
+                        entry["slides"].append(slide_index)
+                else:
+                    add_video_placeholder(slide, video_name, box)
+                    stats["missing"] += 1
+            else:
+                print(f"⚠️  Slide {slide_index}: {video_name} NO encontrado")
+                # Agregar placeholder
+                add_video_placeholder(slide, video_name, box)
+                stats["missing"] += 1
+
+    stats["unique_media"] = sum(1 for part in prs.part.package.iter_parts()
+                                if isinstance(part, StreamedMediaPart))
+    stats["hashed"] = report.hashed
+    stats["status"] = {status: len(report.by_status(status)) for status in STATUSES}
+    return stats
+
+def print_video_summary(stats, streamed, videos_dir="videos_demo"):
+    """Resumen de la etapa de videos"""
+    print(f"\n=== RESUMEN ===")
+    print(f"Videos insertados: {stats['inserted']}")
+    print(f"Placeholders agregados: {stats['missing']}")
+    print(f"Archivos de video en el paquete: {stats['unique_media']}")
+    print("Carpeta de videos: " + ", ".join(f"{count} {status}"
+                                            for status, count in stats["status"].items()) +
+          f" ({stats['hashed']} leídos, el resto desde el manifest)")
+    print(f"Media copiada en streaming: {streamed / (1024 * 1024):.1f} MB")
+    print(f"Total expected: {stats['expected']}")
+    print(f"Duración total de videos: {format_duration(stats['total_duration'])}")
+    print(f"Videos analizados en {stats['probe_time'] * 1000:.1f} ms")
+    if stats["missing"]:
+        print(f"\nSi faltan videos, sigue estos pasos:")
+        print(f"1. Crea carpeta: {videos_dir}/")
+        print(f"2. Graba videos según GUIA_VIDEOS.md")
+        print(f"3. Ejecuta este script nuevamente")
+        print(f"\nAlternativa manual en PowerPoint:")
+        print(f"Insert → Video → Selecciona archivo")
+
+def print_compact_line(compacted):
+    print(f"Compactado: {compacted['layouts']} layouts sin usar quitados "
+          f"({compacted['parts']} partes, {compacted['saved'] / 1024:.1f} KB sin comprimir)")
+
+def print_bundle_summary(bundle):
+    print(f"Carpeta de videos vinculados: {bundle['bundle_dir']} "
+          f"({bundle['videos']} videos, {bundle['bytes'] / (1024 * 1024):.1f} MB, "
+          f"{bundle['copied']} copiados)")
+    print("Copia la presentación junto con esa carpeta")
+
+def insert_all_videos(pptx_path, videos_dir="videos_demo", policy=DEFAULT_POLICY,
+                      linked=False, compact=False):
+    """
+    Abre una presentación ya guardada e inserta los videos (o placeholders)
+
+    Para builds nuevos conviene deck_pipeline.build_deck(), que inserta los
+    videos sobre la presentación en memoria y escribe el .pptx una sola vez.
+    Esta función queda para agregar videos a un .pptx existente.
+
+    Args:
+        pptx_path: Ruta al archivo .pptx
+        videos_dir: Carpeta donde están los videos
+        policy: CompressionPolicy para escribir el .pptx
+        linked: Vincular los videos y escribir la carpeta videos_demo/ junto
+            a la presentación en lugar de embeberlos
+        compact: Quitar los layouts que ningún slide usa (deck_compact.py)
+    """
+
+    print(f"Abriendo presentación: {pptx_path}")
+    with phase("open") as info:
+        prs = Presentation(pptx_path)
+        info["slides"] = len(prs.slides)
+
+    with phase("videos") as info:
+        stats = insert_videos(prs, videos_dir, linked=linked)
+        info.update(inserted=stats["inserted"], missing=stats["missing"],
+                    hashed=stats["hashed"])
+    if compact:
+        from deck_compact import compact_presentation
+        with phase("compact") as info:
+            compacted = compact_presentation(prs)
+            info.update(compacted)
 
     # Guardar presentación actualizada
     output_path = pptx_path.replace('.pptx', '_con_videos.pptx')
     print(f"\nGuardando presentación con videos: {output_path}")
-    prs.save(output_path)
+    with phase("save") as info:
+        streamed = save_presentation(prs, output_path, policy)
+        info["streamed_bytes"] = streamed
+    record_package(output_path, len(prs.slides), streamed)
 
-    print(f"\n=== RESUMEN ===")
-    print(f"Videos insertados: {inserted_count}")
-    print(f"Placeholders agregados: {missing_count}")
-    print(f"Total expected: {len(VIDEOS)}")
-    print(f"\nSi faltan videos, sigue estos pasos:")
-    print(f"1. Crea carpeta: {videos_dir}/")
-    print(f"2. Graba videos según GUIA_VIDEOS.md")
-    print(f"3. Ejecuta este script nuevamente")
-    print(f"\nAlternativa manual en PowerPoint:")
-    print(f"Insert → Video → Selecciona archivo")
+    print_video_summary(stats, streamed, videos_dir)
+    if compact:
+        print_compact_line(compacted)
+    if linked:
+        print_bundle_summary(write_bundle(output_path, stats["linked"]))
 
 if __name__ == "__main__":
-    pptx_file = "Turnero_ZS_Presentacion.pptx"
+    import argparse
+
+    from deck_pipeline import build_deck
+    from deck_trace import add_trace_arguments, tracing_from_args
+
+    parser = argparse.ArgumentParser(description="Generar la presentación con los videos de la demo")
+    parser.add_argument("--videos-dir", default="videos_demo", help="Carpeta de los videos MP4")
+    parser.add_argument("--output", default="Turnero_ZS_Presentacion_con_videos.pptx",
+                        help="Archivo .pptx de salida")
+    parser.add_argument("--pptx", help="Agregar los videos a un .pptx ya generado "
+                                       "en lugar de construirlo desde slides.json")
+    parser.add_argument("--patch", action="store_true",
+                        help="Con --pptx: actualizar el archivo a nivel ZIP, reescribiendo "
+                             "solo los slides que cambian")
+    parser.add_argument("--linked", action="store_true",
+                        help="Vincular los videos en lugar de embeberlos y escribir la "
+                             "carpeta videos_demo/ (manifest y SHA1SUMS) junto a la salida")
+    parser.add_argument("--compact", action="store_true",
+                        help="Quitar layouts sin usar y partes huérfanas (deck_compact.py)")
+    add_policy_arguments(parser)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    policy = policy_from_args(args)
+    if args.linked and args.patch:
+        parser.error("--linked no se puede combinar con --patch")
+    if args.patch and not args.pptx:
+        parser.error("--patch requiere --pptx")
+
     print("=" * 60)
     print("Script para Insertar Videos en PowerPoint")
     print("=" * 60)
 
-    insert_all_videos(pptx_file)
+    with tracing_from_args(args):
+        if args.pptx and args.patch:
+            from deck_patch import patch_videos
+
+            with phase("patch") as info:
+                stats = patch_videos(args.pptx, args.videos_dir, policy=policy)
+                info.update(stats)
+            print(f"\n=== RESUMEN (patch) ===")
+            print(f"Videos insertados: {stats['inserted']}")
+            print(f"Placeholders agregados: {stats['missing']}")
+            print(f"Slides sin cambios: {stats['unchanged']}")
+            print(f"Partes reescritas: {stats['rewritten']}")
+            print(f"Copiado sin recomprimir: {stats['copied_bytes'] / (1024 * 1024):.1f} MB")
+            print(f"Media nueva copiada en streaming: "
+                  f"{stats['streamed'] / (1024 * 1024):.1f} MB")
+            if args.compact:
+                from deck_compact import compact_package, print_compact_summary
+                with phase("compact") as info:
+                    compacted = compact_package(args.pptx, policy=policy)
+                    info.update(compacted)
+                print_compact_summary(compacted)
+        elif args.pptx:
+            insert_all_videos(args.pptx, args.videos_dir, policy, args.linked, args.compact)
+        else:
+            result = build_deck(args.output, videos_dir=args.videos_dir, policy=policy,
+                                linked=args.linked, compact=args.compact)
+            print(f"\nPresentación con videos: {result.output_path} ({result.slides} slides)"
+                  + (" - sin cambios desde el último build" if result.cached else ""))
+            if result.sha256:
+                print(f"SHA-256: {result.sha256}")
+            print_video_summary(result.videos, result.streamed_bytes, args.videos_dir)
+            if result.compacted:
+                print_compact_line(result.compacted)
+            if args.linked:
+                print_bundle_summary(write_bundle(result.output_path, result.videos["linked"]))
 
     print("\n¡Hecho! Abre la presentación en PowerPoint para revisar.")
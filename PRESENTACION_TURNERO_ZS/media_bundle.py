@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Carpeta de videos que acompaña a una presentación con videos vinculados
+
+En modo vinculado (insert_videos_pptx.py --linked) los videos no van dentro
+del .pptx: cada slide apunta con una relación externa a
+`videos_demo/<archivo>`, relativa a la presentación. La presentación pesa
+unos cientos de KB y PowerPoint lee cada video recién al reproducirlo.
+
+write_bundle arma la carpeta `videos_demo/` junto al .pptx con los videos
+usados, un manifest.json (tamaño, SHA1, duración y slides de cada video) y
+SHA1SUMS para verificar la copia en cada PC (`sha1sum -c SHA1SUMS`).
+Hay que copiar o sincronizar la presentación junto con la carpeta.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+BUNDLE_DIR = "videos_demo"
+MANIFEST_NAME = "manifest.json"
+CHECKSUMS_NAME = "SHA1SUMS"
+
+
+def link_target(video_name):
+    """Destino de la relación externa de un video, relativo a la presentación"""
+    return f"{BUNDLE_DIR}/{video_name}"
+
+
+def _copy_if_changed(src, dst):
+    """Copiar `src` a `dst` salvo que ya esté con el mismo tamaño y mtime"""
+    if src.resolve() == dst.resolve():
+        return False
+    src_stat = src.stat()
+    try:
+        dst_stat = dst.stat()
+        if (dst_stat.st_size == src_stat.st_size
+                and dst_stat.st_mtime_ns == src_stat.st_mtime_ns):
+            return False
+    except FileNotFoundError:
+        pass
+    tmp_path = dst.with_name(dst.name + ".tmp")
+    shutil.copy2(src, tmp_path)
+    os.replace(tmp_path, dst)
+    return True
+
+
+def write_bundle(deck_path, linked):
+    """
+    Escribir la carpeta de videos junto a `deck_path`
+
+    Los videos no se vuelven a leer: el tamaño y el SHA1 son los que
+    verify_videos ya dejó en el manifest de la carpeta de origen.
+
+    Args:
+        deck_path: .pptx con los videos vinculados
+        linked: {archivo: {"path", "duration", "size", "sha1", "slides"}} como
+            lo devuelve insert_videos(..., linked=True) en stats["linked"]
+
+    Returns:
+        dict con bundle_dir, videos, copied (archivos copiados) y bytes
+    """
+    deck_path = Path(deck_path)
+    bundle_dir = deck_path.parent / BUNDLE_DIR
+    bundle_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = {"deck": deck_path.name, "videos": {}}
+    copied = total = 0
+    for name in sorted(linked):
+        video = linked[name]
+        src = Path(video["path"])
+        copied += _copy_if_changed(src, bundle_dir / name)
+        total += video["size"]
+        manifest["videos"][name] = {"size": video["size"], "sha1": video["sha1"],
+                                    "duration": round(video["duration"], 3),
+                                    "slides": sorted(video["slides"])}
+
+    with open(bundle_dir / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    with open(bundle_dir / CHECKSUMS_NAME, "w", encoding="utf-8") as f:
+        for name, video in manifest["videos"].items():
+            f.write(f"{video['sha1']}  {name}\n")
+
+    return {"bundle_dir": str(bundle_dir), "videos": len(linked), "copied": copied,
+            "bytes": total}
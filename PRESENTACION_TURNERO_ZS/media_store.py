@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Media direccionada por contenido
+
+El mismo clip puede ir en varios slides de una presentación y en las
+presentaciones de varias instituciones. Cada video se identifica por el
+hash de su contenido: dentro de un paquete, los slides que usan el mismo
+contenido comparten una sola parte /ppt/media/ (el clip se escribe una vez).
+
+Los hashes de la carpeta de videos se guardan en el manifest de
+video_manifest.py (.videos_manifest.json), junto con los metadatos de cada
+MP4: un build siguiente (o el de otra institución) no vuelve a leer los
+videos que no cambiaron.
+"""
+
+import hashlib
+import zlib
+from dataclasses import dataclass
+
+from deck_trace import span
+
+CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class MediaDigest:
+    sha1: str
+    crc32: int
+    size: int
+
+
+@span("hash")
+def hash_file(path):
+    """SHA1 y CRC32 de un archivo en una sola pasada por bloques"""
+    sha1 = hashlib.sha1()
+    crc = size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha1.update(chunk)
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+    return MediaDigest(sha1.hexdigest(), crc, size)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Mover la caja moov de un MP4 al principio del archivo (faststart)
+
+Un MP4 grabado con el moov al final obliga al navegador a pedir el final del
+archivo (o a bajarlo entero) antes de empezar a reproducir. Con el moov
+antes del mdat, los primeros KB alcanzan para arrancar y el resto llega con
+HTTP range requests a medida que avanza la reproducción.
+
+Como qt-faststart, sin reencodear: se reordenan las cajas de primer nivel
+(el moov pasa a estar antes del primer mdat) y se corrigen los offsets de
+los chunks (stco/co64) según dónde quedó cada caja. Los datos se copian en
+bloques, sin cargar el video en memoria.
+"""
+
+import shutil
+import struct
+from pathlib import Path
+
+from mp4_probe import Mp4Error
+
+CHUNK_SIZE = 1024 * 1024
+
+# Cajas contenedoras en el camino moov → stco/co64
+_CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"edts"}
+
+
+def top_level_boxes(f, size):
+    """[(tipo, inicio, tamaño)] de las cajas de primer nivel"""
+    boxes = []
+    pos = 0
+    while pos + 8 <= size:
+        f.seek(pos)
+        box_size, box_type = struct.unpack(">I4s", f.read(8))
+        if box_size == 1:
+            box_size = struct.unpack(">Q", f.read(8))[0]
+        elif box_size == 0:
+            box_size = size - pos
+        if box_size < 8 or pos + box_size > size:
+            raise Mp4Error(f"caja '{box_type.decode('latin-1')}' con tamaño inválido en {pos}")
+        boxes.append((box_type, pos, box_size))
+        pos += box_size
+    return boxes
+
+
+def _chunk_offset_tables(moov, start, end):
+    """(tipo, posición de la primera entrada, cantidad) de cada stco/co64 del moov"""
+    pos = start
+    while pos + 8 <= end:
+        box_size, box_type = struct.unpack_from(">I4s", moov, pos)
+        header = 8
+        if box_size == 1:
+            box_size = struct.unpack_from(">Q", moov, pos + 8)[0]
+            header = 16
+        if box_size < header or pos + box_size > end:
+            raise Mp4Error(f"caja '{box_type.decode('latin-1')}' con tamaño inválido en moov")
+        if box_type in _CONTAINERS:
+            yield from _chunk_offset_tables(moov, pos + header, pos + box_size)
+        elif box_type in (b"stco", b"co64"):
+            count = struct.unpack_from(">I", moov, pos + header + 4)[0]
+            yield box_type, pos + header + 8, count
+        pos += box_size
+
+
+def make_faststart(src, dst):
+    """
+    Copiar `src` a `dst` con el moov antes del mdat
+
+    Returns:
+        True si hubo que reordenar, False si ya era faststart (se copia tal cual)
+
+    Raises:
+        Mp4Error: sin moov/mdat, o si un offset no entra en stco (> 4 GB)
+    """
+    src, dst = Path(src), Path(dst)
+    with open(src, "rb") as f:
+        size = f.seek(0, 2)
+        boxes = top_level_boxes(f, size)
+        kinds = [kind for kind, _, _ in boxes]
+        if b"moov" not in kinds or b"mdat" not in kinds:
+            raise Mp4Error("no se encontraron las cajas moov y mdat")
+        moov_index, mdat_index = kinds.index(b"moov"), kinds.index(b"mdat")
+        if moov_index < mdat_index:
+            shutil.copyfile(src, dst)
+            return False
+
+        _, moov_start, moov_size = boxes[moov_index]
+        f.seek(moov_start)
+        moov = bytearray(f.read(moov_size))
+
+        # Nuevo orden: moov justo antes del primer mdat
+        order = [box for i, box in enumerate(boxes) if i != moov_index]
+        order.insert(mdat_index, boxes[moov_index])
+        moved = {}
+        pos = 0
+        for _, start, box_size in order:
+            moved[start] = pos
+            pos += box_size
+
+        def new_offset(offset):
+            for _, start, box_size in boxes:
+                if start <= offset < start + box_size:
+                    return offset - start + moved[start]
+            raise Mp4Error(f"offset de chunk {offset} fuera del archivo")
+
+        header = 16 if struct.unpack_from(">I", moov, 0)[0] == 1 else 8
+        for box_type, first, count in _chunk_offset_tables(moov, header, len(moov)):
+            fmt = ">I" if box_type == b"stco" else ">Q"
+            step = struct.calcsize(fmt)
+            for i in range(count):
+                offset = new_offset(struct.unpack_from(fmt, moov, first + i * step)[0])
+                if box_type == b"stco" and offset > 0xFFFFFFFF:
+                    raise Mp4Error("offset mayor a 4 GB en stco: hace falta co64")
+                struct.pack_into(fmt, moov, first + i * step, offset)
+
+        tmp_path = dst.with_name(dst.name + ".tmp")
+        with open(tmp_path, "wb") as out:
+            for kind, start, box_size in order:
+                if kind == b"moov":
+                    out.write(moov)
+                    continue
+                f.seek(start)
+                remaining = box_size
+                while remaining:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise Mp4Error("archivo truncado")
+                    out.write(chunk)
+                    remaining -= len(chunk)
+    tmp_path.replace(dst)
+    return True
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mover el moov de un MP4 al principio")
+    parser.add_argument("src", help="MP4 de entrada")
+    parser.add_argument("dst", help="MP4 de salida")
+    args = parser.parse_args()
+
+    if make_faststart(args.src, args.dst):
+        print(f"[OK] {args.dst}: moov movido al principio")
+    else:
+        print(f"[OK] {args.dst}: ya era faststart, copiado sin cambios")
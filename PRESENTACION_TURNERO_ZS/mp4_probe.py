@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Lectura rápida de metadatos de videos MP4 (ISO-BMFF)
+
+Mapea el archivo en memoria (mmap) y salta de caja en caja hasta moov/mvhd y
+trak/tkhd sin leer ni decodificar la media, así que funciona igual con el
+moov al principio (faststart) o al final del archivo.
+"""
+
+import mmap
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from deck_trace import span
+
+
+class Mp4Error(ValueError):
+    """El archivo no es un MP4 válido o está truncado"""
+
+
+@dataclass
+class Mp4Info:
+    path: Path
+    size: int
+    duration: float       # segundos
+    width: int
+    height: int
+    codec: str | None     # fourcc del primer sample entry de video (avc1, hvc1, ...)
+    faststart: bool       # moov antes de mdat: se puede reproducir mientras descarga
+
+
+def _iter_boxes(buf, start, end):
+    """Recorrer las cajas entre start y end: (tipo, inicio del payload, fin de caja)"""
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", buf, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                raise Mp4Error("caja de 64 bits truncada")
+            size = struct.unpack_from(">Q", buf, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise Mp4Error(f"caja '{box_type.decode('latin-1')}' con tamaño inválido en {pos}")
+        yield box_type, pos + header, pos + size
+        pos += size
+
+
+def _find(buf, start, end, box_type):
+    """Primera caja hija del tipo pedido, o None"""
+    for kind, payload, box_end in _iter_boxes(buf, start, end):
+        if kind == box_type:
+            return payload, box_end
+    return None
+
+
+def _find_path(buf, start, end, *path):
+    for box_type in path:
+        found = _find(buf, start, end, box_type)
+        if found is None:
+            return None
+        start, end = found
+    return start, end
+
+
+def _read_mvhd(buf, payload):
+    """Duración en segundos a partir de mvhd (versión 0 o 1)"""
+    version = buf[payload]
+    if version == 1:
+        timescale, duration = struct.unpack_from(">IQ", buf, payload + 20)
+    else:
+        timescale, duration = struct.unpack_from(">II", buf, payload + 12)
+    if not timescale:
+        raise Mp4Error("mvhd con timescale 0")
+    return duration / timescale
+
+
+def _read_tkhd_size(buf, payload):
+    """Ancho y alto del track (punto fijo 16.16) a partir de tkhd"""
+    offset = 88 if buf[payload] == 1 else 76
+    width, height = struct.unpack_from(">II", buf, payload + offset)
+    return width >> 16, height >> 16
+
+
+def _read_video_track(buf, trak_start, trak_end):
+    """(ancho, alto, codec) si el track es de video, si no None"""
+    hdlr = _find_path(buf, trak_start, trak_end, b"mdia", b"hdlr")
+    if hdlr is None or bytes(buf[hdlr[0] + 8:hdlr[0] + 12]) != b"vide":
+        return None
+    tkhd = _find(buf, trak_start, trak_end, b"tkhd")
+    width, height = _read_tkhd_size(buf, tkhd[0]) if tkhd else (0, 0)
+    codec = None
+    stsd = _find_path(buf, trak_start, trak_end, b"mdia", b"minf", b"stbl", b"stsd")
+    if stsd is not None and stsd[0] + 16 <= stsd[1]:
+        codec = bytes(buf[stsd[0] + 12:stsd[0] + 16]).decode("latin-1")
+    return width, height, codec
+
+
+@span("probe")
+def probe(path):
+    """
+    Leer duración, resolución y codec de un MP4
+
+    Raises:
+        Mp4Error: si el archivo está vacío, truncado o no tiene moov/mvhd
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        if size == 0:
+            raise Mp4Error("archivo vacío")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            moov = None
+            mdat_seen = False
+            for kind, payload, box_end in _iter_boxes(buf, 0, size):
+                if kind == b"moov":
+                    moov = (payload, box_end, not mdat_seen)
+                    break
+                if kind == b"mdat":
+                    mdat_seen = True
+            if moov is None:
+                raise Mp4Error("no se encontró la caja moov")
+            moov_start, moov_end, faststart = moov
+
+            mvhd = _find(buf, moov_start, moov_end, b"mvhd")
+            if mvhd is None:
+                raise Mp4Error("no se encontró la caja mvhd")
+            duration = _read_mvhd(buf, mvhd[0])
+
+            width = height = 0
+            codec = None
+            for kind, payload, box_end in _iter_boxes(buf, moov_start, moov_end):
+                if kind != b"trak":
+                    continue
+                video = _read_video_track(buf, payload, box_end)
+                if video is not None:
+                    width, height, codec = video
+                    break
+
+    return Mp4Info(path, size, duration, width, height, codec, faststart)
+
+
+def probe_videos(videos_dir, names):
+    """
+    Analizar los videos esperados dentro de videos_dir
+
+    Returns:
+        (infos, problems): {nombre: Mp4Info} y {nombre: motivo} para los que
+        faltan o no se pudieron leer
+    """
+    videos_dir = Path(videos_dir)
+    infos = {}
+    problems = {}
+    for name in names:
+        try:
+            infos[name] = probe(videos_dir / name)
+        except FileNotFoundError:
+            problems[name] = "no encontrado"
+        except (Mp4Error, struct.error) as e:
+            problems[name] = f"corrupto ({e})"
+    return infos, problems
+
+
+def format_duration(seconds):
+    """Segundos → 'm:ss'"""
+    seconds = int(round(seconds))
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Uso: python3 mp4_probe.py video.mp4 [video2.mp4 ...]")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    total = 0.0
+    for arg in sys.argv[1:]:
+        try:
+            info = probe(arg)
+        except (OSError, Mp4Error, struct.error) as e:
+            print(f"❌ {arg}: {e}")
+            continue
+        total += info.duration
+        layout = "faststart" if info.faststart else "moov al final"
+        print(f"✅ {arg}: {format_duration(info.duration)}  {info.width}x{info.height}  "
+              f"{info.codec or '?'}  ({layout})")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"\nDuración total: {format_duration(total)}  (analizado en {elapsed_ms:.1f} ms)")
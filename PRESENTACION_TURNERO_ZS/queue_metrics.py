@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Métricas de la cola de turnos a partir de un export (CSV o JSONL)
+
+Lee el export en bloques de CHUNK_ROWS filas y agrega cada bloque con NumPy
+(sin recorrer las filas en Python), así la memoria queda acotada por el
+tamaño del bloque aunque el export tenga millones de filas. Por cada par
+institución/servicio se acumulan:
+
+- histograma del tiempo de espera (llegada → llamado) en bins de 1 minuto,
+  del que salen los percentiles
+- llamados por hora del día
+- turnos atendidos, pendientes y otros estados
+
+y, para toda la cola, llegadas y llamados por minuto de cada día, de donde
+sale el largo de la cola a lo largo del día (ver chart_specs).
+
+Fuentes soportadas (se detectan por las columnas del encabezado):
+
+- daily_queue (migración 003): una fila por paciente de la cola diaria;
+  llegada = enabled_at (o created_at si no se habilitó)
+- appointment: una fila por turno con el primer check_in de
+  attendance_event y el primer call_event ya unidos (ver EXPORT_SQL);
+  llegada = checked_in_at (o scheduled_at)
+
+Los timestamps se toman como hora local tal como vienen en el export (los
+EXPORT_SQL los convierten a la zona horaria de Argentina). NumPy se importa
+recién al agregar, para que create_presentation no lo requiera si no se
+usan métricas.
+"""
+
+import csv
+import json
+from itertools import islice, repeat
+from pathlib import Path
+
+CHUNK_ROWS = 50_000
+
+# Histograma de espera: un bin por minuto hasta 8 h; el último acumula el resto
+WAIT_BINS = 8 * 60 + 1
+
+MINUTES_PER_DAY = 24 * 60
+
+# Fecha serial 0 de Excel: el eje X de los gráficos de línea usa días desde acá
+EXCEL_EPOCH = "1899-12-30"
+
+ATTENDED = ("atendido", "finalizado")
+PENDING = ("pendiente", "disponible", "esperando")
+STATUS_CATEGORIES = ("atendidos", "pendientes", "otros")
+
+GROUP_COLUMNS = ("institution_id", "service_id", "status")
+
+# Columnas de llegada (con alternativa) y de llamado de cada fuente
+SOURCES = {
+    "daily_queue": {"arrived": ("enabled_at", "created_at"), "called": "called_at"},
+    "appointment": {"arrived": ("checked_in_at", "scheduled_at"), "called": "called_at"},
+}
+
+EXPORT_SQL = {
+    "daily_queue": """\
+COPY (
+  SELECT q.institution_id, i.name AS institution_name,
+         q.service_id, s.name AS service_name, q.status,
+         q.created_at  AT TIME ZONE 'America/Argentina/Buenos_Aires' AS created_at,
+         q.enabled_at  AT TIME ZONE 'America/Argentina/Buenos_Aires' AS enabled_at,
+         q.called_at   AT TIME ZONE 'America/Argentina/Buenos_Aires' AS called_at
+  FROM daily_queue q
+  JOIN institution i ON i.id = q.institution_id
+  JOIN service s ON s.id = q.service_id
+) TO STDOUT WITH CSV HEADER""",
+    "appointment": """\
+COPY (
+  SELECT a.institution_id, i.name AS institution_name,
+         a.service_id, s.name AS service_name, a.status,
+         a.scheduled_at AT TIME ZONE 'America/Argentina/Buenos_Aires' AS scheduled_at,
+         (SELECT min(e.occurred_at) FROM attendance_event e
+           WHERE e.appointment_id = a.id AND e.event_type = 'check_in')
+           AT TIME ZONE 'America/Argentina/Buenos_Aires' AS checked_in_at,
+         (SELECT min(c.called_at) FROM call_event c WHERE c.appointment_id = a.id)
+           AT TIME ZONE 'America/Argentina/Buenos_Aires' AS called_at
+  FROM appointment a
+  JOIN institution i ON i.id = a.institution_id
+  JOIN service s ON s.id = a.service_id
+) TO STDOUT WITH CSV HEADER""",
+}
+
+
+def detect_source(columns):
+    """Nombre de la fuente según las columnas del export"""
+    columns = set(columns)
+    missing = [c for c in GROUP_COLUMNS if c not in columns]
+    if missing:
+        raise ValueError(f"Faltan columnas en el export: {', '.join(missing)}")
+    for name, spec in SOURCES.items():
+        if spec["arrived"][0] in columns and spec["called"] in columns:
+            return name
+    raise ValueError("No se reconoce el export: se esperan las columnas de daily_queue "
+                     "(enabled_at, called_at) o de appointment (checked_in_at, called_at)")
+
+
+def iter_chunks(path, chunk_rows=CHUNK_ROWS):
+    """
+    Bloques del export como dict columna → lista de valores
+
+    CSV: csv.reader y la transposición (zip) corren en C. JSONL: cada bloque
+    de líneas se parsea con un solo json.loads.
+    """
+    path = Path(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            columns = None
+            while True:
+                lines = [line for line in islice(f, chunk_rows) if line.strip()]
+                if not lines:
+                    return
+                rows = json.loads("[" + ",".join(lines) + "]")
+                columns = columns or list(rows[0])
+                yield {c: list(map(dict.get, rows, repeat(c))) for c in columns}
+        else:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            while True:
+                rows = list(islice(reader, chunk_rows))
+                if not rows:
+                    return
+                yield dict(zip(header, zip(*rows)))
+
+
+def _parse_times(np, values):
+    """
+    Timestamps ISO o de Postgres → datetime64[s]; vacíos y null → NaT
+
+    Se truncan a "AAAA-MM-DD HH:MM:SS" (19 caracteres: sin fracción ni zona
+    horaria) y el separador de la posición 10 se pone en "T" sobre la vista
+    de caracteres, sin operaciones por string.
+    """
+    text = np.array(values, dtype="U19")
+    missing = (text == "") | (text == "None")
+    text.view("U1").reshape(len(text), 19)[:, 10] = "T"
+    text[missing] = "NaT"
+    return text.astype("datetime64[s]")
+
+
+def _label(name, ident):
+    return name if name else ident[:8]
+
+
+class QueueMetrics:
+    """Acumuladores por grupo (institución, servicio)"""
+
+    def __init__(self, source):
+        import numpy as np
+
+        self.source = source
+        self.groups = {}                        # (institution_id, service_id) → índice
+        self.labels = []                        # (institución, servicio) legibles
+        self.wait_hist = np.zeros((0, WAIT_BINS), dtype=np.int64)
+        self.calls_by_hour = np.zeros((0, 24), dtype=np.int64)
+        self.status = np.zeros((0, len(STATUS_CATEGORIES)), dtype=np.int64)
+        self.days = set()                       # días con llamados
+        self.minute_events = {}                 # día → [llegadas, llamados] por minuto
+        self.rows = 0
+
+    def _group_codes(self, np, columns):
+        """Índice de grupo de cada fila (los grupos nuevos se agregan a los acumuladores)"""
+        keys = np.char.add(np.char.add(np.asarray(columns["institution_id"], dtype=str), "|"),
+                           np.asarray(columns["service_id"], dtype=str))
+        unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+        inst_names = columns.get("institution_name")
+        svc_names = columns.get("service_name")
+        lookup = np.empty(len(unique), dtype=np.int64)
+        for i, (key, row) in enumerate(zip(unique.tolist(), first.tolist())):
+            inst_id, svc_id = key.split("|", 1)
+            index = self.groups.get((inst_id, svc_id))
+            if index is None:
+                index = self.groups[(inst_id, svc_id)] = len(self.labels)
+                self.labels.append((_label(inst_names and inst_names[row], inst_id),
+                                    _label(svc_names and svc_names[row], svc_id)))
+            lookup[i] = index
+
+        grow = len(self.labels) - len(self.status)
+        if grow:
+            self.wait_hist = np.vstack([self.wait_hist, np.zeros((grow, WAIT_BINS), np.int64)])
+            self.calls_by_hour = np.vstack([self.calls_by_hour, np.zeros((grow, 24), np.int64)])
+            self.status = np.vstack([self.status,
+                                     np.zeros((grow, len(STATUS_CATEGORIES)), np.int64)])
+        return lookup[inverse]
+
+    def add_chunk(self, columns):
+        """Agregar un bloque de filas (dict columna → valores)"""
+        import numpy as np
+
+        spec = SOURCES[self.source]
+        codes = self._group_codes(np, columns)
+        groups = len(self.labels)
+        self.rows += len(codes)
+
+        status = np.asarray(columns["status"], dtype=str)
+        category = np.full(len(status), 2)
+        category[np.isin(status, PENDING)] = 1
+        category[np.isin(status, ATTENDED)] = 0
+        self.status += np.bincount(codes * 3 + category,
+                                   minlength=groups * 3).reshape(groups, 3)
+
+        preferred, fallback = spec["arrived"]
+        arrived = _parse_times(np, columns[preferred])
+        if fallback in columns:
+            missing = np.isnat(arrived)
+            arrived[missing] = _parse_times(np, columns[fallback])[missing]
+        called = _parse_times(np, columns[spec["called"]])
+        self._add_minute_events(np, 0, arrived[~np.isnat(arrived)])
+        self._add_minute_events(np, 1, called[~np.isnat(called)])
+
+        was_called = ~np.isnat(called)
+        call_codes = codes[was_called]
+        called = called[was_called]
+        days = called.astype("datetime64[D]")
+        hours = (called - days).astype("timedelta64[h]").astype(np.int64)
+        self.calls_by_hour += np.bincount(call_codes * 24 + hours,
+                                          minlength=groups * 24).reshape(groups, 24)
+        self.days.update(np.unique(days).tolist())
+
+        # Segundos de espera; sin llegada registrada da NaT (mínimo int64) y se descarta
+        wait = (called - arrived[was_called]).astype(np.int64)
+        valid = wait >= 0
+        minutes = np.minimum(wait[valid] // 60, WAIT_BINS - 1)
+        self.wait_hist += np.bincount(call_codes[valid] * WAIT_BINS + minutes,
+                                      minlength=groups * WAIT_BINS).reshape(groups, WAIT_BINS)
+
+    def _add_minute_events(self, np, row, times):
+        """Contar `times` por día y minuto en la fila `row` de minute_events"""
+        if not len(times):
+            return
+        days = times.astype("datetime64[D]")
+        first = days.min()
+        offsets = (days - first).astype(np.int64)
+        minutes = (times - days).astype("timedelta64[m]").astype(np.int64)
+        span = (int(offsets.max()) + 1) * MINUTES_PER_DAY
+        counts = np.bincount(offsets * MINUTES_PER_DAY + minutes,
+                             minlength=span).reshape(-1, MINUTES_PER_DAY)
+        for offset in np.flatnonzero(counts.any(axis=1)).tolist():
+            day = first + offset
+            events = self.minute_events.get(day)
+            if events is None:
+                events = self.minute_events[day] = np.zeros((2, MINUTES_PER_DAY), np.int64)
+            events[row] += counts[offset]
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def _select(self, by):
+        """Índices de grupo agrupados por institución (0) o servicio (1)"""
+        selected = {}
+        for index, label in enumerate(self.labels):
+            selected.setdefault(label[by], []).append(index)
+        return selected
+
+    def wait_percentiles(self, quantiles=(50, 90, 95), rows=None):
+        """
+        Percentiles de espera en minutos (cota superior del bin de 1 minuto)
+
+        `rows` limita a esos grupos; None = todos. Devuelve None por
+        percentil si no hay esperas registradas.
+        """
+        import numpy as np
+
+        hist = self.wait_hist if rows is None else self.wait_hist[rows]
+        cumulative = np.cumsum(hist.sum(axis=0))
+        total = cumulative[-1] if len(cumulative) else 0
+        if not total:
+            return {q: None for q in quantiles}
+        return {q: int(np.searchsorted(cumulative, q / 100 * total)) + 1 for q in quantiles}
+
+    def calls_per_hour(self):
+        """Llamados promedio por día para cada hora (0-23)"""
+        totals = self.calls_by_hour.sum(axis=0)
+        return (totals / max(len(self.days), 1)).tolist()
+
+    def queue_length(self):
+        """
+        Largo de la cola minuto a minuto: (fechas seriales de Excel, largo)
+
+        Por día, llegadas menos llamados acumulados desde la medianoche,
+        entre el primer y el último evento del día; los días sin eventos se
+        omiten.
+        """
+        import numpy as np
+
+        epoch = np.datetime64(EXCEL_EPOCH, "D")
+        serials, lengths = [], []
+        for day in sorted(self.minute_events):
+            arrivals, calls = self.minute_events[day]
+            active = np.flatnonzero(arrivals + calls)
+            span = slice(active[0], active[-1] + 1)
+            length = np.maximum(np.cumsum(arrivals - calls), 0)[span]
+            minutes = np.arange(MINUTES_PER_DAY)[span]
+            serials.append((day - epoch).astype(np.int64) + minutes / MINUTES_PER_DAY)
+            lengths.append(length)
+        if not serials:
+            return [], []
+        return np.concatenate(serials).tolist(), np.concatenate(lengths).tolist()
+
+    def status_by(self, by):
+        """{institución o servicio: (atendidos, pendientes, otros)}, de mayor a menor volumen"""
+        counts = {name: tuple(int(v) for v in self.status[rows].sum(axis=0))
+                  for name, rows in self._select(0 if by == "institution" else 1).items()}
+        return dict(sorted(counts.items(), key=lambda item: -sum(item[1])))
+
+    def wait_by_service(self):
+        """{servicio: percentiles de espera}, de mayor a menor volumen"""
+        services = self._select(1)
+        return {name: self.wait_percentiles((50, 90), services[name])
+                for name in self.status_by("service")}
+
+
+def aggregate(path, source=None, chunk_rows=CHUNK_ROWS):
+    """Leer el export completo en bloques y devolver sus QueueMetrics"""
+    metrics = None
+    for columns in iter_chunks(path, chunk_rows):
+        if metrics is None:
+            metrics = QueueMetrics(source or detect_source(columns))
+        metrics.add_chunk(columns)
+    if metrics is None:
+        raise ValueError(f"El export {path} está vacío")
+    return metrics
+
+
+# ============================================================================
+# SLIDE DE MÉTRICAS
+# ============================================================================
+
+MAX_GROUP_LINES = 5
+
+
+def _number(value):
+    return f"{value:,}".replace(",", ".")
+
+
+def _decimal(value):
+    return f"{value:.1f}".replace(".", ",")
+
+
+def _minutes(value):
+    return "sin datos" if value is None else f"{value} min"
+
+
+def metrics_points(metrics):
+    """(columna izquierda, columna derecha) con los números del export"""
+    attended, pending, other = (int(v) for v in metrics.status.sum(axis=0))
+    wait = metrics.wait_percentiles()
+    per_hour = metrics.calls_per_hour()
+    peak = max(range(24), key=per_hour.__getitem__)
+
+    left = [
+        f"📊 {_number(metrics.rows)} turnos analizados ({len(metrics.days)} días)",
+        "",
+        "⏱️ Tiempo de espera hasta el llamado:",
+        f"  • Mediana (p50): {_minutes(wait[50])}",
+        f"  • p90: {_minutes(wait[90])} · p95: {_minutes(wait[95])}",
+        "",
+        "📢 Llamados por hora (promedio diario):",
+        f"  • Pico: {peak:02d}:00 con {_decimal(per_hour[peak])} llamados",
+        f"  • Promedio en horas activas: "
+        f"{_decimal(sum(per_hour) / max(sum(1 for v in per_hour if v), 1))}",
+        "",
+        f"✅ Atendidos: {_number(attended)} · ⏳ Pendientes: {_number(pending)}"
+        f" · Otros: {_number(other)}",
+    ]
+
+    right = ["🏥 Por institución (atendidos / pendientes):"]
+    for name, (done, waiting, _) in islice(metrics.status_by("institution").items(),
+                                           MAX_GROUP_LINES):
+        right.append(f"  • {name}: {_number(done)} / {_number(waiting)}")
+    right += ["", "🩺 Por servicio (espera p50 / p90):"]
+    for name, percentiles in islice(metrics.wait_by_service().items(), MAX_GROUP_LINES):
+        right.append(f"  • {name}: {_minutes(percentiles[50])} / {_minutes(percentiles[90])}")
+    return left, right
+
+
+def chart_specs(metrics):
+    """
+    Slides "chart" con el largo de la cola y la espera por servicio
+
+    El largo de la cola va minuto a minuto (decenas de miles de puntos con
+    un par de meses de export); create_presentation lo reduce antes de
+    escribirlo.
+    """
+    charts = []
+    serials, lengths = metrics.queue_length()
+    if serials:
+        charts.append({
+            "kind": "chart", "chart": "line", "title": "Largo de la Cola en el Día",
+            "x_title": "Fecha y hora", "y_title": "Pacientes esperando",
+            "x_format": "dd/mm hh:mm",
+            "series": [{"name": "En espera", "x": serials, "y": lengths}],
+        })
+
+    waits = [(name, p) for name, p in metrics.wait_by_service().items() if p[50] is not None]
+    waits = waits[:MAX_GROUP_LINES]
+    if waits:
+        charts.append({
+            "kind": "chart", "chart": "bar", "title": "Espera por Servicio",
+            "y_title": "Minutos hasta el llamado",
+            "categories": [name for name, _ in waits],
+            "series": [{"name": "p50", "values": [p[50] for _, p in waits]},
+                       {"name": "p90", "values": [p[90] for _, p in waits]}],
+        })
+    return charts
+
+
+def fill_metrics_slides(slides, metrics):
+    """
+    Copia de la spec con los slides marcados con "metrics" completados
+
+    El slide conserva su título y pasa a dos columnas con los números del
+    export; así no cambia la cantidad ni la posición de los slides (los
+    videos se ubican por índice). Los gráficos de chart_specs se agregan
+    antes del slide de cierre (el último, si es de título), después de
+    todos los slides con video.
+    """
+    left, right = metrics_points(metrics)
+    filled = []
+    for spec in slides:
+        if spec.get("metrics"):
+            spec = {"kind": "two_column", "title": spec["title"], "left": left, "right": right}
+        filled.append(spec)
+    closing = len(filled) - 1 if filled and filled[-1]["kind"] == "title" else len(filled)
+    filled[closing:closing] = chart_specs(metrics)
+    return filled
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from deck_trace import peak_rss_kb
+
+    parser = argparse.ArgumentParser(description="Calcular métricas de la cola desde un export")
+    parser.add_argument("export", nargs="?", help="Export CSV o JSONL")
+    parser.add_argument("--source", choices=SOURCES, help="Fuente (por defecto se detecta)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS,
+                        help="Filas por bloque (por defecto 50.000)")
+    parser.add_argument("--sql", choices=EXPORT_SQL, help="Mostrar la consulta de export y salir")
+    args = parser.parse_args()
+
+    if args.sql:
+        print(EXPORT_SQL[args.sql])
+        raise SystemExit(0)
+    if not args.export:
+        parser.error("falta el export")
+
+    start = time.perf_counter()
+    metrics = aggregate(args.export, args.source, args.chunk_rows)
+    elapsed = time.perf_counter() - start
+
+    left, right = metrics_points(metrics)
+    print("\n".join(left + [""] + right))
+    peak_kb = peak_rss_kb()
+    memory = f", memoria maxima {peak_kb / 1024:.0f} MB" if peak_kb is not None else ""
+    print(f"\n[INFO] Fuente: {metrics.source}, {_number(metrics.rows)} filas en {elapsed:.1f} s "
+          f"({metrics.rows / max(elapsed, 1e-9):,.0f} filas/s){memory}")
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Slide master y layouts de la demo
+
+En vez de repetir tamaño, color y espaciado en cada párrafo de cada slide,
+apply_master_styles escribe la paleta en el tema y los estilos de título,
+cuerpo y columnas en el master y en cuatro layouts propios. Los slides usan
+placeholders de esos layouts y heredan todo el formato.
+
+Paleta en el tema (la usan el master y los layouts vía schemeClr):
+    dk2 (tx2) = COLOR_DARK, lt2 (bg2) = COLOR_LIGHT,
+    accent1 = COLOR_PRIMARY, accent2 = COLOR_SECONDARY, accent3 = COLOR_ACCENT
+"""
+
+from lxml import etree
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import qn
+from pptx.util import Inches
+
+NS_DECLS = ('xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+            'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"')
+
+# Layouts del template por defecto que se reemplazan por los de la demo
+# (Title Slide, Title and Content, Two Content, Title Only)
+LAYOUT_NAMES = {
+    "title": "Turnero - Título",
+    "content": "Turnero - Contenido",
+    "two_column": "Turnero - Dos columnas",
+    "chart": "Turnero - Gráfico",
+}
+_LAYOUT_INDEX = {"title": 0, "content": 1, "two_column": 3, "chart": 5}
+
+# idx del placeholder de "📹 Video: ..." en el layout de contenido
+VIDEO_INFO_IDX = 13
+
+
+def _fill(scheme_color):
+    return f'<a:solidFill><a:schemeClr val="{scheme_color}"/></a:solidFill>'
+
+
+def _spacing(before, after):
+    return (f'<a:spcBef><a:spcPts val="{before * 100}"/></a:spcBef>'
+            f'<a:spcAft><a:spcPts val="{after * 100}"/></a:spcAft>')
+
+
+def _lvl1(attrs="", spacing="", size=None, extra_rpr="", color=None):
+    """a:lvl1pPr con el formato por defecto del primer nivel"""
+    rpr = f' sz="{size * 100}"' if size else ""
+    fill = _fill(color) if color else ""
+    return (f"<a:lvl1pPr{attrs}>{spacing}<a:defRPr{rpr}{extra_rpr}>{fill}</a:defRPr>"
+            f"</a:lvl1pPr>")
+
+
+def _xfrm(left, top, width, height):
+    return (f'<a:xfrm><a:off x="{Inches(left)}" y="{Inches(top)}"/>'
+            f'<a:ext cx="{Inches(width)}" cy="{Inches(height)}"/></a:xfrm>')
+
+
+def _placeholder(shape_id, name, ph, box, wrap="square", lvl1=""):
+    """p:sp de un placeholder de layout, con auto-ajuste como los cuadros de texto"""
+    return (f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="{name}"/>'
+            f'<p:cNvSpPr><a:spLocks noGrp="1"/></p:cNvSpPr><p:nvPr>{ph}</p:nvPr></p:nvSpPr>'
+            f'<p:spPr>{_xfrm(*box)}</p:spPr>'
+            f'<p:txBody><a:bodyPr wrap="{wrap}" anchor="t"><a:spAutoFit/></a:bodyPr>'
+            f'<a:lstStyle>{lvl1}</a:lstStyle>'
+            f'<a:p><a:r><a:rPr lang="es-AR"/><a:t>{name}</a:t></a:r></a:p></p:txBody></p:sp>')
+
+
+def _top_bar(shape_id):
+    """Línea de color en top (parte del layout, no de cada slide)"""
+    return (f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="Barra superior"/><p:cNvSpPr/>'
+            f'<p:nvPr userDrawn="1"/></p:nvSpPr>'
+            f'<p:spPr>{_xfrm(0, 0, 10, 0.1)}<a:prstGeom prst="rect"><a:avLst/></a:prstGeom>'
+            f'{_fill("accent1")}<a:ln>{_fill("accent1")}</a:ln></p:spPr></p:sp>')
+
+
+def _title_placeholder(shape_id):
+    return _placeholder(shape_id, "Título", '<p:ph type="title"/>', (0.5, 0.3, 9, 0.8),
+                        wrap="none")
+
+
+def _layout_xml(layout_type, name, shapes, background=""):
+    return (f'<p:sldLayout {NS_DECLS} type="{layout_type}" preserve="1">'
+            f'<p:cSld name="{name}">{background}'
+            f'<p:spTree><p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/>'
+            f'</p:nvGrpSpPr><p:grpSpPr/>{"".join(shapes)}</p:spTree></p:cSld>'
+            f'<p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sldLayout>')
+
+
+def _title_layout():
+    centered = ' marL="0" indent="0" algn="ctr"'
+    return _layout_xml("title", LAYOUT_NAMES["title"], [
+        _placeholder(2, "Título", '<p:ph type="ctrTitle"/>', (0.5, 2.5, 9, 1.5), wrap="none",
+                     lvl1=_lvl1(centered, size=60, extra_rpr=' b="1"', color="bg1")),
+        _placeholder(3, "Subtítulo", '<p:ph type="subTitle" idx="1"/>', (0.5, 4.2, 9, 2),
+                     lvl1=_lvl1(centered, _spacing(0, 0), size=28, color="bg1")),
+    ], background=f"<p:bg><p:bgPr>{_fill('accent1')}<a:effectLst/></p:bgPr></p:bg>")
+
+
+def _content_layout():
+    return _layout_xml("obj", LAYOUT_NAMES["content"], [
+        _top_bar(2),
+        _title_placeholder(3),
+        _placeholder(4, "Contenido", '<p:ph idx="1"/>', (0.7, 1.3, 8.6, 5)),
+        _placeholder(5, "Video", f'<p:ph type="body" sz="quarter" idx="{VIDEO_INFO_IDX}"/>',
+                     (0.7, 6.2, 8.6, 0.9),
+                     lvl1=_lvl1(spacing=_spacing(0, 0), size=14, extra_rpr=' i="1"',
+                                color="accent2")),
+    ])
+
+
+def _two_column_layout():
+    column = _lvl1(spacing=_spacing(4, 4), size=16)
+    return _layout_xml("twoObj", LAYOUT_NAMES["two_column"], [
+        _top_bar(2),
+        _title_placeholder(3),
+        _placeholder(4, "Columna izquierda", '<p:ph sz="half" idx="1"/>', (0.5, 1.3, 4.5, 5.8),
+                     lvl1=column),
+        _placeholder(5, "Columna derecha", '<p:ph sz="half" idx="2"/>', (5.2, 1.3, 4.3, 5.8),
+                     lvl1=column),
+    ])
+
+
+def _chart_layout():
+    return _layout_xml("titleOnly", LAYOUT_NAMES["chart"], [_top_bar(2), _title_placeholder(3)])
+
+
+_LAYOUTS = {
+    "title": _title_layout,
+    "content": _content_layout,
+    "two_column": _two_column_layout,
+    "chart": _chart_layout,
+}
+
+_FONT = ('<a:latin typeface="+mn-lt"/><a:ea typeface="+mn-ea"/>'
+         '<a:cs typeface="+mn-cs"/>')
+
+_TITLE_STYLE = (
+    '<a:lvl1pPr algn="l" defTabSz="457200" rtl="0" eaLnBrk="1" latinLnBrk="0" '
+    'hangingPunct="1"><a:spcBef><a:spcPct val="0"/></a:spcBef><a:buNone/>'
+    f'<a:defRPr sz="4400" b="1" kern="1200">{_fill("tx2")}{_FONT}</a:defRPr></a:lvl1pPr>')
+
+_BODY_STYLE = (
+    '<a:lvl1pPr marL="0" indent="0" algn="l" defTabSz="457200" rtl="0" eaLnBrk="1" '
+    f'latinLnBrk="0" hangingPunct="1">{_spacing(6, 6)}<a:buNone/>'
+    f'<a:defRPr sz="1800" kern="1200">{_fill("tx2")}{_FONT}</a:defRPr></a:lvl1pPr>')
+
+
+def _replace_element(target, xml):
+    """Reemplazar atributos e hijos de `target` conservando el elemento raíz"""
+    source = parse_xml(xml)
+    target.attrib.clear()
+    target.attrib.update(source.attrib)
+    for child in list(target):
+        target.remove(child)
+    target.extend(list(source))
+
+
+def _replace_lvl1(style, xml):
+    old = style.find(qn("a:lvl1pPr"))
+    new = parse_xml(f"<p:bodyStyle {NS_DECLS}>{xml}</p:bodyStyle>")[0]
+    old.addprevious(new)
+    style.remove(old)
+
+
+def _apply_palette(master, palette):
+    theme_part = master.part.part_related_by(RT.THEME)
+    theme = etree.fromstring(theme_part.blob)
+    scheme = theme.find(f".//{qn('a:clrScheme')}")
+    scheme.set("name", "Turnero ZS")
+    for slot, color in palette.items():
+        entry = scheme.find(qn(f"a:{slot}"))
+        for child in list(entry):
+            entry.remove(child)
+        etree.SubElement(entry, qn("a:srgbClr"), val=str(color))
+    theme_part._blob = etree.tostring(theme, encoding="UTF-8", standalone=True)
+
+
+def apply_palette(prs, primary, secondary, accent, dark, light):
+    """
+    Escribir la paleta en el tema de `prs`
+
+    Los layouts y estilos solo referencian colores del tema, así que a una
+    presentación que ya tiene los estilos de la demo le basta con esto para
+    cambiar de paleta.
+    """
+    _apply_palette(prs.slide_master, {"dk2": dark, "lt2": light, "accent1": primary,
+                                      "accent2": secondary, "accent3": accent})
+
+
+def apply_master_styles(prs, primary, secondary, accent, dark, light):
+    """
+    Escribir paleta, estilos de texto y layouts de la demo en `prs`
+
+    Se hace una vez por presentación, antes de agregar slides.
+    """
+    master = prs.slide_master
+    apply_palette(prs, primary, secondary, accent, dark, light)
+
+    tx_styles = master._element.find(qn("p:txStyles"))
+    _replace_lvl1(tx_styles.find(qn("p:titleStyle")), _TITLE_STYLE)
+    _replace_lvl1(tx_styles.find(qn("p:bodyStyle")), _BODY_STYLE)
+
+    layouts = prs.slide_layouts
+    for kind, build in _LAYOUTS.items():
+        _replace_element(layouts[_LAYOUT_INDEX[kind]]._element, build())
+
+
+def master_layout(prs, kind):
+    """Layout de la demo para `kind`, o None si `prs` no tiene los estilos del master"""
+    return prs.slide_layouts.get_by_name(LAYOUT_NAMES[kind])
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Comparar formato directo (inline) contra formato en el slide master
+
+Construye la presentación en los dos modos de create_presentation para la
+spec actual y para una spec sintética grande, y muestra tamaño del XML de
+los slides, tamaño del .pptx, tiempo de build y tiempo de reapertura con
+python-pptx (aproximación al costo de carga).
+"""
+
+import io
+import json
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from pptx import Presentation
+
+from create_presentation import SPEC_PATH, STYLINGS, build_presentation, load_spec
+from deck_writer import save_presentation
+
+
+def synthetic_spec(base_slides, count):
+    """`count` slides ciclando los de la spec real, con el número en el título"""
+    slides = []
+    for i in range(count):
+        spec = dict(base_slides[i % len(base_slides)])
+        spec["title"] = f"{spec['title']} #{i + 1}"
+        slides.append(spec)
+    return {"slides": slides}
+
+
+def measure(spec_path, styling):
+    """Construir y guardar en memoria; devuelve las métricas del build"""
+    start = time.perf_counter()
+    prs, _ = build_presentation(spec_path, cache_dir=None, styling=styling)
+    buffer = io.BytesIO()
+    save_presentation(prs, buffer)
+    build_time = time.perf_counter() - start
+
+    with zipfile.ZipFile(buffer) as zf:
+        slide_xml = sum(info.file_size for info in zf.infolist()
+                        if info.filename.startswith("ppt/slides/slide"))
+
+    buffer.seek(0)
+    start = time.perf_counter()
+    reopened = Presentation(buffer)
+    for slide in reopened.slides:
+        for shape in slide.shapes:
+            if shape.has_text_frame:
+                shape.text_frame.text
+    load_time = time.perf_counter() - start
+
+    return {"slides": len(prs.slides), "slide_xml": slide_xml,
+            "pptx": len(buffer.getvalue()), "build": build_time, "load": load_time}
+
+
+def print_comparison(label, results):
+    before, after = results["inline"], results["master"]
+    print(f"\n{label} ({before['slides']} slides)")
+    print(f"  {'':18}{'inline':>12}{'master':>12}{'cambio':>10}")
+    rows = [("XML de slides", "slide_xml", "{:,} B"), ("Tamaño .pptx", "pptx", "{:,} B"),
+            ("Build", "build", "{:.2f} s"), ("Reapertura", "load", "{:.2f} s")]
+    for name, key, fmt in rows:
+        change = (after[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+        print(f"  {name:18}{fmt.format(before[key]):>12}{fmt.format(after[key]):>12}"
+              f"{change:>+9.0f}%")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Comparar estilos inline vs slide master")
+    parser.add_argument("--spec", default=str(SPEC_PATH), help="Spec JSON de los slides")
+    parser.add_argument("--synthetic", type=int, default=1000,
+                        help="Slides de la spec sintética (0 para omitirla)")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    report = {"actual": {styling: measure(args.spec, styling) for styling in STYLINGS}}
+    print_comparison("Presentación actual", report["actual"])
+
+    if args.synthetic:
+        with tempfile.TemporaryDirectory() as tmp:
+            spec_path = Path(tmp) / "slides.json"
+            spec_path.write_text(json.dumps(synthetic_spec(load_spec(args.spec), args.synthetic),
+                                            ensure_ascii=False), encoding="utf-8")
+            report["sintetica"] = {styling: measure(spec_path, styling)
+                                   for styling in STYLINGS}
+        print_comparison("Presentación sintética", report["sintetica"])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
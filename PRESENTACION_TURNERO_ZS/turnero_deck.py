@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+turnero-deck: línea de comandos única para la presentación de Turnero ZS
+
+    turnero-deck build    generar el .pptx desde slides.json (con videos si se
+                          pasa --videos-dir)
+    turnero-deck videos   insertar los videos en un .pptx ya generado
+    turnero-deck check    verificar la carpeta de videos (faltantes, corruptos)
+    turnero-deck validate verificar un .pptx antes de distribuirlo (CRC, content
+                          types, relaciones, videos vinculados)
+    turnero-deck compact  quitar layouts sin usar y partes huérfanas de un .pptx
+
+Los imports pesados (python-pptx, lxml, NumPy) se hacen dentro del
+subcomando que los usa: `--help` y `check` no cargan python-pptx y
+arrancan en decenas de milisegundos. `python3 deck_bench.py --startup` mide
+los imports con -X importtime contra STARTUP_BUDGET_MS.
+
+create_presentation.py, insert_videos_pptx.py y video_manifest.py siguen
+funcionando como scripts sueltos con las mismas opciones.
+"""
+
+import argparse
+import sys
+
+from deck_policy import add_policy_arguments, policy_from_args
+from deck_trace import add_trace_arguments, phase, tracing
+
+PROG = "turnero-deck"
+STYLINGS = ("master", "inline")     # los de create_presentation.STYLINGS
+
+
+def cmd_build(args):
+    from create_presentation import CACHE_DIR, OUTPUT_PATH, SPEC_PATH
+    from deck_charts import CHART_MAX_POINTS
+    from deck_pipeline import build_deck
+
+    metrics = None
+    if args.metrics:
+        from queue_metrics import aggregate
+        metrics = aggregate(args.metrics)
+        print(f"[INFO] Metricas calculadas de {metrics.rows} filas ({metrics.source})")
+
+    result = build_deck(args.output or OUTPUT_PATH, spec_path=args.spec or SPEC_PATH,
+                        videos_dir=args.videos_dir,
+                        cache_dir=None if args.no_cache else CACHE_DIR,
+                        styling=args.styling, metrics=metrics,
+                        chart_points=(CHART_MAX_POINTS if args.chart_points is None
+                                      else args.chart_points),
+                        policy=policy_from_args(args), linked=args.linked,
+                        compact=args.compact)
+    state = "sin cambios desde el último build" if result.cached else "creada"
+    print(f"[OK] Presentacion {state}: {result.output_path}")
+    if result.sha256:
+        print(f"[INFO] SHA-256: {result.sha256}")
+    print(f"[INFO] Slides: {result.slides} ({result.reused} del cache, "
+          f"{result.rendered} renderizados)")
+    for title, raw, kept in result.charts:
+        print(f"[INFO] Grafico '{title}': {kept} de {raw} puntos")
+    if result.compacted:
+        from insert_videos_pptx import print_compact_line
+        print_compact_line(result.compacted)
+    if result.videos is not None:
+        from insert_videos_pptx import print_bundle_summary, print_video_summary
+        print_video_summary(result.videos, result.streamed_bytes, args.videos_dir)
+        if args.linked:
+            from media_bundle import write_bundle
+            print_bundle_summary(write_bundle(result.output_path, result.videos["linked"]))
+    return 0
+
+
+def cmd_videos(args):
+    policy = policy_from_args(args)
+    if args.patch:
+        from deck_patch import patch_videos
+        with phase("patch") as info:
+            stats = patch_videos(args.pptx, args.videos_dir, policy=policy)
+            info.update(stats)
+        print(f"[OK] {args.pptx}: {stats['inserted']} videos insertados, "
+              f"{stats['missing']} placeholders, {stats['unchanged']} slides sin cambios")
+        print(f"[INFO] Partes reescritas: {stats['rewritten']}, copiado sin recomprimir: "
+              f"{stats['copied_bytes'] / (1024 * 1024):.1f} MB")
+        if args.compact:
+            cmd_compact(args)
+    else:
+        from insert_videos_pptx import insert_all_videos
+        insert_all_videos(args.pptx, args.videos_dir, policy, args.linked, args.compact)
+    return 0
+
+
+def cmd_compact(args):
+    from deck_compact import compact_package, print_compact_summary
+
+    output = getattr(args, "output", None)
+    with phase("compact") as info:
+        stats = compact_package(args.pptx, output, policy_from_args(args))
+        info.update(stats)
+    print(f"[OK] {output or args.pptx}")
+    print_compact_summary(stats)
+    return 0
+
+
+def cmd_check(args):
+    from video_manifest import print_report, verify_videos
+    from video_map import VIDEOS, video_names
+
+    report = verify_videos(args.videos_dir, video_names(VIDEOS), args.rehash)
+    print_report(report)
+    return 1 if report.by_status("missing") or report.by_status("corrupt") else 0
+
+
+def cmd_validate(args):
+    from deck_validate import print_report, validate_package
+
+    reports = [validate_package(deck) for deck in args.decks]
+    for report in reports:
+        print_report(report)
+    return 0 if all(report.ok for report in reports) else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog=PROG, description="Generar la presentación de Turnero ZS y sus videos")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="COMANDO")
+
+    build = commands.add_parser("build", help="Generar el .pptx desde la spec de slides")
+    build.add_argument("--spec", help="Spec JSON de los slides (por defecto slides.json)")
+    build.add_argument("--output",
+                       help="Archivo .pptx de salida (por defecto Turnero_ZS_Presentacion.pptx)")
+    build.add_argument("--videos-dir", help="Carpeta de videos (sin esto no se insertan)")
+    build.add_argument("--linked", action="store_true",
+                       help="Vincular los videos en lugar de embeberlos")
+    build.add_argument("--metrics", metavar="EXPORT",
+                       help="Export CSV/JSONL de turnos para el slide de métricas")
+    build.add_argument("--chart-points", type=int,
+                       help="Puntos por serie en los gráficos (0 = sin reducir; por defecto 500)")
+    build.add_argument("--no-cache", action="store_true",
+                       help="Renderizar todos los slides sin usar el cache")
+    build.add_argument("--styling", choices=STYLINGS, default=STYLINGS[0],
+                       help="Formato en el slide master (master) o en cada párrafo (inline)")
+    build.add_argument("--compact", action="store_true",
+                       help="Quitar los layouts que ningún slide usa")
+    add_policy_arguments(build)
+    add_trace_arguments(build)
+    build.set_defaults(func=cmd_build)
+
+    videos = commands.add_parser("videos", help="Insertar los videos en un .pptx existente")
+    videos.add_argument("pptx", help=".pptx al que se le agregan los videos")
+    videos.add_argument("--videos-dir", default="videos_demo", help="Carpeta de los videos")
+    videos.add_argument("--patch", action="store_true",
+                        help="Actualizar el archivo a nivel ZIP, reescribiendo solo los "
+                             "slides que cambian")
+    videos.add_argument("--linked", action="store_true",
+                        help="Vincular los videos en lugar de embeberlos")
+    videos.add_argument("--compact", action="store_true",
+                        help="Quitar layouts sin usar y partes huérfanas")
+    add_policy_arguments(videos)
+    add_trace_arguments(videos)
+    videos.set_defaults(func=cmd_videos)
+
+    check = commands.add_parser("check", help="Verificar la carpeta de videos")
+    check.add_argument("videos_dir", nargs="?", default="videos_demo",
+                       help="Carpeta de los videos (por defecto videos_demo)")
+    check.add_argument("--rehash", action="store_true",
+                       help="Volver a leer todos los videos aunque no hayan cambiado")
+    check.set_defaults(func=cmd_check)
+
+    validate = commands.add_parser("validate", help="Verificar un .pptx sin abrirlo")
+    validate.add_argument("decks", nargs="+", help="Archivos .pptx a validar")
+    validate.set_defaults(func=cmd_validate)
+
+    compact = commands.add_parser("compact",
+                                  help="Quitar layouts sin usar y partes huérfanas de un .pptx")
+    compact.add_argument("pptx", help=".pptx a compactar")
+    compact.add_argument("--output", help="Archivo de salida (por defecto se reemplaza el .pptx)")
+    add_policy_arguments(compact)
+    add_trace_arguments(compact)
+    compact.set_defaults(func=cmd_compact)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "videos" and args.linked and args.patch:
+        parser.error("--linked no se puede combinar con --patch")
+    with tracing(getattr(args, "trace", None), getattr(args, "profile", None)):
+        return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Verificación de la carpeta de videos con un manifest persistente
+
+Una sola pasada de os.scandir sobre videos_demo/ contra los nombres
+esperados (VIDEOS), en lugar de un exists() y un probe() por video. Lo que
+se sabe de cada archivo (tamaño, mtime, SHA1/CRC32 y los metadatos de
+mp4_probe) queda en un JSON junto a los videos (.videos_manifest.json):
+en la próxima corrida solo se vuelven a leer los archivos cuyo tamaño o
+mtime cambió, y esos se hashean en bloques en un pool de threads (hashlib
+y zlib liberan el GIL).
+
+Cada video esperado queda en uno de cuatro estados:
+
+- missing: no está en la carpeta
+- corrupt: está, pero no es un MP4 completo (mp4_probe no lo puede leer)
+- changed: el contenido es distinto del registrado (o no había registro)
+- unchanged: mismo contenido que el registrado
+"""
+
+import json
+import os
+import struct
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from media_store import MediaDigest, hash_file
+from mp4_probe import Mp4Error, Mp4Info, probe
+
+MANIFEST_NAME = ".videos_manifest.json"
+STATUSES = ("missing", "corrupt", "changed", "unchanged")
+
+# Campos de Mp4Info que se guardan en el manifest
+_INFO_FIELDS = ("duration", "width", "height", "codec", "faststart")
+
+
+@dataclass
+class VideoStatus:
+    name: str
+    status: str                  # uno de STATUSES
+    detail: str = ""
+    info: Mp4Info | None = None  # None si falta o está corrupto
+    digest: MediaDigest | None = None
+
+
+class VideoReport:
+    """Resultado de verify_videos, por nombre de video"""
+
+    def __init__(self, videos_dir, videos, hashed):
+        self.videos_dir = Path(videos_dir)
+        self.videos = videos     # {nombre: VideoStatus}, en el orden esperado
+        self.hashed = hashed     # archivos leídos en esta corrida
+
+    def by_status(self, status):
+        return [video for video in self.videos.values() if video.status == status]
+
+    def available(self, name):
+        """Mp4Info del video si se puede insertar, si no None"""
+        video = self.videos.get(name)
+        return video.info if video is not None else None
+
+    def digest(self, path):
+        """MediaDigest de un video verificado (lo lee si no está en el reporte)"""
+        video = self.videos.get(Path(path).name)
+        if video is None or video.digest is None:
+            return hash_file(path)
+        return video.digest
+
+
+def _scan(videos_dir):
+    """{nombre: os.stat_result} de los archivos de la carpeta, en una sola pasada"""
+    try:
+        with os.scandir(videos_dir) as entries:
+            return {entry.name: entry.stat() for entry in entries if entry.is_file()}
+    except FileNotFoundError:
+        return {}
+
+
+def _load(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["videos"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return {}
+
+
+def _check(path):
+    """(Mp4Info o None, motivo, MediaDigest) leyendo el archivo"""
+    digest = hash_file(path)
+    try:
+        return probe(path), "", digest
+    except (Mp4Error, struct.error) as e:
+        return None, str(e), digest
+
+
+def verify_videos(videos_dir, names, rehash=False, workers=None):
+    """
+    Verificar los videos esperados y actualizar el manifest de la carpeta
+
+    Args:
+        videos_dir: Carpeta de los videos
+        names: Nombres esperados (p. ej. video_map.video_names(VIDEOS))
+        rehash: Volver a leer todos los archivos aunque no hayan cambiado
+        workers: Threads para hashear (por defecto, los de ThreadPoolExecutor)
+
+    Returns:
+        VideoReport
+    """
+    videos_dir = Path(videos_dir)
+    manifest_path = videos_dir / MANIFEST_NAME
+    found = _scan(videos_dir)
+    recorded = _load(manifest_path)
+
+    videos = {}
+    to_check = []
+    for name in dict.fromkeys(names):
+        st = found.get(name)
+        entry = recorded.get(name)
+        if st is None:
+            videos[name] = VideoStatus(name, "missing", "no encontrado")
+        elif (not rehash and entry and entry["size"] == st.st_size
+                and entry["mtime_ns"] == st.st_mtime_ns):
+            videos[name] = _from_entry(videos_dir, name, entry)
+        else:
+            to_check.append(name)
+
+    if to_check:
+        # Import diferido: con el manifest al día (lo normal en `check`) no hace falta
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            checked = pool.map(lambda name: _check(videos_dir / name), to_check)
+            for name, (info, error, digest) in zip(to_check, checked):
+                entry = recorded.get(name)
+                if info is None:
+                    videos[name] = VideoStatus(name, "corrupt", error, None, digest)
+                elif entry and entry["sha1"] == digest.sha1:
+                    videos[name] = VideoStatus(name, "unchanged", "", info, digest)
+                else:
+                    detail = "contenido distinto" if entry else "sin registro previo"
+                    videos[name] = VideoStatus(name, "changed", detail, info, digest)
+                recorded[name] = {"size": found[name].st_size,
+                                  "mtime_ns": found[name].st_mtime_ns,
+                                  **asdict(digest), "error": error,
+                                  **{f: getattr(info, f) if info else None
+                                     for f in _INFO_FIELDS}}
+
+        tmp_path = manifest_path.with_name(f"{MANIFEST_NAME}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"videos": recorded}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+
+    ordered = {name: videos[name] for name in dict.fromkeys(names)}
+    return VideoReport(videos_dir, ordered, len(to_check))
+
+
+def _from_entry(videos_dir, name, entry):
+    """VideoStatus de un archivo sin cambios, desde el manifest"""
+    digest = MediaDigest(entry["sha1"], entry["crc32"], entry["size"])
+    if entry["error"]:
+        return VideoStatus(name, "corrupt", entry["error"], None, digest)
+    info = Mp4Info(videos_dir / name, entry["size"],
+                   **{f: entry[f] for f in _INFO_FIELDS})
+    return VideoStatus(name, "unchanged", "", info, digest)
+
+
+def print_report(report):
+    """Un bloque por estado, con el motivo de los faltantes y corruptos"""
+    labels = {"missing": "Faltan", "corrupt": "Corruptos", "changed": "Cambiados",
+              "unchanged": "Sin cambios"}
+    for status in STATUSES:
+        videos = report.by_status(status)
+        print(f"{labels[status]}: {len(videos)}")
+        if status == "unchanged":
+            continue
+        for video in videos:
+            detail = f" ({video.detail})" if video.detail else ""
+            print(f"  - {video.name}{detail}")
+    print(f"Archivos leídos: {report.hashed} de {len(report.videos)}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from video_map import VIDEOS, video_names
+
+    parser = argparse.ArgumentParser(description="Verificar la carpeta de videos de la demo")
+    parser.add_argument("videos_dir", nargs="?", default="videos_demo",
+                        help="Carpeta de los videos (por defecto videos_demo)")
+    parser.add_argument("--rehash", action="store_true",
+                        help="Volver a leer todos los videos aunque no hayan cambiado")
+    args = parser.parse_args()
+
+    report = verify_videos(args.videos_dir, video_names(VIDEOS), args.rehash)
+    print_report(report)
+    if report.by_status("missing") or report.by_status("corrupt"):
+        raise SystemExit(1)
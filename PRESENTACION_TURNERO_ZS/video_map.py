@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Qué video va en qué slide
+
+Cada slide de slides.json nombra su video en el campo "video" (un archivo,
+o una lista si el slide muestra varios, como el de login). Los mapas de
+videos van de índice del slide → archivo o lista de archivos; VIDEOS es el
+de la spec por defecto.
+
+Vive en un módulo aparte, sin dependencias, para que lo puedan leer las
+herramientas livianas (turnero_deck.py check, video_manifest.py) sin
+importar python-pptx; insert_videos_pptx.py lo reexporta.
+"""
+
+import json
+from pathlib import Path
+
+# La misma spec que create_presentation.SPEC_PATH
+SPEC_PATH = Path(__file__).with_name("slides.json")
+
+
+def spec_videos(slides):
+    """{índice: [archivos]} según el campo "video" de cada slide de la spec"""
+    videos = {}
+    for index, spec in enumerate(slides):
+        names = spec.get("video")
+        if names:
+            videos[index] = [names] if isinstance(names, str) else list(names)
+    return videos
+
+
+def load_videos(spec_path=SPEC_PATH):
+    """Mapa de videos de la spec JSON en `spec_path`"""
+    with open(spec_path, encoding="utf-8") as f:
+        return spec_videos(json.load(f)["slides"])
+
+
+def slide_videos(videos):
+    """(índice, [archivos]) de cada slide de un mapa de videos, en orden de slide"""
+    for index in sorted(videos):
+        names = videos[index]
+        yield index, [names] if isinstance(names, str) else list(names)
+
+
+def video_names(videos):
+    """Archivos de un mapa de videos, sin repetir"""
+    return list(dict.fromkeys(name for _, names in slide_videos(videos) for name in names))
+
+
+# Video mapping - qué video va en qué slide
+VIDEOS = load_videos()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Copia de entradas ZIP sin descomprimir ni recomprimir
+
+zipfile solo sabe escribir a partir de datos sin comprimir. Estas funciones
+escriben una entrada cuyo contenido ya está comprimido (copiado tal cual de
+otro ZIP, o comprimido aparte), con su CRC y tamaños ya conocidos.
+"""
+
+import copy
+import struct
+import zipfile
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def raw_data_offset(src, info):
+    """Posición en el archivo donde empiezan los datos comprimidos de `info`"""
+    src.fp.seek(info.header_offset)
+    header = src.fp.read(zipfile.sizeFileHeader)
+    if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"encabezado local inválido para {info.filename}")
+    name_len, extra_len = struct.unpack("<HH", header[26:30])
+    return info.header_offset + zipfile.sizeFileHeader + name_len + extra_len
+
+
+def iter_raw_chunks(src, info, chunk_size=CHUNK_SIZE):
+    """Bloques de datos comprimidos de `info` tal como están en el ZIP origen"""
+    offset = raw_data_offset(src, info)
+    remaining = info.compress_size
+    while remaining:
+        src.fp.seek(offset)
+        chunk = src.fp.read(min(chunk_size, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"datos truncados en {info.filename}")
+        offset += len(chunk)
+        remaining -= len(chunk)
+        yield chunk
+
+
+def write_raw_entry(dst, zinfo, chunks):
+    """
+    Escribir una entrada con datos ya comprimidos
+
+    `zinfo` debe traer compress_type, CRC, compress_size y file_size
+    correctos para los datos de `chunks`.
+    """
+    zinfo.flag_bits &= ~0x08        # sin data descriptor: CRC y tamaños van en el encabezado
+    zinfo.extra = b""               # FileHeader() agrega el extra zip64 si hace falta
+    zip64 = max(zinfo.file_size, zinfo.compress_size) > zipfile.ZIP64_LIMIT
+    with dst._lock:
+        if dst._writing:
+            raise ValueError("hay otra entrada abierta para escritura en el ZIP destino")
+        dst._writecheck(zinfo)
+        dst._didModify = True
+        dst.fp.seek(dst.start_dir)
+        zinfo.header_offset = dst.fp.tell()
+        dst.fp.write(zinfo.FileHeader(zip64))
+        for chunk in chunks:
+            dst.fp.write(chunk)
+        dst.start_dir = dst.fp.tell()
+        dst.filelist.append(zinfo)
+        dst.NameToInfo[zinfo.filename] = zinfo
+
+
+def copy_raw_entry(src, info, dst, chunk_size=CHUNK_SIZE):
+    """Copiar la entrada `info` de `src` a `dst` sin descomprimirla"""
+    zinfo = copy.copy(info)
+    write_raw_entry(dst, zinfo, iter_raw_chunks(src, info, chunk_size))
+    return info.compress_size